@@ -0,0 +1,6 @@
+"""
+Local stand-ins and benchmark scripts for dhl_rerouter_poc.
+
+Run benchmarks from the project root, e.g.:
+    uv run -- python -m benchmarks.bench_imap_fetch
+"""
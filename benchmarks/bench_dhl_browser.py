@@ -0,0 +1,93 @@
+"""
+End-to-end benchmark of DHLCarrier's browser path against the local dhl.de stand-in:
+tracking checks per minute (real Chrome, real page waits and extraction, recorded
+shipments in transit, delivered and without options) and the latency of a confirmed
+drop-off reroute, for each number of concurrent checks. Needs Chrome, not dhl.de:
+
+    uv run -- python -m benchmarks.bench_dhl_browser --shipments 60 --workers 1,2,4 --render-delay 0.3
+    uv run -- python -m benchmarks.bench_dhl_browser --latency 0.1 --reroutes 10 --visible
+"""
+import argparse
+import logging
+import statistics
+import threading
+import time
+
+from benchmarks.dhl_standin import DhlStandin
+from dhl_rerouter_poc.browser_pool import BrowserPool
+from dhl_rerouter_poc.carriers.dhl import DHLCarrier
+from dhl_rerouter_poc.check_pool import CheckPool
+from dhl_rerouter_poc.config import resolve_path
+from dhl_rerouter_poc.driver_cache import DriverCache
+
+RECORDINGS = ("in_transit", "in_transit", "delivered", "no_options")
+ZIP = "12345"
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--shipments", type=int, default=40, help="tracking checks per setting")
+    p.add_argument("--workers", default="1,2", help="comma-separated concurrent checks (Chrome instances)")
+    p.add_argument("--reroutes", type=int, default=5, help="confirmed reroutes per setting")
+    p.add_argument("--latency", type=float, default=0.05, help="simulated server round-trip per request (seconds)")
+    p.add_argument("--render-delay", type=float, default=0.2, help="page render time after a click (seconds)")
+    p.add_argument("--timeout", type=int, default=10, help="page wait timeout (seconds)")
+    p.add_argument("--visible", action="store_true", help="run Chrome with a visible window")
+    p.add_argument("--driver-cache", default=".chrome_driver_cache", help="DriverCache directory ('' = off)")
+    args = p.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    driver_cache = DriverCache(resolve_path(args.driver_cache)) if args.driver_cache else None
+    with DhlStandin(latency=args.latency, render_delay=args.render_delay) as srv:
+        codes = [f"00340434{i:012d}" for i in range(args.shipments)]
+        for i, code in enumerate(codes):
+            srv.add_shipment(code, RECORDINGS[i % len(RECORDINGS)])
+        reroute_codes = codes[::len(RECORDINGS)][:args.reroutes]  # in transit, drop-off location offered
+        print(f"{len(codes)} shipments, {args.latency * 1000:.0f} ms latency, {args.render_delay * 1000:.0f} ms render delay")
+        print(f"{'workers':>7} {'checks/min':>11} {'failed':>7} {'reroute avg s':>14} {'p50 s':>7} {'max s':>7} {'saved':>6}")
+        for workers in (int(w) for w in args.workers.split(",")):
+            pool = BrowserPool(headless=not args.visible, size=workers, max_uses=0, driver_cache=driver_cache)
+            carrier = DHLCarrier(srv.carrier_config(tracking_mode="browser", timeout=args.timeout), browser_pool=pool)
+            failed = []
+            lock = threading.Lock()
+
+            def check(code: str) -> None:
+                if carrier.check_reroute_availability(code, ZIP, timeout=args.timeout).status != "success":
+                    with lock:
+                        failed.append(code)
+
+            check_pool = CheckPool(workers=workers)
+            try:
+                for code in codes[:workers]:  # launch Chrome before timing
+                    check_pool.submit("DHL", workers, check, code)
+                check_pool.join()
+                failed.clear()
+                t0 = time.perf_counter()
+                for code in codes:
+                    check_pool.submit("DHL", workers, check, code)
+                check_pool.join()
+                checks_per_min = len(codes) / (time.perf_counter() - t0) * 60
+                del srv.reroutes[:]
+                latencies = []
+                for code in reroute_codes:
+                    t0 = time.perf_counter()
+                    carrier.reroute_shipment(code, ZIP, "Garage", highlight_only=False, timeout=args.timeout)
+                    latencies.append(time.perf_counter() - t0)
+            finally:
+                check_pool.close()
+                carrier.close()
+                pool.close()
+            print(
+                f"{workers:>7} {checks_per_min:>11.1f} {len(failed):>7} "
+                f"{statistics.mean(latencies) if latencies else 0:>14.2f} "
+                f"{statistics.median(latencies) if latencies else 0:>7.2f} {max(latencies, default=0):>7.2f} "
+                f"{len(srv.reroutes):>6}"
+            )
+            steps = {step: round(carrier.step_seconds[step] / n, 3) for step, n in carrier.step_counts.most_common()}
+            print(f"        avg seconds per step: {steps}")
+    if driver_cache is not None:
+        print(f"Chrome starts: {dict(driver_cache.stats)}")
+
+
+if __name__ == "__main__":
+    main()
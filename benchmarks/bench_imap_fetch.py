@@ -0,0 +1,62 @@
+"""
+Benchmark ImapEmailClient.fetch_messages against the local IMAP stand-in.
+
+Compares one UID FETCH round-trip per message (batch size 1) with pipelined
+batches, full RFC822 downloads with BODYSTRUCTURE-driven text-part fetches, and
+one connection with a pool of concurrent connections, printing messages per second
+and bytes received for each setting:
+
+    uv run -- python -m benchmarks.bench_imap_fetch --messages 2000 --latency 0.005 --attachment-kb 200
+    uv run -- python -m benchmarks.bench_imap_fetch --folders 6 --latency 0.05 --batch-sizes 100 --connections 1,4
+"""
+import argparse
+import logging
+import time
+
+from benchmarks.imap_standin import ImapStandin, make_message
+from dhl_rerouter_poc.email_client import ImapEmailClient
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--messages", type=int, default=1000, help="messages in the stand-in INBOX")
+    p.add_argument("--latency", type=float, default=0.002, help="simulated server round-trip per command (seconds)")
+    p.add_argument("--batch-sizes", default="1,50,500", help="comma-separated fetch_batch_size values")
+    p.add_argument("--modes", default="rfc822,text_parts", help="comma-separated fetch_mode values")
+    p.add_argument("--attachment-kb", type=int, default=0, help="attach a PDF of this size to every 4th message")
+    p.add_argument("--folders", type=int, default=1, help="spread the messages over this many folders")
+    p.add_argument("--connections", default="1", help="comma-separated max_connections values")
+    args = p.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    with ImapStandin(latency=args.latency) as srv:
+        attachment = b"%PDF" * (args.attachment_kb * 256) if args.attachment_kb else None
+        folders = ["INBOX"] + [f"Folder{n}" for n in range(1, args.folders)]
+        for i in range(args.messages):
+            srv.add_message(folders[i % len(folders)], make_message(
+                f"Order {i}", f"Your parcel JJD{i:018d} is on its way.",
+                html=f"<p>Your parcel <b>JJD{i:018d}</b> is on its way.</p>",
+                attachment=attachment if i % 4 == 0 else None,
+            ))
+        print(f"{args.messages} messages, {args.latency * 1000:.1f} ms simulated latency")
+        print(f"{'mode':>10} {'batch':>6} {'conns':>6} {'seconds':>9} {'msgs/s':>10} {'KiB recv':>10}")
+        for mode in args.modes.split(","):
+            for batch in (int(b) for b in args.batch_sizes.split(",")):
+                for conns in (int(c) for c in args.connections.split(",")):
+                    client = ImapEmailClient(srv.client_config(
+                        folders, fetch_batch_size=batch, fetch_mode=mode, max_connections=conns,
+                    ))
+                    sent = srv.stats["bytes_sent"]
+                    t0 = time.perf_counter()
+                    bodies = client.fetch_messages()
+                    elapsed = time.perf_counter() - t0
+                    received = (srv.stats["bytes_sent"] - sent) / 1024
+                    assert len(bodies) == args.messages
+                    print(
+                        f"{mode:>10} {batch:>6} {conns:>6} {elapsed:>9.3f} "
+                        f"{len(bodies) / elapsed:>10.1f} {received:>10.0f}"
+                    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark the local mbox source (memory-mapped scanning) against the standard library
+`mailbox` + `email` parsing, including the tracking-code extraction stage, without a
+mail server:
+
+    uv run -- python -m benchmarks.bench_local_source --messages 20000 --attachment-kb 200
+    uv run -- python -m benchmarks.bench_local_source --mbox ~/exports/2024.mbox
+    uv run -- python -m benchmarks.bench_local_source --code-ratio 0.2 --readers mmap,prefilter
+    uv run -- python -m benchmarks.bench_local_source --readers prefilter,pool --workers 4
+"""
+import argparse
+import logging
+import mailbox
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.imap_standin import make_message
+from dhl_rerouter_poc.email_client import message_text
+from dhl_rerouter_poc.parse_pool import ParsePool
+from dhl_rerouter_poc.parser import BytePrefilter, extract_tracking_codes
+from dhl_rerouter_poc.sources.local import MboxSource
+
+PATTERNS = {"DHL": [r"\bJJD\d{10,}\b", r"\b0034\d{8,}\b"], "UPS": [r"\b1Z[0-9A-Z]{16}\b"]}
+
+
+NEWSLETTER = "<p>Unsere Angebote der Woche: bis zu 30 % Rabatt auf Gartenm&ouml;bel.</p>" * 40
+
+
+def _write_mbox(path: Path, messages: int, attachment_kb: int, code_ratio: float) -> None:
+    attachment = b"%PDF" * (attachment_kb * 256) if attachment_kb else None
+    with open(path, "wb") as f:
+        for i in range(messages):
+            if (i * code_ratio) % 1 + code_ratio >= 1:
+                raw = make_message(
+                    f"Order {i}", f"Your parcel JJD{i:018d} is on its way.",
+                    html=f"<p>Your parcel <b>JJD{i:018d}</b> is on its way.</p>",
+                    attachment=attachment if i % 4 == 0 else None,
+                )
+            else:
+                raw = make_message(f"Newsletter {i}", "Angebote der Woche", html=NEWSLETTER)
+            f.write(b"From shop@example.com Mon Jan  1 00:00:00 2024\n" + raw.replace(b"\nFrom ", b"\n>From ") + b"\n")
+
+
+def _stdlib(path: Path, workers: int):
+    for msg in mailbox.mbox(path, create=False):
+        yield message_text(msg)
+
+
+def _mmap(path: Path, workers: int):
+    for msg in MboxSource(path).iter_messages():
+        yield msg.body
+
+
+def _prefilter(path: Path, workers: int):
+    for msg in MboxSource(path, prefilter=BytePrefilter(PATTERNS)).iter_messages():
+        yield msg.body
+
+
+def _pool(path: Path, workers: int):
+    # ParsePool also extracts the codes; the loop below re-extracts them from the returned bodies
+    pool = ParsePool(PATTERNS, workers=workers)
+    for msg, _ in pool.map(MboxSource(path, prefilter=BytePrefilter(PATTERNS)).iter_raw_messages()):
+        yield msg.body
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--mbox", type=Path, help="existing mbox file to read (default: generate a synthetic one)")
+    p.add_argument("--messages", type=int, default=5000, help="messages in the synthetic mbox")
+    p.add_argument("--attachment-kb", type=int, default=100, help="attach a PDF of this size to every 4th message")
+    p.add_argument("--code-ratio", type=float, default=1.0, help="share of synthetic messages with a tracking code")
+    p.add_argument("--readers", default="stdlib,mmap,prefilter,pool", help="comma-separated readers to compare")
+    p.add_argument("--workers", type=int, default=0, help="ParsePool worker processes for the pool reader (0 = one per CPU)")
+    args = p.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.mbox
+        if path is None:
+            path = Path(tmp) / "bench.mbox"
+            _write_mbox(path, args.messages, args.attachment_kb, args.code_ratio)
+        size_mb = path.stat().st_size / 2**20
+        print(f"{path}: {size_mb:.1f} MiB")
+        print(f"{'reader':>9} {'messages':>9} {'codes':>7} {'seconds':>9} {'msgs/s':>10} {'MiB/s':>8}")
+        readers = {"stdlib": _stdlib, "mmap": _mmap, "prefilter": _prefilter, "pool": _pool}
+        for name in args.readers.split(","):
+            t0 = time.perf_counter()
+            count = codes = 0
+            for body in readers[name](path, args.workers):
+                count += 1
+                codes += len(extract_tracking_codes(body, PATTERNS))
+            elapsed = time.perf_counter() - t0
+            print(f"{name:>9} {count:>9} {codes:>7} {elapsed:>9.3f} {count / elapsed:>10.1f} {size_mb / elapsed:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
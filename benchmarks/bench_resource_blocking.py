@@ -0,0 +1,53 @@
+"""
+Compare DHL tracking checks in Chrome with resource blocking off and on: average page
+load time, bytes transferred and requests per tracking page, from DHLCarrier.page_stats.
+Needs Chrome and access to dhl.de (there is no local page stand-in for the browser path):
+
+    uv run -- python -m benchmarks.bench_resource_blocking --codes 00340434175967421417 --zip 12345 --runs 3
+
+Bytes are summed from the Resource Timing API; cross-origin responses without a
+Timing-Allow-Origin header count as 0 bytes, so the "on" savings are a lower bound.
+"""
+import argparse
+import logging
+import time
+
+from dhl_rerouter_poc.browser_pool import BrowserPool
+from dhl_rerouter_poc.carriers.dhl import DHLCarrier
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--codes", required=True, help="comma-separated tracking numbers")
+    p.add_argument("--zip", required=True, help="recipient zip code")
+    p.add_argument("--runs", type=int, default=3, help="checks per tracking number and setting")
+    p.add_argument("--timeout", type=int, default=20, help="page wait timeout (seconds)")
+    p.add_argument("--visible", action="store_true", help="run Chrome with a visible window")
+    args = p.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    codes = [c.strip() for c in args.codes.split(",") if c.strip()]
+    print(f"{len(codes)} tracking number(s), {args.runs} run(s) each")
+    print(f"{'blocking':>8} {'loads':>6} {'avg load s':>11} {'avg KiB':>9} {'avg reqs':>9} {'failed':>7} {'seconds':>9}")
+    for block in (False, True):
+        pool = BrowserPool(headless=not args.visible, size=1, max_uses=0)
+        carrier = DHLCarrier({"block_resources": block, "timeout": args.timeout}, browser_pool=pool)
+        failed = 0
+        t0 = time.perf_counter()
+        try:
+            for _ in range(args.runs):
+                for code in codes:
+                    failed += carrier.check_reroute_availability(code, args.zip).status != "success"
+        finally:
+            elapsed = time.perf_counter() - t0
+            pool.close()
+        stats = carrier.page_stats
+        loads = stats["loads"] or 1
+        print(
+            f"{'on' if block else 'off':>8} {stats['loads']:>6} {stats['seconds'] / loads:>11.2f} "
+            f"{stats['bytes'] / loads / 1024:>9.0f} {stats['requests'] / loads:>9.1f} {failed:>7} {elapsed:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Micro-benchmark tracking-code extraction over a synthetic corpus: one re.findall()
+scan per configured pattern (the previous extract_tracking_codes) against the
+single-pass TrackingMatcher, verifying that both find the same codes:
+
+    uv run -- python -m benchmarks.bench_tracking_matcher --emails 10000
+"""
+import argparse
+import random
+import re
+import time
+
+from dhl_rerouter_poc.parser import TrackingMatcher
+
+PATTERNS = {
+    "DHL": [r"\bJJD\d{10,}\b", r"\b0034\d{8,}\b"],
+    "Hermes": [r"\bHR\d{10}\b"],
+    "UPS": [r"\b1Z[0-9A-Z]{16}\b"],
+    "DPD": [r"\b0145\d{8}\b"],
+    "eBay Global": [r"\bEE\d{25}N\b"],
+    "GLS": [r"\b\d{11}\b"],
+}
+
+WORDS = (
+    "Ihre Bestellung wurde versandt und ist auf dem Weg zu Ihnen Sendung Paket Lieferung "
+    "your order has shipped track package delivery newsletter offer discount invoice 2025 42 "
+).split()
+
+
+def _code(rng: random.Random) -> str:
+    digits = lambda n: "".join(rng.choice("0123456789") for _ in range(n))  # noqa: E731
+    return rng.choice([
+        lambda: "JJD" + digits(18),
+        lambda: "0034" + digits(16),
+        lambda: "HR" + digits(10),
+        lambda: "1Z" + "".join(rng.choice("0123456789ABCDEFGHJKLMNPRSTUVWXYZ") for _ in range(16)),
+        lambda: "0145" + digits(8),
+        lambda: "EE" + digits(25) + "N",
+        lambda: digits(11),
+    ])()
+
+
+def corpus(emails: int, words: int, code_ratio: float, seed: int = 1) -> list[str]:
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(emails):
+        tokens = [rng.choice(WORDS) for _ in range(rng.randint(words // 2, words * 2))]
+        if rng.random() < code_ratio:
+            tokens.insert(rng.randrange(len(tokens)), _code(rng))
+        texts.append(" ".join(tokens))
+    return texts
+
+
+def per_pattern(text: str, patterns: dict) -> dict:
+    found = {}
+    for carrier, pats in patterns.items():
+        for pat in pats:
+            for m in re.findall(pat, text):
+                found[m] = carrier
+    return found
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--emails", type=int, default=10000, help="synthetic emails in the corpus")
+    p.add_argument("--words", type=int, default=300, help="typical words per email")
+    p.add_argument("--code-ratio", type=float, default=0.2, help="share of emails containing a tracking code")
+    args = p.parse_args()
+
+    texts = corpus(args.emails, args.words, args.code_ratio)
+    mib = sum(len(t) for t in texts) / 2**20
+    print(f"{len(texts)} emails, {mib:.1f} MiB of text, {sum(len(v) for v in PATTERNS.values())} patterns")
+
+    t0 = time.perf_counter()
+    expected = [per_pattern(t, PATTERNS) for t in texts]
+    legacy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    matcher = TrackingMatcher(PATTERNS)
+    found = [matcher.extract(t) for t in texts]
+    combined = time.perf_counter() - t0
+
+    assert found == expected, "TrackingMatcher results differ from the per-pattern scan"
+    print(f"{'matcher':>12} {'seconds':>9} {'emails/s':>10} {'MiB/s':>8}")
+    for name, elapsed in (("per-pattern", legacy), ("combined", combined)):
+        print(f"{name:>12} {elapsed:>9.3f} {len(texts) / elapsed:>10.0f} {mib / elapsed:>8.1f}")
+    print(f"codes found: {sum(len(f) for f in found)}; speed-up {legacy / combined:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+dhl_standin.py
+
+Minimal local HTTP server standing in for dhl.de in tests and benchmarks. It serves
+recorded responses of the tracking JSON endpoint (benchmarks/fixtures/dhl_api/*.json)
+per piece code, several comma-separated codes per query, can answer like a blocked
+client (error status or an HTML consent/captcha page) and speaks HTTP/1.1 keep-alive,
+so connection reuse is observable in `stats`.
+
+The tracking page is served too, rendered from the same recordings with the templates
+in benchmarks/fixtures/dhl_pages/: status, estimated delivery, history, the "You are
+not at home?" toggle, the delivery options list and the drop-off location form with
+consent checkbox and Confirm button, laid out for the selectors in selectors_dhlde.py.
+Its script renders the options and the form a configurable delay after the click that
+asks for them (the options list first, its items after a second delay), and posts a confirmed drop-off location back to the stand-in
+(`reroutes`), so DHLCarrier's browser path runs end-to-end without dhl.de.
+An optional per-request latency simulates a remote server round-trip.
+"""
+import copy
+import html
+import json
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from string import Template
+from urllib.parse import parse_qs, urlsplit
+
+from dhl_rerouter_poc.selectors_dhlde import TRACKING_API_PATH, TRACKING_PAGE_PATH
+
+import logging
+logger = logging.getLogger(__name__)
+
+FIXTURES = Path(__file__).parent / "fixtures" / "dhl_api"
+PAGES = Path(__file__).parent / "fixtures" / "dhl_pages"
+API_PATH = TRACKING_API_PATH
+PAGE_PATH = TRACKING_PAGE_PATH
+REROUTE_PATH = "/reroute"
+WEEKDAYS = ("Mo", "Tu", "We", "Th", "Fr", "Sa", "Su")
+
+BLOCKED_PAGE = (
+    b"<!DOCTYPE html><html><head><title>Access Denied</title></head>"
+    b"<body><p>Please confirm that you are not a robot.</p></body></html>"
+)
+
+
+def recorded_response(name: str) -> dict:
+    """Load a recorded tracking API response, e.g. 'in_transit', 'delivered', 'no_options'."""
+    return json.loads((FIXTURES / f"{name}.json").read_text(encoding="utf-8"))
+
+
+def _page_date(timestamp: str | None) -> str:
+    if not timestamp:
+        return ""
+    day = datetime.fromisoformat(timestamp)
+    return f"{WEEKDAYS[day.weekday()]}, {day:%d.%m.%Y}"
+
+
+def render_page(shipments: list[dict], render_delay: float = 0.0) -> str:
+    """Render the tracking page for recorded API shipments (an empty list: nothing found)."""
+    shipment_template = Template((PAGES / "shipment.html").read_text(encoding="utf-8"))
+    parts = []
+    for shipment in shipments:
+        details = shipment.get("sendungsdetails", {})
+        history = details.get("sendungsverlauf", {})
+        events = [
+            " ".join(filter(None, (_page_date(e.get("datum")), (e.get("datum") or "")[11:16], e.get("ort"))))
+            + f": {e.get('status', '')}"
+            for e in history.get("events", [])
+        ]
+        options = [o["name"] for o in details.get("verfuegen", {}).get("optionen", [])]
+        parts.append(shipment_template.substitute(
+            tracking_number=html.escape(shipment["id"]),
+            status=html.escape(history.get("kurzStatus", "")),
+            delivery_date=html.escape(_page_date(details.get("zustellung", {}).get("zustellzeitfensterVon"))),
+            history="\n".join(
+                f'      <li data-testid="shipment-course-entry">{html.escape(e)}</li>' for e in events
+            ),
+            options="\n".join(
+                f'          <li data-name="{html.escape(name)}">{html.escape(name.replace("_", " ").capitalize())}</li>'
+                for name in options
+            ),
+        ))
+    if not parts:
+        parts.append("<p>No shipment was found for this shipment number.</p>")
+    return Template((PAGES / "tracking.html").read_text(encoding="utf-8")).substitute(
+        shipments="\n".join(parts), render_delay=int(render_delay * 1000)
+    )
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def setup(self) -> None:
+        super().setup()
+        with self.server.standin.lock:
+            self.server.standin.stats["connections"] += 1
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug("dhl stand-in: " + format, *args)
+
+    def _send(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        standin = self.server.standin
+        if standin.latency:
+            time.sleep(standin.latency)
+        url = urlsplit(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        with standin.lock:
+            standin.stats["requests"] += 1
+            standin.requests.append((url.path, query))
+            codes = [c for c in query.get("piececode", "").split(",") if c]
+            blocked = next((standin.blocked[c] for c in codes + ["*"] if c in standin.blocked), None)
+            shipments = [s for c in codes for s in standin.shipments.get(c, {}).get("sendungen", [])]
+        if url.path == PAGE_PATH:
+            page = render_page(shipments, standin.render_delay).encode("utf-8")
+            self._send(200, page, "text/html; charset=utf-8")
+        elif url.path != API_PATH:
+            self._send(404, b"not found", "text/plain")
+        elif blocked is not None:
+            self._send(blocked, BLOCKED_PAGE, "text/html; charset=utf-8")
+        else:
+            body = json.dumps({"sendungen": shipments}).encode("utf-8")
+            self._send(200, body, "application/json;charset=UTF-8")
+
+    def do_POST(self) -> None:
+        standin = self.server.standin
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path != REROUTE_PATH:
+            self._send(404, b"not found", "text/plain")
+            return
+        reroute = json.loads(body)
+        with standin.lock:
+            standin.stats["requests"] += 1
+            standin.reroutes.append((reroute["piececode"], reroute["location"]))
+        self._send(200, b"{}", "application/json;charset=UTF-8")
+
+
+class DhlStandin:
+    """
+    Local dhl.de stand-in backed by in-memory recorded responses. Use as a context manager:
+
+        with DhlStandin() as srv:
+            srv.add_shipment("00340434175967421417", "in_transit")
+            carrier = DHLCarrier(srv.carrier_config())
+
+    `render_delay` (seconds) is how long the tracking page takes to render the delivery
+    options list, then its items, and the drop-off form after a click; confirmed drop-off locations are
+    collected in `reroutes` as (piece code, location).
+    """
+
+    def __init__(self, latency: float = 0.0, render_delay: float = 0.0):
+        self.latency = latency
+        self.render_delay = render_delay
+        self.shipments: dict[str, dict] = {}
+        self.blocked: dict[str, int] = {}  # piece code (or "*") → HTTP status of the consent page
+        self.requests: list[tuple[str, dict]] = []
+        self.reroutes: list[tuple[str, str]] = []
+        self.stats: dict[str, int] = {"connections": 0, "requests": 0}
+        self.lock = threading.Lock()
+        self._server: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self) -> "DhlStandin":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    @property
+    def api_url(self) -> str:
+        return self.base_url + API_PATH
+
+    def page_url(self, tracking_number: str, zip_code: str = "12345") -> str:
+        return f"{self.base_url}{PAGE_PATH}?piececode={tracking_number}&zip={zip_code}&lang=en"
+
+    def start(self) -> None:
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.standin = self
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def carrier_config(self, **extra) -> dict:
+        """Return a `carriers.DHL` config section pointing DHLCarrier (HTTP fast path and pages) at this stand-in."""
+        cfg = {"tracking_mode": "http", "base_url": self.base_url, "tracking_api_url": self.api_url, "timeout": 5}
+        cfg.update(extra)
+        return cfg
+
+    def add_shipment(self, tracking_number: str, recording: str | dict) -> None:
+        """Serve a recorded response (fixture name or parsed JSON) for `tracking_number`."""
+        payload = copy.deepcopy(recorded_response(recording) if isinstance(recording, str) else recording)
+        for shipment in payload.get("sendungen", []):
+            shipment["id"] = tracking_number
+            shipment.setdefault("sendungsinfo", {})["gesuchteSendungsnummer"] = tracking_number
+        with self.lock:
+            self.shipments[tracking_number] = payload
+
+    def block(self, tracking_number: str = "*", status: int = 200) -> None:
+        """Answer requests for `tracking_number` ("*": all) with an HTML consent/captcha page."""
+        with self.lock:
+            self.blocked[tracking_number] = status
@@ -0,0 +1,557 @@
+"""
+imap_standin.py
+
+Minimal in-process IMAP4rev1 server used as a local stand-in for tests and benchmarks.
+It implements just enough of RFC 3501 for ImapEmailClient: LOGIN, SELECT/EXAMINE,
+SEARCH (including FROM/SUBJECT/BODY/OR/NOT), FETCH (plain and UID variants, including
+BODYSTRUCTURE, HEADER.FIELDS and partial BODY[<section>]<origin.octets> fetches),
+IDLE (new messages are pushed as untagged EXISTS), NOOP and LOGOUT. An optional per-command latency simulates a remote server round-trip.
+"""
+import email
+import email.utils
+import re
+import socket
+import socketserver
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from email.message import Message
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StoredMessage:
+    uid: int
+    raw: bytes
+    internaldate: date
+
+    _parsed: Message | None = field(default=None, repr=False)
+
+    @property
+    def parsed(self) -> Message:
+        if self._parsed is None:
+            self._parsed = email.message_from_bytes(self.raw)
+        return self._parsed
+
+
+@dataclass
+class StandinFolder:
+    uidvalidity: int
+    messages: list[StoredMessage] = field(default_factory=list)
+    next_uid: int = 1
+
+
+def _tokenize(line: str) -> list:
+    """
+    Split an IMAP command line into nested lists of atoms and strings.
+    Bracketed sections (e.g. BODY.PEEK[HEADER.FIELDS (FROM)]) stay one atom.
+    """
+    root: list = []
+    stack = [root]
+    i, n = 0, len(line)
+    while i < n:
+        c = line[i]
+        if c == " ":
+            i += 1
+        elif c == "(":
+            new: list = []
+            stack[-1].append(new)
+            stack.append(new)
+            i += 1
+        elif c == ")":
+            stack.pop()
+            i += 1
+        elif c == '"':
+            i += 1
+            buf = []
+            while i < n and line[i] != '"':
+                if line[i] == "\\" and i + 1 < n:
+                    i += 1
+                buf.append(line[i])
+                i += 1
+            stack[-1].append("".join(buf))
+            i += 1
+        else:
+            start, depth = i, 0
+            while i < n:
+                c = line[i]
+                if c == "[":
+                    depth += 1
+                elif c == "]":
+                    depth -= 1
+                elif depth == 0 and c in " ()":
+                    break
+                i += 1
+            stack[-1].append(line[start:i])
+    return root
+
+
+def _parse_set(spec: str, largest: int) -> set[int]:
+    result: set[int] = set()
+    for chunk in spec.split(","):
+        if ":" in chunk:
+            lo, hi = chunk.split(":", 1)
+            a = largest if lo == "*" else int(lo)
+            b = largest if hi == "*" else int(hi)
+            if a > b:
+                a, b = b, a
+            result.update(range(a, b + 1))
+        else:
+            result.add(largest if chunk == "*" else int(chunk))
+    return result
+
+
+def _searchable_text(msg: "StoredMessage", with_headers: bool) -> str:
+    """Decoded, lower-cased text of all leaf parts, as servers search it."""
+    chunks = []
+    for part in msg.parsed.walk():
+        if part.is_multipart():
+            continue
+        payload = part.get_payload(decode=True) or b""
+        chunks.append(payload.decode(part.get_content_charset() or "utf-8", "replace"))
+    text = "\n".join(chunks)
+    if with_headers:
+        text = msg.raw.split(b"\r\n\r\n", 1)[0].decode("utf-8", "replace") + "\n" + text
+    return text.lower()
+
+
+def _literal(data: bytes) -> bytes:
+    return b"{%d}\r\n" % len(data) + data
+
+
+def _qstr(value: str | None) -> str:
+    if value is None:
+        return "NIL"
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _payload_bytes(part: Message) -> bytes:
+    payload = part.get_payload(decode=False)
+    if isinstance(payload, list):
+        return b"".join(p.as_bytes() for p in payload)
+    try:
+        return payload.encode("ascii", "surrogateescape")
+    except UnicodeEncodeError:
+        # the email package decodes 8bit payloads with the part's charset
+        return payload.encode(part.get_content_charset() or "utf-8")
+
+
+def _bodystructure(part: Message) -> str:
+    """Render a (non-extensible) RFC 3501 BODYSTRUCTURE for a parsed message part."""
+    ctype = part.get_content_type()
+    maintype, subtype = ctype.split("/", 1)
+    if ctype == "message/rfc822":
+        inner = part.get_payload()[0]
+        data = inner.as_bytes()
+        lines = data.count(b"\n")
+        return (
+            f'("MESSAGE" "RFC822" NIL NIL NIL "7BIT" {len(data)} '
+            f"(NIL NIL NIL NIL NIL NIL NIL NIL NIL NIL) {_bodystructure(inner)} {lines})"
+        )
+    if part.is_multipart():
+        children = "".join(_bodystructure(p) for p in part.get_payload())
+        return f"({children} {_qstr(subtype.upper())})"
+    params = part.get_params() or []
+    plist = " ".join(f"{_qstr(k.upper())} {_qstr(v)}" for k, v in params[1:])
+    plist = f"({plist})" if plist else "NIL"
+    enc = part.get("Content-Transfer-Encoding", "7bit").upper()
+    data = _payload_bytes(part)
+    fields = f"{_qstr(maintype.upper())} {_qstr(subtype.upper())} {plist} NIL NIL {_qstr(enc)} {len(data)}"
+    if maintype == "text":
+        lines = data.count(b"\n")
+        fields += f" {lines}"
+    return f"({fields})"
+
+
+def _section_part(msg: Message, path: str) -> Message:
+    """Resolve a section part number such as '2.1' to a message part."""
+    node = msg
+    for idx in (int(x) for x in path.split(".")):
+        if node.get_content_type() == "message/rfc822":
+            node = node.get_payload()[0]
+        if node.is_multipart():
+            node = node.get_payload()[idx - 1]
+        elif idx != 1:
+            raise ValueError(f"no part {path}")
+    return node
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "_Server"
+
+    def setup(self) -> None:
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.selected: StandinFolder | None = None
+        self.idling = False
+        self.known_exists = 0  # message count last reported to the client
+        self._write_lock = threading.Lock()
+        with self.server.standin.lock:
+            self.server.standin.sessions.add(self)
+
+    def finish(self) -> None:
+        with self.server.standin.lock:
+            self.server.standin.sessions.discard(self)
+        try:
+            super().finish()
+        except OSError:
+            pass
+
+    def _send(self, data: bytes) -> None:
+        # IDLE notifications are written from the thread that adds the message
+        with self._write_lock:
+            self.server.standin.stats["bytes_sent"] += len(data)
+            self.wfile.write(data)
+
+    def notify_exists(self) -> None:
+        count = len(self.selected.messages)
+        if count != self.known_exists:
+            self.known_exists = count
+            self._send(b"* %d EXISTS\r\n" % count)
+
+    def handle(self) -> None:
+        self._send(b"* OK IMAP4rev1 stand-in ready\r\n")
+        while True:
+            try:
+                raw = self.rfile.readline()
+            except OSError:
+                return
+            if not raw:
+                return
+            line = raw.decode("utf-8", "replace").rstrip("\r\n")
+            tag, _, rest = line.partition(" ")
+            cmd, _, args = rest.partition(" ")
+            cmd = cmd.upper()
+            uid_mode = cmd == "UID"
+            if uid_mode:
+                cmd, _, args = args.partition(" ")
+                cmd = cmd.upper()
+            standin = self.server.standin
+            standin.stats["commands"] += 1
+            if standin.latency:
+                time.sleep(standin.latency)
+            try:
+                keep_going = self._dispatch(tag, cmd, _tokenize(args), uid_mode)
+            except Exception as e:
+                logger.debug("stand-in error for %r: %s", line, e)
+                self._send(f"{tag} BAD {e}\r\n".encode())
+                keep_going = True
+            if not keep_going:
+                return
+
+    def _dispatch(self, tag: str, cmd: str, args: list, uid_mode: bool) -> bool:
+        standin = self.server.standin
+        if cmd == "CAPABILITY":
+            self._send(b"* CAPABILITY IMAP4rev1 IDLE\r\n" if standin.idle else b"* CAPABILITY IMAP4rev1\r\n")
+        elif cmd == "LOGIN":
+            if (args[0], args[1]) != (standin.user, standin.password):
+                self._send(f"{tag} NO [AUTHENTICATIONFAILED] invalid credentials\r\n".encode())
+                return True
+        elif cmd in ("SELECT", "EXAMINE"):
+            folder = standin.folders.get(args[0])
+            if folder is None:
+                self._send(f"{tag} NO [NONEXISTENT] no such mailbox\r\n".encode())
+                return True
+            self.selected = folder
+            self.known_exists = len(folder.messages)
+            self._send(
+                f"* {len(folder.messages)} EXISTS\r\n"
+                f"* 0 RECENT\r\n"
+                f"* OK [UIDVALIDITY {folder.uidvalidity}] UIDs valid\r\n"
+                f"* OK [UIDNEXT {folder.next_uid}] predicted next UID\r\n".encode()
+            )
+            mode = "READ-ONLY" if cmd == "EXAMINE" else "READ-WRITE"
+            self._send(f"{tag} OK [{mode}] {cmd} completed\r\n".encode())
+            return True
+        elif cmd == "SEARCH":
+            self._search(args, uid_mode)
+        elif cmd == "FETCH":
+            self._fetch(args, uid_mode)
+        elif cmd == "IDLE" and standin.idle and self.selected is not None:
+            return self._idle(tag)
+        elif cmd == "NOOP":
+            if self.selected is not None:
+                with standin.lock:
+                    self.notify_exists()
+        elif cmd in ("CLOSE", "UNSELECT"):
+            pass
+        elif cmd == "LOGOUT":
+            self._send(b"* BYE stand-in logging out\r\n")
+            self._send(f"{tag} OK LOGOUT completed\r\n".encode())
+            return False
+        else:
+            self._send(f"{tag} BAD unsupported command {cmd}\r\n".encode())
+            return True
+        self._send(f"{tag} OK {cmd} completed\r\n".encode())
+        return True
+
+    def _idle(self, tag: str) -> bool:
+        standin = self.server.standin
+        standin.stats["idle"] += 1
+        self._send(b"+ idling\r\n")
+        with standin.lock:
+            self.idling = True
+            self.notify_exists()
+        try:
+            line = self.rfile.readline()
+        except OSError:
+            line = b""
+        finally:
+            with standin.lock:
+                self.idling = False
+        if not line:
+            return False
+        if line.strip().upper() != b"DONE":
+            self._send(f"{tag} BAD expected DONE\r\n".encode())
+        else:
+            self._send(f"{tag} OK IDLE terminated\r\n".encode())
+        return True
+
+    # -- SEARCH -----------------------------------------------------------
+
+    def _search(self, args: list, uid_mode: bool) -> None:
+        folder = self.selected
+        if args and isinstance(args[0], str) and args[0].upper() == "CHARSET":
+            args = args[2:]
+        preds = []
+        i = 0
+        while i < len(args):
+            pred, i = self._search_key(args, i, folder)
+            preds.append(pred)
+        hits = []
+        for seq, msg in enumerate(folder.messages, start=1):
+            if all(p(seq, msg) for p in preds):
+                hits.append(msg.uid if uid_mode else seq)
+        self._send(("* SEARCH" + "".join(f" {h}" for h in hits) + "\r\n").encode())
+
+    def _search_key(self, args: list, i: int, folder: StandinFolder):
+        key = args[i]
+        if isinstance(key, list):
+            preds = []
+            j = 0
+            while j < len(key):
+                pred, j = self._search_key(key, j, folder)
+                preds.append(pred)
+            return (lambda s, m: all(p(s, m) for p in preds)), i + 1
+        name = key.upper()
+        if name == "ALL":
+            return (lambda s, m: True), i + 1
+        if name in ("SINCE", "BEFORE"):
+            d = datetime.strptime(args[i + 1], "%d-%b-%Y").date()
+            if name == "SINCE":
+                return (lambda s, m: m.internaldate >= d), i + 2
+            return (lambda s, m: m.internaldate < d), i + 2
+        if name == "UID":
+            largest = folder.messages[-1].uid if folder.messages else 0
+            wanted = _parse_set(args[i + 1], largest)
+            return (lambda s, m: m.uid in wanted), i + 2
+        if name[0].isdigit() or name[0] == "*":
+            wanted = _parse_set(name, len(folder.messages))
+            return (lambda s, m: s in wanted), i + 1
+        if name in self.server.standin.rejected_search_keys:
+            raise ValueError(f"search key {name} not supported")
+        if name in ("FROM", "SUBJECT", "TO"):
+            needle = args[i + 1].lower()
+            return (lambda s, m: needle in str(m.parsed.get(name, "")).lower()), i + 2
+        if name in ("BODY", "TEXT"):
+            needle = args[i + 1].lower()
+            return (lambda s, m: needle in _searchable_text(m, name == "TEXT")), i + 2
+        if name == "OR":
+            left, j = self._search_key(args, i + 1, folder)
+            right, j = self._search_key(args, j, folder)
+            return (lambda s, m: left(s, m) or right(s, m)), j
+        if name == "NOT":
+            inner, j = self._search_key(args, i + 1, folder)
+            return (lambda s, m: not inner(s, m)), j
+        raise ValueError(f"unsupported search key {name}")
+
+    # -- FETCH ------------------------------------------------------------
+
+    def _fetch(self, args: list, uid_mode: bool) -> None:
+        folder = self.selected
+        items = args[1] if isinstance(args[1], list) else [args[1]]
+        items = [it.upper() for it in items]
+        if uid_mode and "UID" not in items:
+            items.insert(0, "UID")
+        largest = (folder.messages[-1].uid if uid_mode else len(folder.messages)) if folder.messages else 0
+        wanted = _parse_set(args[0], largest)
+        for seq, msg in enumerate(folder.messages, start=1):
+            if (msg.uid if uid_mode else seq) not in wanted:
+                continue
+            parts = [self._fetch_item(item, msg) for item in items]
+            self._send(b"* %d FETCH (" % seq + b" ".join(parts) + b")\r\n")
+
+    def _fetch_item(self, item: str, msg: StoredMessage) -> bytes:
+        if item == "UID":
+            return b"UID %d" % msg.uid
+        if item == "RFC822.SIZE":
+            return b"RFC822.SIZE %d" % len(msg.raw)
+        if item == "RFC822":
+            return b"RFC822 " + _literal(msg.raw)
+        if item in ("BODY[]", "BODY.PEEK[]"):
+            return b"BODY[] " + _literal(msg.raw)
+        if item == "RFC822.HEADER":
+            return b"RFC822.HEADER " + _literal(msg.raw.split(b"\r\n\r\n", 1)[0] + b"\r\n\r\n")
+        if item == "BODYSTRUCTURE":
+            return b"BODYSTRUCTURE " + _bodystructure(msg.parsed).encode()
+        if item.startswith(("BODY[", "BODY.PEEK[")):
+            section, _, partial = item.split("[", 1)[1].partition("]")
+            data = self._section(msg, section)
+            label = f"BODY[{section}]"
+            if partial:
+                origin, octets = (int(x) for x in partial.strip("<>").split("."))
+                data = data[origin:origin + octets]
+                label += f"<{origin}>"
+            return label.encode() + b" " + _literal(data)
+        raise ValueError(f"unsupported fetch item {item}")
+
+    def _section(self, msg: StoredMessage, section: str) -> bytes:
+        if section == "":
+            return msg.raw
+        if section == "HEADER":
+            return msg.raw.split(b"\r\n\r\n", 1)[0] + b"\r\n\r\n"
+        if section == "TEXT":
+            return msg.raw.split(b"\r\n\r\n", 1)[1]
+        if section.startswith("HEADER.FIELDS"):
+            wanted = set(section[section.index("(") + 1:section.rindex(")")].split())
+            head = msg.raw.split(b"\r\n\r\n", 1)[0]
+            lines = re.split(rb"\r\n(?![ \t])", head)
+            keep = [ln for ln in lines if ln.split(b":", 1)[0].decode().upper() in wanted]
+            return b"".join(ln + b"\r\n" for ln in keep) + b"\r\n"
+        return _payload_bytes(_section_part(msg.parsed, section))
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    standin: "ImapStandin"
+
+
+class ImapStandin:
+    """
+    Local IMAP server backed by in-memory folders. Use as a context manager:
+
+        with ImapStandin(latency=0.01) as srv:
+            srv.add_message("INBOX", raw_bytes)
+            client = ImapEmailClient(srv.client_config(["INBOX"]))
+    """
+
+    def __init__(self, user: str = "user", password: str = "secret", latency: float = 0.0):
+        self.user = user
+        self.password = password
+        self.latency = latency
+        self.folders: dict[str, StandinFolder] = {}
+        self.lock = threading.RLock()
+        self.sessions: set[_Handler] = set()
+        self.stats: dict[str, int] = {"commands": 0, "bytes_sent": 0, "idle": 0}
+        self.idle = True  # advertise and accept IDLE
+        self.rejected_search_keys: set[str] = set()  # answer BAD, like servers without full-text search
+        self._server: _Server | None = None
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self) -> "ImapStandin":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self) -> None:
+        self._server = _Server(("127.0.0.1", 0), _Handler)
+        self._server.standin = self
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def client_config(self, folders: list[str] | None = None, **extra) -> dict:
+        """Return an `email:` config section pointing at this stand-in."""
+        cfg = {
+            "host": "127.0.0.1",
+            "port": self.port,
+            "ssl": False,
+            "user": self.user,
+            "password": self.password,
+            "folders": folders or list(self.folders),
+            "lookback_weeks": 4,
+        }
+        cfg.update(extra)
+        return cfg
+
+    def add_folder(self, name: str, uidvalidity: int = 1) -> StandinFolder:
+        with self.lock:
+            folder = self.folders.setdefault(name, StandinFolder(uidvalidity=uidvalidity))
+        return folder
+
+    def add_message(self, folder: str, raw: bytes | str, internaldate: date | None = None) -> int:
+        """Append a message to `folder` (created on demand) and return its UID."""
+        if isinstance(raw, str):
+            raw = raw.encode("utf-8")
+        raw = raw.replace(b"\r\n", b"\n").replace(b"\n", b"\r\n")
+        with self.lock:
+            f = self.add_folder(folder)
+            uid = f.next_uid
+            f.next_uid += 1
+            f.messages.append(StoredMessage(uid=uid, raw=raw, internaldate=internaldate or date.today()))
+            for session in self.sessions:
+                if session.idling and session.selected is f:
+                    try:
+                        session.notify_exists()
+                    except OSError:
+                        pass
+        return uid
+
+    def drop_connections(self) -> None:
+        """Simulate a network drop or server restart: close every client connection."""
+        with self.lock:
+            sessions = list(self.sessions)
+        for session in sessions:
+            try:
+                session.connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def set_uidvalidity(self, folder: str, uidvalidity: int) -> None:
+        """Simulate a mailbox rebuild: new UIDVALIDITY and freshly numbered UIDs."""
+        with self.lock:
+            f = self.folders[folder]
+            f.uidvalidity = uidvalidity
+            for i, msg in enumerate(f.messages, start=1):
+                msg.uid = i
+            f.next_uid = len(f.messages) + 1
+
+
+def make_message(
+    subject: str,
+    body: str,
+    sender: str = "shop@example.com",
+    message_id: str | None = None,
+    html: str | None = None,
+    attachment: bytes | None = None,
+) -> bytes:
+    """Build a small RFC 822 message for stand-in mailboxes."""
+    from email.message import EmailMessage
+
+    msg = EmailMessage()
+    msg["From"] = sender
+    msg["To"] = "me@example.com"
+    msg["Subject"] = subject
+    msg["Message-ID"] = message_id or email.utils.make_msgid(domain="example.com")
+    msg["Date"] = email.utils.formatdate(localtime=False)
+    msg.set_content(body)
+    if html is not None:
+        msg.add_alternative(html, subtype="html")
+    if attachment is not None:
+        msg.add_attachment(attachment, maintype="application", subtype="pdf", filename="invoice.pdf")
+    return msg.as_bytes()
@@ -0,0 +1,223 @@
+# dhl_rerouter_poc/browser_pool.py
+"""
+Pool of warm Chrome drivers shared by all carrier checks and reroutes of a run.
+
+Launching undetected-chromedriver (binary patching plus Chrome start-up) takes several
+seconds, so drivers are kept alive and handed out one session at a time. Each session
+runs in a fresh Chrome browser context (CDP Target.createBrowserContext), the
+equivalent of the previous per-launch --incognito window: cookies and storage never
+leak between tracking numbers. Drivers are recycled after `max_uses` sessions and
+replaced after a crash.
+"""
+import queue
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+from selenium.common.exceptions import (
+    ElementClickInterceptedException,
+    ElementNotInteractableException,
+    InvalidSessionIdException,
+    NoSuchElementException,
+    NoSuchWindowException,
+    StaleElementReferenceException,
+    TimeoutException,
+    WebDriverException,
+)
+
+from .driver_cache import DriverCache
+
+import logging
+logger = logging.getLogger(__name__)
+
+# failures of a page, not of the browser: the driver stays usable
+_PAGE_ERRORS = (
+    TimeoutException,
+    NoSuchElementException,
+    StaleElementReferenceException,
+    ElementNotInteractableException,
+    ElementClickInterceptedException,
+)
+
+
+def launch_chrome(headless: bool = True, lang: str = "en", driver_cache: DriverCache | None = None):
+    """Start an undetected-chromedriver Chrome instance, from `driver_cache` if given."""
+    import undetected_chromedriver as uc
+
+    options = uc.ChromeOptions()
+    if headless:
+        options.add_argument("--headless")
+        logger.info("Launching Selenium in headless mode.")
+    else:
+        logger.info("Launching Selenium in visible mode.")
+    options.add_argument(f"--lang={lang}")
+    if driver_cache is not None:
+        try:
+            return driver_cache.launch(options)
+        except (RuntimeError, OSError) as e:
+            logger.warning("Chrome driver cache unavailable, launching without it: %s", e)
+    return uc.Chrome(options=options)
+
+
+class _PooledDriver:
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+        self.home = driver.current_window_handle  # window of the default context, kept open
+
+
+class BrowserPool:
+    """
+    Up to `size` Chrome drivers, launched on demand and reused for the whole run.
+    session() yields a driver switched to a new, empty browser context; the context is
+    disposed of afterwards. A driver is quit after `max_uses` sessions (0 = never) or
+    when a session raises a WebDriver error, and relaunched on next demand.
+    With a `driver_cache` Chrome starts from the cached patched driver and profile template.
+    `stats` counts launches, sessions, recycled and crashed drivers.
+    """
+    def __init__(
+        self,
+        headless: bool = True,
+        size: int = 1,
+        max_uses: int = 25,
+        lang: str = "en",
+        launch: Callable[[], object] | None = None,
+        driver_cache: DriverCache | None = None,
+    ):
+        self.size = max(1, size)
+        self.max_uses = max_uses
+        self._launch = launch or (lambda: launch_chrome(headless, lang, driver_cache))
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._count = 0  # drivers alive or being launched
+        self._closed = False
+        self.stats: Counter = Counter()
+
+    def _acquire(self) -> _PooledDriver:
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("BrowserPool is closed")
+                if self._count < self.size:
+                    self._count += 1
+                    break
+            try:
+                return self._idle.get(timeout=1.0)
+            except queue.Empty:
+                continue
+        try:
+            logger.info("Going to launch Chrome (%d/%d)", self._count, self.size)
+            pooled = _PooledDriver(self._launch())
+        except Exception:
+            with self._lock:
+                self._count -= 1
+            raise
+        with self._lock:
+            self.stats["launches"] += 1
+        return pooled
+
+    def _discard(self, pooled: _PooledDriver, reason: str) -> None:
+        with self._lock:
+            self._count -= 1
+            self.stats[reason] += 1
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            logger.debug("Error quitting Chrome: %s", e)
+
+    @staticmethod
+    def _open_context(driver) -> str | None:
+        """Open a window in a new browser context and switch to it; returns the context id (None: cookies and cache cleared instead)."""
+        try:
+            context = driver.execute_cdp_cmd("Target.createBrowserContext", {"disposeOnDetach": False})["browserContextId"]
+            target = driver.execute_cdp_cmd(
+                "Target.createTarget", {"url": "about:blank", "browserContextId": context}
+            )["targetId"]
+            driver.switch_to.window(target)
+            return context
+        except Exception as e:
+            # older drivers: fall back to wiping the default context; storage is per origin
+            # and is cleared by _close_context() for the origin the session ended on
+            logger.debug("Could not create a browser context (%s); clearing cookies and cache instead", e)
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+            return None
+
+    @staticmethod
+    def _close_context(pooled: _PooledDriver, context: str | None) -> None:
+        driver = pooled.driver
+        if context is not None:
+            if driver.current_window_handle != pooled.home:
+                driver.close()
+            driver.switch_to.window(pooled.home)
+            driver.execute_cdp_cmd("Target.disposeBrowserContext", {"browserContextId": context})
+        else:
+            origin = driver.execute_script("return location.origin")
+            if origin and origin != "null":  # "null": about:blank, data: URLs
+                driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+            driver.get("about:blank")
+
+    @contextmanager
+    def session(self) -> Iterator[object]:
+        """Yield a warm driver in a clean browser context, returning it to the pool afterwards."""
+        pooled = self._acquire()
+        try:
+            context = self._open_context(pooled.driver)
+        except Exception as e:
+            logger.warning("Chrome did not respond, relaunching: %s", e)
+            self._discard(pooled, "crashes")
+            pooled = self._acquire()
+            try:
+                context = self._open_context(pooled.driver)
+            except Exception:
+                self._discard(pooled, "crashes")  # frees its slot and quits Chrome
+                raise
+        with self._lock:
+            self.stats["sessions"] += 1
+        try:
+            yield pooled.driver
+        except Exception as e:
+            if isinstance(e, (InvalidSessionIdException, NoSuchWindowException)) or (
+                isinstance(e, WebDriverException) and not isinstance(e, _PAGE_ERRORS)
+            ):
+                logger.warning("Chrome session failed, discarding driver: %s", e)
+                self._discard(pooled, "crashes")
+                pooled = None
+            raise
+        finally:
+            if pooled is not None:
+                self._release(pooled, context)
+
+    def _release(self, pooled: _PooledDriver, context: str | None) -> None:
+        pooled.uses += 1
+        try:
+            self._close_context(pooled, context)
+        except Exception as e:
+            logger.warning("Could not reset Chrome session, discarding driver: %s", e)
+            self._discard(pooled, "crashes")
+            return
+        if self._closed:
+            self._discard(pooled, "closed")
+        elif self.max_uses and pooled.uses >= self.max_uses:
+            self._discard(pooled, "recycled")
+        else:
+            self._idle.put(pooled)
+
+    def close(self) -> None:
+        """Quit all idle drivers; drivers in use are quit when their session ends."""
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(pooled, "closed")
+        if self.stats["launches"]:
+            logger.info("Browser pool: %s", dict(self.stats))
+
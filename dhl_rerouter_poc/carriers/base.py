@@ -1,8 +1,10 @@
 """
 Carrier base interface for pluggable carrier support.
 """
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator
 from dataclasses import dataclass, field
 
 @dataclass
@@ -10,6 +12,16 @@ class StepResult:
     status: str  # 'success', 'error', etc.
     data: dict | None = None
     errors: list[str] = field(default_factory=list)
+    timings: dict[str, float] = field(default_factory=dict)  # step → seconds
+
+    @contextmanager
+    def timed(self, step: str) -> Iterator[None]:
+        """Record the wall-clock seconds spent in the block as timings[step]."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[step] = round(time.perf_counter() - start, 3)
 
 class CarrierBase(ABC):
     carrier_name: str
@@ -40,3 +52,49 @@ class CarrierBase(ABC):
         Execute reroute action for the shipment. Returns True if successful.
         """
         pass
+
+    def check_many(
+        self,
+        tracking_numbers: list[str],
+        zip_code: str,
+        timeout: int = 20,
+        selenium_headless: bool = False
+    ) -> dict[str, StepResult]:
+        """
+        Check several shipments at once; returns {tracking number: check result}.
+        This default checks them one by one; carriers whose tracking page accepts
+        several codes per query override it.
+        """
+        return {
+            tn: self.check_reroute_availability(tn, zip_code, timeout=timeout, selenium_headless=selenium_headless)
+            for tn in tracking_numbers
+        }
+
+    def check_and_reroute(
+        self,
+        tracking_number: str,
+        zip_code: str,
+        custom_location: str,
+        decide: Callable[[StepResult], bool],
+        highlight_only: bool = True,
+        selenium_headless: bool = False,
+        timeout: int = 20
+    ) -> tuple[StepResult, bool | None]:
+        """
+        Check the shipment and, if `decide(check result)` says so, reroute it.
+        Returns (check result, reroute success or None if no reroute was attempted).
+        This default runs the two separate operations; carriers that can continue on
+        the page the check left open override it.
+        """
+        info = self.check_reroute_availability(
+            tracking_number, zip_code, timeout=timeout, selenium_headless=selenium_headless
+        )
+        if not decide(info):
+            return info, None
+        return info, self.reroute_shipment(
+            tracking_number, zip_code, custom_location, highlight_only, selenium_headless, timeout
+        )
+
+    def close(self) -> None:
+        """Release resources held across calls (e.g. HTTP sessions); called at the end of a run."""
+        pass
@@ -2,47 +2,244 @@
 DHLCarrier: Implements CarrierBase for DHL-specific logic.
 """
 import logging
+from collections import Counter
 from datetime import datetime, timezone
+import threading
 import time
-import undetected_chromedriver as uc
-from selenium.common.exceptions import TimeoutException
+from contextlib import contextmanager
+import requests
+from selenium.common.exceptions import ElementClickInterceptedException, NoSuchElementException, TimeoutException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+from dhl_rerouter_poc.browser_pool import BrowserPool
 from dhl_rerouter_poc.carriers.base import CarrierBase
 from dhl_rerouter_poc.selectors_dhlde import (
     DELIVERY_DATE,
     DELIVERED_TEXTS,
     DELIVERY_TOGGLE,
+    SHIPMENT_DELIVERY_TOGGLE,
+    DELIVERY_OPTIONS_CONTAINER,
+    DELIVERY_OPTION_ITEMS,
+    PREFERRED_LOCATION_OPTION,
+    CONSENT_CHECKBOX,
+    CONFIRM_BUTTON,
     SHIPMENT_HISTORY_ENTRY,
     CUSTOM_DROPOFF_INPUT,
     delivery_status_selector,
+    shipment_selector,
     ALLOWED_DELIVERY_OPTION_KEYS,
+    MAX_PIECECODES_PER_QUERY,
+    BLOCKED_URLS,
+    BASE_URL,
+    TRACKING_PAGE_PATH,
+    TRACKING_API_PATH,
+    API_SHIPMENTS,
+    API_SHIPMENT_ID,
+    API_DELIVERY_STATUS,
+    API_DELIVERY_DATE,
+    API_DELIVERED,
+    API_DELIVERY_OPTIONS,
+    API_DELIVERY_OPTION_NAME,
+    API_HISTORY_EVENTS,
+    API_HISTORY_FIELDS,
 )
 from dhl_rerouter_poc.utils import parse_dhl_date, blink_element
 
 LOG = logging.getLogger(__name__)
 
-from typing import Any
+from typing import Any, Callable
 from dhl_rerouter_poc.carriers.base import StepResult
 
+TRACKING_MODES = {"browser", "http"}
+
+_API_HEADERS = {
+    "Accept": "application/json",
+    "Accept-Language": "en",
+    "User-Agent": (
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+    ),
+}
+
+
+# Reads a loaded tracking page in one WebDriver call. Arguments: the shipment element
+# (null: the whole page), then the selectors from selectors_dhlde.py: status (CSS), date
+# and delivered texts (XPath, relative to the shipment element if given), option items,
+# history entries and drop-off input (CSS). Element texts are the rendered innerText and
+# empty for elements that take no space (hidden tooltips, JSON i18n scripts), like
+# WebElement.text; innerText alone falls back to textContent for those.
+_EXTRACT_TRACKING_JS = """
+const [root, statusCss, dateXpath, deliveredXpath, optionCss, historyCss, dropoffCss] = arguments;
+const scope = root || document;
+const text = (el) => el ? (el.getClientRects().length ? (el.innerText || "").trim() : "") : null;
+const xpathAll = (xpath) => {
+    const snapshot = document.evaluate(xpath, scope, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    const nodes = [];
+    for (let i = 0; i < snapshot.snapshotLength; i++) nodes.push(snapshot.snapshotItem(i));
+    return nodes;
+};
+return {
+    delivery_status: text(document.querySelector(statusCss)),
+    delivery_date: text(xpathAll(dateXpath)[0]),
+    delivered_texts: xpathAll(deliveredXpath).map(text),
+    delivery_options: Array.from(scope.querySelectorAll(optionCss), (li) => li.getAttribute("data-name")),
+    shipment_history: Array.from(scope.querySelectorAll(historyCss), text),
+    custom_dropoff_input_present: scope.querySelector(dropoffCss) !== null,
+};
+"""
+
+# bytes transferred and requests made by the current page (Resource Timing API; cross-origin
+# responses without Timing-Allow-Origin report 0 bytes, blocked requests are not listed)
+_PAGE_TRANSFER_JS = """
+const entries = performance.getEntriesByType("navigation").concat(performance.getEntriesByType("resource"));
+return [entries.reduce((sum, e) => sum + (e.transferSize || 0), 0), entries.length];
+"""
+
+
+def _dig(obj, path: str):
+    """Follow a dotted path (see selectors_dhlde.API_*) into parsed JSON; None if any key is missing."""
+    for key in path.split("."):
+        if not isinstance(obj, dict) or key not in obj:
+            return None
+        obj = obj[key]
+    return obj
+
+
+def _groups(items: list, size: int) -> list[list]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
 class DHLCarrier(CarrierBase):
+    """
+    DHL tracking checks and reroutes on dhl.de (`base_url`, e.g. a local stand-in for
+    benchmarks). With a `browser_pool` all calls share its
+    warm Chrome drivers; without one each call launches (and quits) its own browser.
+    With `tracking_mode: http` in `cfg`, tracking checks first query the JSON endpoint the
+    tracking page calls (`tracking_api_url`) over one keep-alive HTTP session and use the
+    browser only if that response is blocked or incomplete; reroutes always need the browser.
+    Page steps wait for explicit conditions, never fixed sleeps (an options list still
+    empty `options_wait` seconds after it rendered has no options); `interactive: true` adds
+    the visual cues for someone watching a visible browser (highlighted input, blinking
+    Confirm button, a pause in highlight-only mode). Every StepResult carries per-step
+    `timings`, and close() logs their averages for the run.
+    With `block_resources: true` every browser session first blocks `blocked_urls`
+    (default selectors_dhlde.BLOCKED_URLS) through CDP Network.setBlockedURLs; page load
+    time and transferred bytes are logged per run either way.
+    """
     carrier_name: str = "DHL"
 
-    def check_reroute_availability(
-        self,
-        tracking_number: str,
-        zip_code: str,
-        timeout: int = 20,
-        selenium_headless: bool = False,
-        run_id: str | None = None
-    ) -> StepResult:
+    def __init__(self, cfg: dict | None = None, browser_pool: BrowserPool | None = None):
+        self.cfg = cfg
+        self.browser_pool = browser_pool
+        self.tracking_mode = (cfg or {}).get("tracking_mode", "browser")
+        if self.tracking_mode not in TRACKING_MODES:
+            raise ValueError(f"Unknown DHL tracking_mode {self.tracking_mode!r}; expected one of {sorted(TRACKING_MODES)}")
+        self.base_url = (cfg or {}).get("base_url", BASE_URL).rstrip("/")
+        self.tracking_api_url = (cfg or {}).get("tracking_api_url", self.base_url + TRACKING_API_PATH)
+        self.batch_size = max(1, min(int((cfg or {}).get("batch_size", MAX_PIECECODES_PER_QUERY)), MAX_PIECECODES_PER_QUERY))
+        self.interactive = bool((cfg or {}).get("interactive", False))
+        self.highlight_pause = float((cfg or {}).get("highlight_pause", 5))
+        # the options list can render before its items; one still empty after this long has none
+        self.options_wait = float((cfg or {}).get("options_wait", 1))
+        blocked_urls = (cfg or {}).get("blocked_urls")
+        self.blocked_urls: list[str] = (
+            list(BLOCKED_URLS if blocked_urls is None else blocked_urls)
+            if (cfg or {}).get("block_resources", False) else []
+        )
+        self._http: requests.Session | None = None
+        self._lock = threading.Lock()  # checks may run on several threads (main.run's CheckPool)
+        self.stats: Counter = Counter()  # tracking API: answered, blocked, incomplete
+        self.step_seconds: Counter = Counter()  # summed StepResult.timings of the run
+        self.step_counts: Counter = Counter()
+        self.page_stats: Counter = Counter()  # loads, seconds, bytes, requests of tracking pages
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += n
+
+    def _record_timings(self, tracking_number: str, result: StepResult) -> None:
+        LOG.debug("Step timings for %s: %s", tracking_number, result.timings)
+        with self._lock:
+            self.step_seconds.update(result.timings)
+            self.step_counts.update(result.timings.keys())
+
+    def close(self) -> None:
+        """Close the tracking API session; log how many checks it answered and the average step timings."""
+        if self._http is not None:
+            self._http.close()
+            self._http = None
+        if self.stats:
+            LOG.info("DHL tracking API: %s", dict(self.stats))
+        if self.step_counts:
+            LOG.info(
+                "DHL step timings (avg s over %d shipment(s)): %s",
+                max(self.step_counts.values()),
+                {step: round(self.step_seconds[step] / n, 3) for step, n in self.step_counts.most_common()},
+            )
+        if self.page_stats["loads"]:
+            loads = self.page_stats["loads"]
+            LOG.info(
+                "DHL pages (resource blocking %s): %d load(s), avg %.2f s, avg %.0f KiB in %.0f request(s)",
+                "on" if self.blocked_urls else "off",
+                loads,
+                self.page_stats["seconds"] / loads,
+                self.page_stats["bytes"] / loads / 1024,
+                self.page_stats["requests"] / loads,
+            )
+
+    @contextmanager
+    def _browser(self, selenium_headless: bool):
+        """Yield a driver in a clean browser context (replacing the per-launch --incognito window)."""
+        if self.browser_pool is not None:
+            with self.browser_pool.session() as driver:
+                self._block_resources(driver)
+                yield driver
+            return
+        pool = BrowserPool(headless=selenium_headless, size=1, max_uses=1)
+        try:
+            with pool.session() as driver:
+                self._block_resources(driver)
+                yield driver
+        finally:
+            pool.close()
+
+    def _block_resources(self, driver) -> None:
+        """Block `blocked_urls` in the session's page target (each session is a new target)."""
+        if self.blocked_urls:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": self.blocked_urls})
+
+    def _load_page(self, driver, wait: WebDriverWait, url: str) -> float:
         """
-        Check if reroute is available for a shipment using Selenium.
-        Honors headless mode and timeout from config.
+        Open `url` and wait for the shipment block. Adds load time and the page's transferred
+        bytes and requests to `page_stats`; returns the load time in seconds.
         """
-        result = StepResult(status="success", data={
+        start = time.perf_counter()
+        driver.get(url)
+        wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, "article[class*='shipment']")))
+        seconds = time.perf_counter() - start
+        try:
+            transferred, requests_made = driver.execute_script(_PAGE_TRANSFER_JS)
+        except Exception as e:
+            LOG.debug("Could not read resource timings: %s", e)
+            transferred, requests_made = 0, 0
+        with self._lock:
+            self.page_stats.update({"loads": 1, "seconds": seconds, "bytes": transferred, "requests": requests_made})
+        return round(seconds, 3)
+
+    def _effective_timeout(self, timeout: int) -> int:
+        # Always use 'timeout' from config (carriers.base['timeout'])
+        if hasattr(self, 'cfg') and self.cfg and 'timeout' in self.cfg:
+            return self.cfg['timeout']
+        elif hasattr(self, 'timeout'):
+            return self.timeout
+        return timeout
+
+    @staticmethod
+    def _new_result() -> StepResult:
+        return StepResult(status="success", data={
     "delivery_status": None,
     "delivery_date": None,
     "delivered": False,
@@ -50,106 +247,344 @@ class DHLCarrier(CarrierBase):
     "shipment_history": [],
     "custom_dropoff_input_present": False,
 })
-        # Always use 'timeout' from config (carriers.base['timeout'])
-        if hasattr(self, 'cfg') and self.cfg and 'timeout' in self.cfg:
-            timeout = self.cfg['timeout']
-        elif hasattr(self, 'timeout'):
-            timeout = self.timeout
-        driver = None
-        url = (
-            f"https://www.dhl.de/en/privatkunden/"
-            f"pakete-empfangen/verfolgen.html?"
-            f"piececode={tracking_number}&zip={zip_code}&lang=en"
-        )
-        options = uc.ChromeOptions()
-        if selenium_headless:
-            options.add_argument("--headless")
-            LOG.info("Launching Selenium in headless mode for check_reroute_availability.")
-        else:
-            LOG.info("Launching Selenium in visible mode for check_reroute_availability.")
-        options.add_argument("--lang=en")
-        options.add_argument("--incognito")
+
+    def _tracking_url(self, tracking_number: str, zip_code: str) -> str:
+        return f"{self.base_url}{TRACKING_PAGE_PATH}?piececode={tracking_number}&zip={zip_code}&lang=en"
+
+    def _check_http(self, tracking_numbers: list[str], zip_code: str, timeout: int, results: dict[str, StepResult]) -> list[str]:
+        """
+        Fill `results` from one query of the tracking JSON endpoint for all `tracking_numbers`,
+        with the same fields as _read_tracking(). Returns the tracking numbers the browser
+        still has to check: all of them when the response is blocked (error status,
+        non-JSON consent or captcha page), otherwise those whose shipment, status or
+        delivery options are missing. Reasons are counted per code in `stats`.
+        """
+        with self._lock:
+            if self._http is None:
+                self._http = requests.Session()
+                self._http.headers.update(_API_HEADERS)
+        codes = ",".join(tracking_numbers)
+        start = time.perf_counter()
         try:
-            driver = uc.Chrome(options=options)
-            wait = WebDriverWait(driver, timeout)
+            resp = self._http.get(
+                self.tracking_api_url,
+                params={"piececode": codes, "zip": zip_code, "language": "en"},
+                headers={"Referer": self._tracking_url(codes, zip_code)},
+                timeout=timeout,
+            )
+            if not resp.ok or "json" not in resp.headers.get("Content-Type", ""):
+                raise ValueError(f"HTTP {resp.status_code} {resp.headers.get('Content-Type', '')}")
+            payload = resp.json()
+        except (requests.RequestException, ValueError) as e:
+            for tracking_number in tracking_numbers:
+                results[tracking_number].timings["tracking_api"] = round(time.perf_counter() - start, 3)
+            LOG.info("DHL tracking API blocked for %s (%s); falling back to the browser", codes, e)
+            self._count("blocked", len(tracking_numbers))
+            return list(tracking_numbers)
+
+        shipments = _dig(payload, API_SHIPMENTS) or []
+        by_id = {_dig(s, API_SHIPMENT_ID): s for s in shipments}
+        if len(tracking_numbers) == 1 and len(shipments) == 1:
+            by_id.setdefault(tracking_numbers[0], shipments[0])
+        unanswered = []
+        for tracking_number in tracking_numbers:
+            results[tracking_number].timings["tracking_api"] = round(time.perf_counter() - start, 3)
+            if not self._read_api_shipment(by_id.get(tracking_number), results[tracking_number]):
+                LOG.info("DHL tracking API response for %s is incomplete; falling back to the browser", tracking_number)
+                self._count("incomplete")
+                unanswered.append(tracking_number)
+        return unanswered
+
+    def _read_api_shipment(self, shipment: dict | None, result: StepResult) -> bool:
+        """Fill `result` from one shipment of the tracking API response; False if it lacks status or options."""
+        status = _dig(shipment, API_DELIVERY_STATUS)
+        options = _dig(shipment, API_DELIVERY_OPTIONS)
+        if not status or options is None:
+            return False
+        data = result.data
+        data["delivery_status"] = status.strip()
+        raw_date = _dig(shipment, API_DELIVERY_DATE)
+        if raw_date:
+            data["delivery_date"] = raw_date[:10]  # ISO timestamp → ISO date, as parse_dhl_date()
+        data["delivered"] = bool(_dig(shipment, API_DELIVERED))
+        for option in options:
+            name = option.get(API_DELIVERY_OPTION_NAME) if isinstance(option, dict) else option
+            if name in ALLOWED_DELIVERY_OPTION_KEYS:
+                data["delivery_options"].append(name)
+        for event in _dig(shipment, API_HISTORY_EVENTS) or []:
+            txt = "\n".join(str(event[k]).strip() for k in API_HISTORY_FIELDS if event.get(k))
+            if txt:
+                data["shipment_history"].append(txt)
+        # the page renders the free-text drop-off input as part of the PREFERRED_LOCATION option
+        data["custom_dropoff_input_present"] = "PREFERRED_LOCATION" in data["delivery_options"]
+        self._count("answered")
+        return True
+
+    def _checked_over_http(self, tracking_number: str, zip_code: str, timeout: int, result: StepResult) -> bool:
+        return self.tracking_mode == "http" and not self._check_http(
+            [tracking_number], zip_code, timeout, {tracking_number: result}
+        )
+
+    def _read_tracking(self, driver, wait: WebDriverWait, tracking_number: str, result: StepResult, scope=None) -> bool:
+        """
+        Fill `result` from the loaded tracking page. Returns True if the delivery options
+        section was expanded (and left open for a reroute in the same session).
+        On a page listing several shipments, `scope` is this shipment's element
+        (selectors_dhlde.shipment_selector) and `wait` a WebDriverWait on it.
+        After expanding the options, all fields are read in one execute_script call.
+        """
+        rel = "" if scope is None else "."  # page XPaths, relative to the shipment element
+        expanded = False
+        # available delivery options: expand, wait for the options list, then for its items
+        with result.timed("delivery_options"):
+            listed = False
             try:
-                driver.get(url)
-                wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, "article[class*='shipment']")))
-                # shipment status
-                try:
-                    by, sel = delivery_status_selector(tracking_number)
-                    result.data["delivery_status"] = driver.find_element(by, sel).text.strip()
-                except Exception as e:
-                    result.errors.append(f"delivery_status: {e}")
-                    result.status = "error"
-                # estimated delivery date (raw)
-                try:
-                    raw_date = driver.find_element(By.XPATH, DELIVERY_DATE).text.strip()
-                    iso = parse_dhl_date(raw_date)
-                    if iso:
-                        result.data["delivery_date"] = iso
-                        LOG.debug("Parsed DHL date '%s' → %s", raw_date, iso)
-                    else:
-                        result.data["delivery_date"] = raw_date
-                        LOG.warning("Could not parse DHL date '%s'", raw_date)
-                except Exception as e:
-                    result.errors.append(f"delivery_date: {e}")
-                    result.status = "error"
-                # delivered?
-                try:
-                    for el in driver.find_elements(By.XPATH, DELIVERED_TEXTS):
-                        txt = el.text.lower()
-                        if "delivered" in txt or "zustellt" in txt:
-                            result.data["delivered"] = True
-                            break
-                except Exception as e:
-                    result.errors.append(f"delivered_check: {e}")
-                    result.status = "error"
-                # available delivery options
-                try:
-                    toggle = wait.until(EC.element_to_be_clickable((By.XPATH, DELIVERY_TOGGLE)))
-                    driver.execute_script("arguments[0].scrollIntoView(true)", toggle)
-                    time.sleep(1)
-                    toggle.click()
-                    time.sleep(1)
-                    items = driver.find_elements(By.CSS_SELECTOR, "div.verfuegen-container ul li[data-name]")
-                    for li in items:
-                        name = li.get_attribute("data-name")
-                        if name in ALLOWED_DELIVERY_OPTION_KEYS:
-                            result.data["delivery_options"].append(name)
-                except Exception as e:
-                    result.errors.append(f"delivery_options: {e}")
-                    result.status = "error"
-                # shipment history
-                try:
-                    for entry in driver.find_elements(By.CSS_SELECTOR, SHIPMENT_HISTORY_ENTRY):
-                        txt = entry.text.strip()
-                        if txt:
-                            result.data["shipment_history"].append(txt)
-                except Exception as e:
-                    result.errors.append(f"shipment_history: {e}")
-                    result.status = "error"
-                # custom drop-off input
+                self._click(driver, wait, (By.XPATH, DELIVERY_TOGGLE if scope is None else SHIPMENT_DELIVERY_TOGGLE))
+                expanded = True
+                wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, DELIVERY_OPTIONS_CONTAINER)))
+                listed = True
+            except Exception as e:
+                result.errors.append(f"delivery_options: {e}")
+                result.status = "error"
+            if listed:
                 try:
-                    driver.find_element(By.CSS_SELECTOR, CUSTOM_DROPOFF_INPUT)
-                    result.data["custom_dropoff_input_present"] = True
-                except:
-                    result.data["custom_dropoff_input_present"] = False
+                    WebDriverWait(driver if scope is None else scope, self.options_wait).until(
+                        EC.presence_of_all_elements_located((By.CSS_SELECTOR, DELIVERY_OPTION_ITEMS))
+                    )
+                except TimeoutException:
+                    LOG.debug("No delivery options listed for %s", tracking_number)
+        # everything else in one WebDriver round-trip
+        with result.timed("extract"):
+            try:
+                page = driver.execute_script(
+                    _EXTRACT_TRACKING_JS,
+                    scope,
+                    delivery_status_selector(tracking_number)[1],
+                    rel + DELIVERY_DATE,
+                    rel + DELIVERED_TEXTS,
+                    DELIVERY_OPTION_ITEMS,
+                    SHIPMENT_HISTORY_ENTRY,
+                    CUSTOM_DROPOFF_INPUT,
+                )
             except Exception as e:
-                result.errors.append(f"main_block: {e}")
+                result.errors.append(f"extract: {e}")
                 result.status = "error"
+                return expanded
+        # shipment status
+        if page["delivery_status"] is not None:
+            result.data["delivery_status"] = page["delivery_status"]
+        else:
+            result.errors.append("delivery_status: element not found")
+            result.status = "error"
+        # estimated delivery date (raw)
+        raw_date = page["delivery_date"]
+        if raw_date is None:
+            result.errors.append("delivery_date: element not found")
+            result.status = "error"
+        elif iso := parse_dhl_date(raw_date):
+            result.data["delivery_date"] = iso
+            LOG.debug("Parsed DHL date '%s' → %s", raw_date, iso)
+        else:
+            result.data["delivery_date"] = raw_date
+            LOG.warning("Could not parse DHL date '%s'", raw_date)
+        # delivered?
+        result.data["delivered"] = any(
+            "delivered" in txt.lower() or "zustellt" in txt.lower() for txt in page["delivered_texts"]
+        )
+        if expanded:
+            result.data["delivery_options"] = [
+                name for name in page["delivery_options"] if name in ALLOWED_DELIVERY_OPTION_KEYS
+            ]
+        result.data["shipment_history"] = [txt for txt in page["shipment_history"] if txt]
+        result.data["custom_dropoff_input_present"] = page["custom_dropoff_input_present"]
+        return expanded
+
+    @staticmethod
+    def _click(driver, wait: WebDriverWait, locator: tuple[str, str]):
+        """
+        Wait until `locator` is clickable, scroll it to the middle of the viewport and click
+        it; if an overlay (sticky header, consent banner) intercepts the click, click by script.
+        """
+        el = wait.until(EC.element_to_be_clickable(locator))
+        driver.execute_script("arguments[0].scrollIntoView({block: 'center'})", el)
+        try:
+            el.click()
+        except ElementClickInterceptedException:
+            driver.execute_script("arguments[0].click()", el)
+        return el
+
+    def _check(self, driver, wait: WebDriverWait, tracking_number: str, zip_code: str, result: StepResult) -> bool:
+        """Load the tracking page and read it into `result`; returns _read_tracking()'s `expanded`."""
+        try:
+            result.timings["page_load"] = self._load_page(driver, wait, self._tracking_url(tracking_number, zip_code))
+            return self._read_tracking(driver, wait, tracking_number, result)
         except Exception as e:
-            result.errors.append(f"webdriver_init: {e}")
+            result.errors.append(f"main_block: {e}")
             result.status = "error"
-        finally:
-            if driver:
-                driver.quit()
+            return False
+
+    def _check_group(
+        self, driver, tracking_numbers: list[str], zip_code: str, timeout: int, results: dict[str, StepResult]
+    ) -> None:
+        """Load one tracking page for all `tracking_numbers` and read each shipment into `results`."""
+        if len(tracking_numbers) == 1:
+            tracking_number = tracking_numbers[0]
+            self._check(driver, WebDriverWait(driver, timeout), tracking_number, zip_code, results[tracking_number])
+            return
+        try:
+            seconds = self._load_page(
+                driver, WebDriverWait(driver, timeout), self._tracking_url(",".join(tracking_numbers), zip_code)
+            )
+        except Exception as e:
+            for tracking_number in tracking_numbers:
+                results[tracking_number].errors.append(f"main_block: {e}")
+                results[tracking_number].status = "error"
+            return
+        for tracking_number in tracking_numbers:
+            result = results[tracking_number]
+            result.timings["page_load"] = seconds  # shared by the group
+            try:
+                scope = driver.find_element(*shipment_selector(tracking_number))
+            except NoSuchElementException as e:
+                result.errors.append(f"main_block: shipment not on page: {e}")
+                result.status = "error"
+                continue
+            self._read_tracking(driver, WebDriverWait(scope, timeout), tracking_number, result, scope)
+
+    def _submit_preferred_location(
+        self,
+        driver,
+        wait: WebDriverWait,
+        tracking_number: str,
+        custom_location: str,
+        highlight_only: bool,
+        expanded: bool = False,
+        result: StepResult | None = None
+    ) -> bool:
+        """
+        Fill in and (unless `highlight_only`) confirm the drop-off location form on the
+        loaded tracking page. `expanded`: the delivery options are already open.
+        The steps are timed into `result.timings` ("reroute.*").
+        """
+        result = result if result is not None else StepResult(status="success")
+        try:
+            if not expanded:
+                # Step 1: expand delivery options
+                LOG.info("Expanding delivery options...")
+                with result.timed("reroute.expand"):
+                    self._click(driver, wait, (By.XPATH, DELIVERY_TOGGLE))
+                LOG.info("Clicked delivery options toggle.")
+            # Step 2: select drop‑off location, once the options list has rendered it
+            LOG.info("Selecting drop-off location option...")
+            with result.timed("reroute.select_option"):
+                self._click(driver, wait, (By.XPATH, PREFERRED_LOCATION_OPTION))
+            LOG.info("Clicked PREFERRED_LOCATION option.")
+            # Step 3: wait for the form to render its drop-off input
+            LOG.info("Waiting for drop-off form...")
+            with result.timed("reroute.form"):
+                inp = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, CUSTOM_DROPOFF_INPUT)))
+            LOG.info("Drop-off form loaded.")
+            # Step 4: enter custom drop‑off text
+            LOG.info("Entering custom drop-off text: %s", custom_location)
+            with result.timed("reroute.enter_location"):
+                driver.execute_script("arguments[0].scrollIntoView({block: 'center'})", inp)
+                if self.interactive:
+                    driver.execute_script("arguments[0].style.border='3px solid blue'", inp)
+                inp.clear()
+                inp.send_keys(custom_location)
+            LOG.info("Custom drop-off text entered.")
+            # Step 5: click the consent checkbox once it is enabled
+            LOG.info("Clicking consent checkbox...")
+            with result.timed("reroute.consent"):
+                self._click(driver, wait, (By.XPATH, CONSENT_CHECKBOX))
+            LOG.info("Checkbox clicked.")
+            # Step 6: highlight the Confirm button, then click it once enabled if allowed
+            LOG.info("Processing confirmation button (highlight_only=%s)...", highlight_only)
+            with result.timed("reroute.confirm"):
+                confirm = wait.until(EC.presence_of_element_located((By.XPATH, CONFIRM_BUTTON)))
+                driver.execute_script("arguments[0].scrollIntoView({block: 'center'})", confirm)
+                if self.interactive:
+                    blink_element(driver, confirm, times=5, color="purple", width=10, interval=0.3)
+                if not highlight_only:
+                    wait.until(EC.element_to_be_clickable((By.XPATH, CONFIRM_BUTTON))).click()
+                    LOG.info("Clicked Confirm button.")
+                else:
+                    LOG.info("Highlighted Confirm button, not clicked.")
+                    if self.interactive:
+                        time.sleep(self.highlight_pause)  # leave the page on screen for the person watching
+            return True
+        except Exception as e:
+            LOG.error("Reroute executor failed for %s: %s", tracking_number, e)
+            return False
+
+    def check_reroute_availability(
+        self,
+        tracking_number: str,
+        zip_code: str,
+        timeout: int = 20,
+        selenium_headless: bool = False,
+        run_id: str | None = None
+    ) -> StepResult:
+        """
+        Check if reroute is available for a shipment using Selenium.
+        Honors headless mode and timeout from config.
+        """
+        result = self._new_result()
+        timeout = self._effective_timeout(timeout)
+        with result.timed("total"):
+            if not self._checked_over_http(tracking_number, zip_code, timeout, result):
+                try:
+                    with self._browser(selenium_headless) as driver:
+                        self._check(driver, WebDriverWait(driver, timeout), tracking_number, zip_code, result)
+                except Exception as e:
+                    result.errors.append(f"webdriver_init: {e}")
+                    result.status = "error"
+        self._record_timings(tracking_number, result)
         if run_id:
             LOG.debug("Finished checking reroute availability for %s [run_id=%s]", tracking_number, run_id)
         else:
             LOG.debug("Finished checking reroute availability for %s", tracking_number)
         return result
 
+    def check_many(
+        self,
+        tracking_numbers: list[str],
+        zip_code: str,
+        timeout: int = 20,
+        selenium_headless: bool = False,
+        run_id: str | None = None
+    ) -> dict[str, StepResult]:
+        """
+        Check several shipments, `batch_size` piece codes per tracking query: one JSON
+        request per group in `tracking_mode: http`, and one tracking page per group for
+        the rest, split into per-shipment results by their `data-shipment-id` elements.
+        """
+        timeout = self._effective_timeout(timeout)
+        results = {tn: self._new_result() for tn in tracking_numbers}
+        groups = _groups(list(results), self.batch_size)
+        if run_id:
+            LOG.info("Going to check %d shipment(s) in %d group(s) [run_id=%s]", len(results), len(groups), run_id)
+        else:
+            LOG.info("Going to check %d shipment(s) in %d group(s)", len(results), len(groups))
+        if self.tracking_mode == "http":
+            unanswered = [tn for group in groups for tn in self._check_http(group, zip_code, timeout, results)]
+            groups = _groups(unanswered, self.batch_size)
+        for group in groups:
+            try:
+                with self._browser(selenium_headless) as driver:
+                    self._check_group(driver, group, zip_code, timeout, results)
+            except Exception as e:
+                for tracking_number in group:
+                    results[tracking_number].errors.append(f"webdriver_init: {e}")
+                    results[tracking_number].status = "error"
+        for tracking_number, result in results.items():
+            self._record_timings(tracking_number, result)
+        if run_id:
+            LOG.debug("Finished checking %d shipment(s) [run_id=%s]", len(results), run_id)
+        else:
+            LOG.debug("Finished checking %d shipment(s)", len(results))
+        return results
+
     def reroute_shipment(
         self,
         tracking_number: str,
@@ -159,25 +594,7 @@ class DHLCarrier(CarrierBase):
         selenium_headless: bool = False,
         timeout: int = 20,
         run_id: str | None = None
-    ) -> StepResult:
-        """
-        Execute the shipment rerouting process using Selenium.
-        Honors headless mode and timeout from config.
-        """
-        result = StepResult(status="success", data={
-    "delivery_status": None,
-    "delivery_date": None,
-    "delivered": False,
-    "delivery_options": [],
-    "shipment_history": [],
-    "custom_dropoff_input_present": False,
-})
-        # Always use 'timeout' from config (carriers.base['timeout'])
-        if hasattr(self, 'cfg') and self.cfg and 'timeout' in self.cfg:
-            timeout = self.cfg['timeout']
-        elif hasattr(self, 'timeout'):
-            timeout = self.timeout
-
+    ) -> bool:
         """
         Execute the shipment rerouting process using Selenium.
 
@@ -192,90 +609,107 @@ class DHLCarrier(CarrierBase):
         Returns:
             bool: Whether the rerouting process was successful.
         """
-        url = (
-            f"https://www.dhl.de/en/privatkunden/"
-            f"pakete-empfangen/verfolgen.html?"
-            f"piececode={tracking_number}&zip={zip_code}&lang=en"
-        )
+        timeout = self._effective_timeout(timeout)
         if run_id:
             LOG.info("Going to reroute shipment for %s [run_id=%s]", tracking_number, run_id)
         else:
             LOG.info("Going to reroute shipment for %s", tracking_number)
-        options = uc.ChromeOptions()
-        if selenium_headless:
-            options.add_argument("--headless")
-            LOG.info("Launching Selenium in headless mode for reroute_shipment.")
-        else:
-            LOG.info("Launching Selenium in visible mode for reroute_shipment.")
-        options.add_argument("--lang=en")
-        options.add_argument("--incognito")
-        driver = uc.Chrome(options=options)
-        wait = WebDriverWait(driver, timeout)
+        timer = StepResult(status="success")
         try:
-            LOG.info("Loading DHL page for %s...", tracking_number)
-            driver.get(url)
-            wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, "article[class*='shipment']")))
-            # Step 1: expand delivery options
-            LOG.info("Expanding delivery options...")
-            toggle = wait.until(EC.element_to_be_clickable((By.XPATH, DELIVERY_TOGGLE)))
-            driver.execute_script("arguments[0].scrollIntoView(true)", toggle)
-            toggle.click()
-            LOG.info("Clicked delivery options toggle.")
-            time.sleep(1)
-            # Step 2: select drop‑off location
-            LOG.info("Selecting drop-off location option...")
-            el = wait.until(EC.element_to_be_clickable((By.XPATH, "//li[@data-name='PREFERRED_LOCATION']")))
-            driver.execute_script("arguments[0].scrollIntoView(true)", el)
-            el.click()
-            LOG.info("Clicked PREFERRED_LOCATION option.")
-            time.sleep(1)
-            # Step 3: wait for form
-            LOG.info("Waiting for drop-off form...")
-            wait.until(EC.presence_of_element_located((By.XPATH, "//form")))
-            LOG.info("Drop-off form loaded.")
-            # Step 4: enter custom drop‑off text
-            LOG.info("Entering custom drop-off text: %s", custom_location)
-            inp = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, CUSTOM_DROPOFF_INPUT)))
-            driver.execute_script("""
-                const el = arguments[0];
-                const rect = el.getBoundingClientRect();
-                window.scrollBy({ top: rect.top - 100, left: 0, behavior: 'smooth' });
-            """, inp)
-            driver.execute_script("arguments[0].style.border='3px solid blue'", inp)
-            time.sleep(0.5)
-            inp.clear()
-            inp.send_keys(custom_location)
-            LOG.info("Custom drop-off text entered.")
-            time.sleep(1)
-            # Step 5: click the consent checkbox
-            LOG.info("Clicking consent checkbox...")
-            checkbox = driver.find_element(By.XPATH, "//input[@type='checkbox']")
-            driver.execute_script("arguments[0].scrollIntoView(true)", checkbox)
-            time.sleep(0.5)
-            checkbox.click()
-            LOG.info("Checkbox clicked.")
-            # Step 6: blink highlight the Confirm button, then click if allowed
-            LOG.info("Processing confirmation button (highlight_only=%s)...", highlight_only)
-            CONFIRM_BUTTON_XPATH = "//button[text()='Confirm']"
-            confirm = wait.until(EC.presence_of_element_located((By.XPATH, CONFIRM_BUTTON_XPATH)))
-            driver.execute_script("""
-                const rect = arguments[0].getBoundingClientRect();
-                window.scrollBy({ top: rect.top - 100, left: 0, behavior: 'smooth' });
-            """, confirm)
-            blink_element(driver, confirm, times=5, color="purple", width=10, interval=0.3)
-            if not highlight_only:
-                confirm.click()
-                LOG.info("Clicked Confirm button.")
-            else:
-                LOG.info("Highlighted Confirm button, not clicked.")
-                time.sleep(5)
-            return True
-        except Exception as e:
-            LOG.error("Reroute executor failed for %s: %s", tracking_number, e)
-            return False
+            with timer.timed("reroute.total"), self._browser(selenium_headless) as driver:
+                wait = WebDriverWait(driver, timeout)
+                try:
+                    LOG.info("Loading DHL page for %s...", tracking_number)
+                    timer.timings["reroute.page_load"] = self._load_page(
+                        driver, wait, self._tracking_url(tracking_number, zip_code)
+                    )
+                except Exception as e:
+                    LOG.error("Reroute executor failed for %s: %s", tracking_number, e)
+                    return False
+                success = self._submit_preferred_location(
+                    driver, wait, tracking_number, custom_location, highlight_only, result=timer
+                )
         finally:
-            driver.quit()
+            # failed runs too: a page that times out is the slow run worth seeing in the averages
+            self._record_timings(tracking_number, timer)
         if run_id:
             LOG.debug("Finished reroute shipment for %s [run_id=%s]", tracking_number, run_id)
         else:
             LOG.debug("Finished reroute shipment for %s", tracking_number)
+        return success
+
+    def check_and_reroute(
+        self,
+        tracking_number: str,
+        zip_code: str,
+        custom_location: str,
+        decide: Callable[[StepResult], bool],
+        highlight_only: bool = True,
+        selenium_headless: bool = False,
+        timeout: int = 20,
+        run_id: str | None = None
+    ) -> tuple[StepResult, bool | None]:
+        """
+        Check the shipment and, if `decide(result)` is true, reroute it on the same page:
+        the browser session stays open while the caller decides, and the delivery options
+        the check expanded lead straight into the PREFERRED_LOCATION form. A check answered
+        by the tracking API (`tracking_mode: http`) opens the browser only to reroute.
+        """
+        result = self._new_result()
+        timeout = self._effective_timeout(timeout)
+        with result.timed("total"):
+            if self._checked_over_http(tracking_number, zip_code, timeout, result):
+                # no page is open yet: the reroute loads it in its own browser session
+                rerouted = None
+                if decide(result):
+                    rerouted = self.reroute_shipment(
+                        tracking_number, zip_code, custom_location, highlight_only, selenium_headless, timeout, run_id
+                    )
+            else:
+                rerouted = self._check_and_reroute_in_browser(
+                    tracking_number, zip_code, custom_location, decide, highlight_only, selenium_headless, timeout,
+                    run_id, result
+                )
+        self._record_timings(tracking_number, result)
+        if run_id:
+            LOG.debug("Finished check and reroute for %s [run_id=%s]", tracking_number, run_id)
+        else:
+            LOG.debug("Finished check and reroute for %s", tracking_number)
+        return result, rerouted
+
+    def _check_and_reroute_in_browser(
+        self,
+        tracking_number: str,
+        zip_code: str,
+        custom_location: str,
+        decide: Callable[[StepResult], bool],
+        highlight_only: bool,
+        selenium_headless: bool,
+        timeout: int,
+        run_id: str | None,
+        result: StepResult
+    ) -> bool | None:
+        """check_and_reroute() in one browser session, filling `result`; returns the reroute outcome."""
+        rerouted = None
+        decided = False
+        try:
+            with self._browser(selenium_headless) as driver:
+                wait = WebDriverWait(driver, timeout)
+                expanded = self._check(driver, wait, tracking_number, zip_code, result)
+                decided = True
+                if decide(result):
+                    if run_id:
+                        LOG.info("Going to reroute shipment for %s [run_id=%s]", tracking_number, run_id)
+                    else:
+                        LOG.info("Going to reroute shipment for %s", tracking_number)
+                    rerouted = self._submit_preferred_location(
+                        driver, wait, tracking_number, custom_location, highlight_only, expanded, result
+                    )
+        except Exception as e:
+            if decided:
+                raise
+            result.errors.append(f"webdriver_init: {e}")
+            result.status = "error"
+        if not decided and decide(result):
+            rerouted = False  # no browser to reroute with
+        return rerouted
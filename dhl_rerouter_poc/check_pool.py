@@ -0,0 +1,95 @@
+# dhl_rerouter_poc/check_pool.py
+"""
+Bounded-concurrency stage for carrier work: tracking checks, and the calendar decisions
+and reroutes that follow them, run on a thread pool while main.run keeps reading mail.
+Each check spends nearly all of its time waiting on the network and page rendering, so
+threads (each holding one browser session of the carrier's BrowserPool) overlap them well.
+"""
+import threading
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class CheckPool:
+    """
+    Run carrier tasks on up to `workers` threads, at most `limit` of them per carrier at
+    a time so a run doesn't hit a carrier's site like a bot swarm. Tasks beyond a
+    carrier's limit wait in a per-carrier queue and start as that carrier's earlier
+    tasks finish, without holding up other carriers or the caller.
+    With `workers` <= 1 tasks run inline in submit(), in order.
+    An exception raised by a task is re-raised by a later submit() or by join().
+    `stats` counts tasks per carrier and the peak number running at once.
+    """
+    def __init__(self, workers: int = 1):
+        self.workers = max(1, workers)
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="check") if self.workers > 1 else None
+        self._queues: dict[str, deque] = {}
+        self._limits: dict[str, int] = {}
+        self._in_flight: Counter = Counter()
+        self._futures: set[Future] = set()
+        self._lock = threading.Lock()
+        self._running = 0
+        self._closed = False
+        self.stats: Counter = Counter()
+
+    def submit(self, carrier: str, limit: int, fn: Callable, *args) -> None:
+        """Run fn(*args) for `carrier` with at most `limit` of its tasks in flight."""
+        self.stats[carrier] += 1
+        if self._executor is None:
+            fn(*args)
+            return
+        self._reap()
+        with self._lock:
+            self._limits[carrier] = max(1, limit)
+            self._queues.setdefault(carrier, deque()).append((fn, args))
+            self._dispatch(carrier)
+
+    def _dispatch(self, carrier: str) -> None:
+        # caller holds self._lock
+        queue = self._queues[carrier]
+        while queue and not self._closed and self._in_flight[carrier] < self._limits[carrier]:
+            fn, args = queue.popleft()
+            self._in_flight[carrier] += 1
+            self._futures.add(self._executor.submit(self._run, carrier, fn, *args))
+
+    def _run(self, carrier: str, fn: Callable, *args) -> None:
+        with self._lock:
+            self._running += 1
+            self.stats["peak_concurrency"] = max(self.stats["peak_concurrency"], self._running)
+        try:
+            fn(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._in_flight[carrier] -= 1
+                self._dispatch(carrier)  # the carrier's next queued task, before this one is done
+
+    def _reap(self) -> None:
+        with self._lock:
+            done = {f for f in self._futures if f.done()}
+            self._futures -= done
+        for future in done:
+            future.result()  # re-raise task errors
+
+    def join(self) -> None:
+        """Wait for all submitted tasks, including queued ones; re-raises the first error."""
+        while True:
+            with self._lock:
+                futures = set(self._futures)
+            if not futures:
+                return
+            wait(futures)
+            self._reap()
+
+    def close(self) -> None:
+        """Drop queued tasks and wait for running ones."""
+        with self._lock:
+            self._closed = True
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+        if self.workers > 1 and self.stats:
+            logger.info("Check pool: %s", dict(self.stats))
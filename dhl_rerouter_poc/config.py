@@ -5,7 +5,17 @@ import yaml
 from pathlib import Path
 from dotenv import load_dotenv
 
-load_dotenv(Path(__file__).parent.parent / ".env")
+PROJECT_ROOT = Path(__file__).parent.parent
+
+load_dotenv(PROJECT_ROOT / ".env")
+
+
+def resolve_path(path: str | Path) -> Path:
+    """
+    Resolve a path from config.yaml; relative paths are taken from the project root.
+    """
+    path = Path(path).expanduser()
+    return path if path.is_absolute() else PROJECT_ROOT / path
 
 def merge_carrier_config(base: dict, specific: dict) -> dict:
     """
@@ -17,8 +27,8 @@ def merge_carrier_config(base: dict, specific: dict) -> dict:
     return merged
 
 
-def load_config():
-    config_path = Path(__file__).parent.parent / "config.yaml"
+def load_config(require_credentials: bool = True):
+    config_path = PROJECT_ROOT / "config.yaml"
     if not config_path.exists():
         raise RuntimeError("config.yaml not found; copy config.yaml.example → config.yaml and fill in values")
 
@@ -28,7 +38,8 @@ def load_config():
 
     user = os.getenv("MAILBOX_USER")
     pwd  = os.getenv("MAILBOX_PASS")
-    if not user or not pwd:
+    # local mbox/Maildir sources need no credentials
+    if require_credentials and cfg["email"].get("source", "imap") == "imap" and (not user or not pwd):
         raise RuntimeError("Set MAILBOX_USER and MAILBOX_PASS in .env")
 
     cfg["email"]["user"]     = user
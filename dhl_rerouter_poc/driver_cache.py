@@ -0,0 +1,222 @@
+# dhl_rerouter_poc/driver_cache.py
+"""
+On-disk cache that turns a Chrome launch into a process spawn.
+
+Without it every uc.Chrome() call looks up the matching chromedriver release, downloads
+and unzips it, patches the binary and lets Chrome create a new profile on first start.
+DriverCache keeps, per installed Chrome version, the patched chromedriver and a cleaned
+user-data template (a profile Chrome has started with once, minus caches, cookies,
+history and lock files). A launch copies the template to a temporary directory and
+starts Chrome with the cached driver; uc finds the binary already patched and skips the
+download. A Chrome update changes the version and builds a new driver and template.
+"""
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import zipfile
+from collections import Counter
+from pathlib import Path
+
+import logging
+logger = logging.getLogger(__name__)
+
+# profile parts that are per-session state, not start-up work worth keeping
+_PROFILE_JUNK = (
+    "Singleton*",
+    "Crashpad",
+    "GrShaderCache",
+    "ShaderCache",
+    "GraphiteDawnCache",
+    "Default/Cache",
+    "Default/Code Cache",
+    "Default/GPUCache",
+    "Default/DawnCache",
+    "Default/Service Worker",
+    "Default/Network",
+    "Default/Cookies*",
+    "Default/History*",
+    "Default/Visited Links",
+    "Default/Sessions",
+    "Default/Session Storage",
+    "Default/Local Storage",
+    "Default/IndexedDB",
+    "Default/Current *",
+    "Default/Last *",
+)
+
+
+def chrome_version(browser_executable_path: str | None = None) -> str | None:
+    """Full version of the installed Chrome (e.g. '124.0.6367.91'), or None if it can't be read."""
+    import undetected_chromedriver as uc
+
+    path = browser_executable_path or uc.find_chrome_executable()
+    if not path:
+        return None
+    try:
+        out = subprocess.run([path, "--version"], capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.debug("Could not run %s --version: %s", path, e)
+        return None
+    match = re.search(r"\b(\d+\.\d+\.\d+\.\d+)\b", out)
+    return match.group(1) if match else None
+
+
+def clean_profile(profile_dir: Path) -> None:
+    """Remove caches, cookies, history, session and lock files from a Chrome user-data dir."""
+    for pattern in _PROFILE_JUNK:
+        for path in profile_dir.glob(pattern):
+            if path.is_dir() and not path.is_symlink():
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                path.unlink(missing_ok=True)
+
+
+class DriverCache:
+    """
+    Patched chromedriver and user-data template under `cache_dir`, one pair per Chrome
+    version. launch() starts Chrome from them, building them first when Chrome's version
+    has no cached pair yet (a "cold" launch; later ones are "warm"). `stats` counts cold
+    and warm launches and their seconds; log_stats() logs the average start-up times.
+    """
+    def __init__(self, cache_dir: str | Path, browser_executable_path: str | None = None):
+        self.cache_dir = Path(cache_dir)
+        self.browser_executable_path = browser_executable_path
+        self._version: str | None = None
+        self._broken: str | None = None  # why building failed; later launches skip the cache
+        self._lock = threading.Lock()
+        self.stats: Counter = Counter()
+
+    def driver_path(self, version: str) -> Path:
+        return self.cache_dir / f"chromedriver-{version}{'.exe' if os.name == 'nt' else ''}"
+
+    def profile_path(self, version: str) -> Path:
+        return self.cache_dir / f"profile-{version}"
+
+    def prepare(self) -> tuple[str, Path, Path, bool]:
+        """
+        Return (Chrome version, driver path, profile template, cold) for the installed
+        Chrome, building the missing parts; cold is True if anything had to be built.
+        Raises RuntimeError if Chrome's version can't be determined or the driver or
+        template can't be built (download, unzip or disk errors); a failed build is not
+        retried by later calls.
+        """
+        with self._lock:
+            if self._broken is not None:
+                raise RuntimeError(self._broken)
+            if self._version is None:
+                self._version = chrome_version(self.browser_executable_path)
+                if self._version is None:
+                    raise RuntimeError("Could not determine the installed Chrome version")
+                self._prune(self._version)
+            version = self._version
+            driver, profile = self.driver_path(version), self.profile_path(version)
+            cold = False
+            try:
+                if not self._is_patched(driver):
+                    logger.info("Going to download and patch chromedriver for Chrome %s", version)
+                    self._build_driver(version, driver)
+                    cold = True
+                if not profile.is_dir():
+                    logger.info("Going to build a Chrome profile template for Chrome %s", version)
+                    self._build_profile(version, driver, profile)
+                    cold = True
+            except (OSError, ValueError, zipfile.BadZipFile) as e:
+                # urllib's URLError/HTTPError are OSErrors; a truncated download is a BadZipFile
+                self._broken = f"Could not build the chromedriver cache for Chrome {version}: {e!r}"
+                raise RuntimeError(self._broken) from e
+            return version, driver, profile, cold
+
+    def launch(self, options):
+        """Start undetected-chromedriver Chrome from the cached driver and a copy of the profile template."""
+        import undetected_chromedriver as uc
+
+        start = time.perf_counter()
+        version, driver_path, template, cold = self.prepare()
+        profile = Path(tempfile.mkdtemp(prefix="uc-profile-"))
+        shutil.copytree(template, profile, dirs_exist_ok=True)
+        try:
+            driver = uc.Chrome(
+                options=options,
+                driver_executable_path=str(driver_path),
+                browser_executable_path=self.browser_executable_path,
+                user_data_dir=str(profile),
+                version_main=int(version.split(".")[0]),
+            )
+        except Exception:
+            shutil.rmtree(profile, ignore_errors=True)
+            raise
+        driver.keep_user_data_dir = False  # uc removes the copy on quit()
+        seconds = time.perf_counter() - start
+        kind = "cold" if cold else "warm"
+        with self._lock:
+            self.stats[f"{kind}_launches"] += 1
+            self.stats[f"{kind}_seconds"] += seconds
+        logger.info("Chrome %s started in %.2f s (%s start)", version, seconds, kind)
+        return driver
+
+    def log_stats(self) -> None:
+        for kind in ("cold", "warm"):
+            if self.stats[f"{kind}_launches"]:
+                logger.info(
+                    "Chrome %s starts: %d, avg %.2f s",
+                    kind,
+                    self.stats[f"{kind}_launches"],
+                    self.stats[f"{kind}_seconds"] / self.stats[f"{kind}_launches"],
+                )
+
+    @staticmethod
+    def _is_patched(driver: Path) -> bool:
+        if not driver.is_file():
+            return False
+        from undetected_chromedriver.patcher import Patcher
+
+        return Patcher(executable_path=str(driver)).is_binary_patched()
+
+    def _build_driver(self, version: str, driver: Path) -> None:
+        """Download the chromedriver matching Chrome's major version, patch it and store it at `driver`."""
+        from undetected_chromedriver.patcher import Patcher
+
+        patcher = Patcher(version_main=int(version.split(".")[0]))
+        patcher.auto()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = driver.with_name(driver.name + ".tmp")
+        shutil.copy2(patcher.executable_path, tmp)
+        tmp.replace(driver)
+
+    def _build_profile(self, version: str, driver: Path, profile: Path) -> None:
+        """Start headless Chrome once on an empty user-data dir, then keep the cleaned result as the template."""
+        import undetected_chromedriver as uc
+
+        tmp = Path(tempfile.mkdtemp(prefix="uc-template-", dir=self.cache_dir))
+        options = uc.ChromeOptions()
+        options.add_argument("--headless")
+        chrome = uc.Chrome(
+            options=options,
+            driver_executable_path=str(driver),
+            browser_executable_path=self.browser_executable_path,
+            user_data_dir=str(tmp),
+            version_main=int(version.split(".")[0]),
+        )
+        try:
+            chrome.get("about:blank")
+        finally:
+            chrome.quit()
+        clean_profile(tmp)
+        tmp.rename(profile)
+
+    def _prune(self, version: str) -> None:
+        """Remove drivers and templates of other Chrome versions."""
+        if not self.cache_dir.is_dir():
+            return
+        keep = {self.driver_path(version).name, self.profile_path(version).name}
+        for path in self.cache_dir.iterdir():
+            if path.name.startswith(("chromedriver-", "profile-", "uc-template-")) and path.name not in keep:
+                logger.info("Removing cached %s (Chrome is now %s)", path.name, version)
+                if path.is_dir():
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    path.unlink(missing_ok=True)
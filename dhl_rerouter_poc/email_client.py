@@ -2,8 +2,33 @@
 
 import imaplib
 import email
+import queue
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
 from datetime import datetime, timedelta
-from .parser import safe_decode, strip_html
+from email.header import decode_header, make_header
+from email.utils import parsedate_to_datetime
+from typing import Callable, Iterator
+from .config import resolve_path
+from .imap_utils import (
+    uid_set,
+    iter_fetch_response,
+    fetch_item,
+    fetch_item_int,
+    text_parts,
+    decode_transfer_encoding,
+    search_string,
+    search_or,
+)
+from .imap_idle import IdleIMAP4, IdleIMAP4_SSL, ImapIdleWatcher
+from .message_cache import MessageCache, FIELDS as CACHED_FIELDS
+from .parser import HTML_PARSERS, BytePrefilter, safe_decode, strip_html, literal_prefix
+from .sources.base import FetchedMessage, MessageSource
+from .sync_state import SyncState
 
 import socket
 socket.setdefaulttimeout(15)  # Explicit timeout for all IMAP operations (seconds)
@@ -11,12 +36,88 @@ socket.setdefaulttimeout(15)  # Explicit timeout for all IMAP operations (second
 import logging
 logger = logging.getLogger(__name__)
 
-class ImapEmailClient:
+
+# headers fetched alongside BODYSTRUCTURE for FetchedMessage metadata
+META_FIELDS = "BODY.PEEK[HEADER.FIELDS (MESSAGE-ID SUBJECT FROM DATE)]"
+META_KEY = b"BODY[HEADER.FIELDS (MESSAGE-ID SUBJECT FROM DATE)]"
+# header-first pass for cross-folder de-duplication
+ID_FIELDS = "(UID RFC822.SIZE BODY.PEEK[HEADER.FIELDS (MESSAGE-ID)])"
+ID_KEY = b"BODY[HEADER.FIELDS (MESSAGE-ID)]"
+
+
+def _header(msg, name: str) -> str | None:
+    value = msg.get(name)
+    if value is None:
+        return None
+    try:
+        return str(make_header(decode_header(value))).strip()
+    except Exception:
+        return str(value).strip()
+
+
+def message_meta(msg) -> dict:
+    """Return message_id, subject, sender and ISO date from a message's headers."""
+    date = _header(msg, "Date")
+    try:
+        date = parsedate_to_datetime(date).isoformat() if date else None
+    except (TypeError, ValueError):
+        date = None
+    return {
+        "message_id": _header(msg, "Message-ID"),
+        "subject": _header(msg, "Subject"),
+        "sender": _header(msg, "From"),
+        "date": date,
+    }
+
+
+def has_candidate(parts: list[tuple[str, str, bytes]], prefilter: BytePrefilter | None) -> bool:
+    """True unless `prefilter` finds no tracking-code candidate in any transfer-decoded part."""
+    return prefilter is None or any(
+        prefilter.may_contain(raw, charset, html=subtype == "html") for subtype, charset, raw in parts
+    )
+
+
+def decode_text_parts(
+    parts: list[tuple[str, str, bytes]], prefilter: BytePrefilter | None = None, html_parser: str = "stream"
+) -> str | None:
+    """
+    Join (subtype, charset, transfer-decoded payload) text parts into one body, stripping
+    HTML parts with `html_parser` (see strip_html). Returns None, without decoding
+    anything, if `prefilter` finds no tracking-code candidate in any payload.
+    """
+    if not has_candidate(parts, prefilter):
+        return None
+    body = ""
+    for subtype, charset, raw in parts:
+        txt = safe_decode(raw, charset)
+        body += strip_html(txt, html_parser) if subtype == "html" else txt
+    return body
+
+
+def message_text(msg, prefilter: BytePrefilter | None = None, html_parser: str = "stream") -> str | None:
+    """Return the concatenated text/plain and (stripped) text/html content of a message (None: see decode_text_parts)."""
+    if msg.is_multipart():
+        parts = [
+            (part.get_content_subtype(), part.get_content_charset() or "utf-8", part.get_payload(decode=True) or b"")
+            for part in msg.walk()
+            if part.get_content_type() in ("text/plain", "text/html")
+        ]
+    else:
+        # single-part messages are decoded whatever their content type
+        parts = [("plain", msg.get_content_charset() or "utf-8", msg.get_payload(decode=True) or b"")]
+    return decode_text_parts(parts, prefilter, html_parser)
+
+
+class ImapEmailClient(MessageSource):
     """
     IMAP email client with robust error handling and explicit timeouts.
     All IMAP operations are subject to a global socket timeout (default: 15 seconds).
+    Messages of the lookback window are fetched in pipelined batches over a connection
+    pool and yielded newest first; watch_messages() follows new mail via IMAP IDLE.
+    Fetch mode, incremental sync, prefilters and the message cache are configured
+    under `email` (see the README).
     """
-    def __init__(self, cfg: dict):
+    def __init__(self, cfg: dict, tracking_patterns: dict | None = None):
         self.host     = cfg["host"]
         self.port     = cfg["port"]
         self.ssl      = cfg.get("ssl", True)
@@ -24,70 +125,627 @@ class ImapEmailClient:
         self.pwd      = cfg["password"]
         self.folders  = cfg["folders"]
         self.lookback = cfg["lookback_weeks"]
+        self.incremental = cfg.get("incremental", False)
+        self.state = SyncState(resolve_path(cfg.get("state_file", ".imap_sync_state.json"))) if self.incremental else None
+        self.full_sync = False  # ignore stored watermarks for one run (they are still advanced)
+        self.batch_size = max(1, int(cfg.get("fetch_batch_size", 500)))
+        self.fetch_mode = cfg.get("fetch_mode", "text_parts")
+        self.max_part_bytes = int(cfg.get("max_part_bytes", 262144))  # 0 = uncapped
+        self.prefilter = self._build_prefilter(cfg.get("prefilter") or {}, tracking_patterns or {})
+        self.max_connections = max(1, int(cfg.get("max_connections", 1)))
+        # copies can only come from another folder: with one folder the Message-ID pass is a wasted FETCH
+        self.dedup = cfg.get("dedup_message_ids", True) and len(self.folders) > 1
+        self._known_message_ids: OrderedDict[str, None] | None = None  # kept across syncs in watch mode
+        self.idle_cfg = cfg.get("idle") or {}
+        self.max_known_message_ids = max(1, int(self.idle_cfg.get("known_message_ids", 10000)))
+        self.html_parser = cfg.get("html_parser", "stream")
+        if self.html_parser not in HTML_PARSERS:
+            raise ValueError(f"Unknown email.html_parser '{self.html_parser}' (expected one of {', '.join(HTML_PARSERS)})")
+        self.byte_filter = None
+        if tracking_patterns and cfg.get("byte_prefilter", True):
+            self.byte_filter = BytePrefilter(tracking_patterns)
+            if self.byte_filter.regex is None:
+                self.byte_filter = None
+        self.cache = self._build_cache(cfg.get("cache") or {})
+        self.stats: Counter = Counter()
+        self._stats_lock = threading.Lock()
 
-    def fetch_messages(self, run_id: str | None = None):
-        if run_id:
-            logger.info("Going to fetch messages [run_id=%s]", run_id)
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self.stats[key] += n
+
+    @property
+    def account(self) -> str:
+        return f"{self.user}@{self.host}:{self.port}"
+
+    @staticmethod
+    def _uidvalidity(mail) -> int | None:
+        _, data = mail.response("UIDVALIDITY")
+        try:
+            return int(data[0])
+        except (TypeError, ValueError, IndexError):
+            return None
+
+    def _build_cache(self, cache_cfg: dict) -> MessageCache | None:
+        if not cache_cfg.get("enabled", False):
+            return None
+        # bodies are cached unfiltered (see _fetch_slice), so they don't depend on tracking_patterns
+        variant = "rfc822" if self.fetch_mode == "rfc822" else f"text_parts:{self.max_part_bytes}"
+        variant += f":{self.html_parser}"  # extractors differ in whitespace and link text
+        return MessageCache(
+            resolve_path(cache_cfg.get("path", ".imap_message_cache.sqlite")),
+            max_bytes=int(cache_cfg.get("max_mb", 200) * 1024 * 1024),
+            variant=variant,
+        )
+
+    @staticmethod
+    def _build_prefilter(pf_cfg: dict, tracking_patterns: dict) -> str | None:
+        """
+        Build the SEARCH keys selecting candidate messages: FROM any configured sender,
+        SUBJECT any configured keyword, or BODY containing a literal tracking-code prefix
+        derived from `tracking_patterns`. Returns None when the prefilter is disabled.
+        """
+        if not pf_cfg.get("enabled", False):
+            return None
+        terms = [f"FROM {search_string(s)}" for s in pf_cfg.get("senders", [])]
+        terms += [f"SUBJECT {search_string(s)}" for s in pf_cfg.get("subjects", [])]
+        if pf_cfg.get("body_prefixes", True):
+            # short prefixes such as 'EE' or 'HR' match ordinary words (SEARCH is case-insensitive)
+            min_len = pf_cfg.get("min_body_prefix", 3)
+            uncovered = []
+            for carrier, pats in tracking_patterns.items():
+                for pat in pats:
+                    prefix = literal_prefix(pat)
+                    if len(prefix) >= min_len:
+                        terms.append(f"BODY {search_string(prefix)}")
+                    elif carrier not in uncovered:
+                        uncovered.append(carrier)
+            if uncovered:
+                logger.warning(
+                    "IMAP prefilter: no usable literal prefix for %s; their codes are only found "
+                    "in messages matching the sender/subject terms", ", ".join(uncovered),
+                )
+        ascii_terms = list(dict.fromkeys(t for t in terms if t.isascii()))
+        if len(ascii_terms) < len(terms):
+            logger.warning("IMAP prefilter: ignoring non-ASCII search terms")
+        if not ascii_terms:
+            logger.warning("IMAP prefilter enabled but no search terms configured; disabled")
+            return None
+        return f"({search_or(ascii_terms)})"
+
+    @staticmethod
+    def _search_uids(mail, criteria: str) -> list[bytes]:
+        """Return matching UIDs newest first; raises IMAP4.error if the server rejects the criteria."""
+        # try server‐side SORT newest first
+        try:
+            status, data = mail.uid("SORT", "(REVERSE DATE)", "UTF-8", criteria)
+            if status == "OK":
+                return data[0].split()
+        except imaplib.IMAP4.error:
+            pass
+        # fallback to SEARCH + reverse
+        status, data = mail.uid("SEARCH", None, criteria)
+        if status != "OK":
+            raise imaplib.IMAP4.error(f"SEARCH returned {status}: {data}")
+        return data[0].split()[::-1]
+
+    def _candidate_uids(self, mail, folder: str, criteria: str) -> list[int]:
+        """Search `criteria`, narrowed by the prefilter when enabled and accepted by the server."""
+        if self.prefilter:
+            try:
+                candidates = [int(u) for u in self._search_uids(mail, f"{criteria} {self.prefilter}")]
+            except imaplib.IMAP4.error as e:
+                logger.warning("Server rejected prefilter search in folder '%s' (%s); fetching all messages", folder, e)
+            else:
+                status, data = mail.uid("SEARCH", None, criteria)
+                if status == "OK":
+                    skipped = len(data[0].split()) - len(candidates)
+                    self._count("prefilter_skipped", skipped)
+                    logger.info("Folder '%s': prefilter kept %d message(s), skipped %d", folder, len(candidates), skipped)
+                return candidates
+        return [int(u) for u in self._search_uids(mail, criteria)]
+
+    def _body(self, body: str | None) -> str:
+        if body is None:
+            self._count("decode_skipped")
+            return ""
+        return body
+
+    def _fetch_batches(self, mail, uids: list[int], items: str, folder: str, failed: list[int]):
+        """
+        Yield (uid, {item: literal}, text) for `uids` in the given order, issuing one
+        UID FETCH per chunk of `batch_size` UIDs. UIDs that could not be fetched
+        are appended to `failed`. A dropped connection (IMAP4.abort, OSError) is
+        re-raised, so the pool discards it.
+        """
+        for i in range(0, len(uids), self.batch_size):
+            chunk = uids[i:i + self.batch_size]
+            try:
+                status, data = mail.uid("FETCH", uid_set(chunk), items)
+                if status != "OK":
+                    raise imaplib.IMAP4.error(f"UID FETCH returned {status}")
+            except (imaplib.IMAP4.abort, OSError):
+                raise
+            except Exception as e:
+                failed.extend(chunk)
+                logger.error("Failed to fetch %d message(s) in folder '%s': %s", len(chunk), folder, e)
+                continue
+            by_uid = {uid: (literals, text) for uid, literals, text in iter_fetch_response(data) if uid is not None}
+            for uid in chunk:
+                if uid in by_uid:
+                    yield uid, *by_uid[uid]
+                else:
+                    # expunged between SEARCH and FETCH; nothing to retry
+                    logger.debug("UID %s vanished from folder '%s' before FETCH", uid, folder)
+
+    def _iter_rfc822_bodies(
+        self, mail, uids: list[int], folder: str, failed: list[int], decode: bool = True, prefilter: BytePrefilter | None = None
+    ):
+        """
+        Yield FetchedMessages downloading complete RFC822 messages (`decode=False`: undecoded,
+        see FetchedMessage.raw). Bodies without a `prefilter` candidate are left empty.
+        """
+        for uid, literals, _ in self._fetch_batches(mail, uids, "(RFC822)", folder, failed):
+            if not decode:
+                yield FetchedMessage("", folder, uid, raw=literals.get(b"RFC822", b""))
+                continue
+            try:
+                msg = email.message_from_bytes(literals[b"RFC822"])
+                yield FetchedMessage(self._body(message_text(msg, prefilter, self.html_parser)), folder, uid, **message_meta(msg))
+            except Exception as e:
+                failed.append(uid)
+                logger.error("Failed to parse message UID %s in folder '%s': %s", uid, folder, e)
+
+    def _iter_text_part_bodies(
+        self, mail, uids: list[int], folder: str, failed: list[int], decode: bool = True, prefilter: BytePrefilter | None = None
+    ):
+        """
+        Yield FetchedMessages fetching BODYSTRUCTURE (plus the metadata headers) first and
+        then BODY.PEEK[<part>] for the text parts only. Messages with the same text-part layout share one UID FETCH.
+        Messages whose structure cannot be parsed fall back to a full RFC822 fetch.
+        With `decode=False` messages carry their transfer-decoded parts instead of a body.
+        Messages without a `prefilter` candidate get an empty body (or no parts).
+        """
+        cap = f"<0.{self.max_part_bytes}>" if self.max_part_bytes > 0 else ""
+        for i in range(0, len(uids), self.batch_size):
+            chunk = uids[i:i + self.batch_size]
+            layouts: dict[int, list] = {}
+            metas: dict[int, dict] = {}
+            fallback: list[int] = []
+            items = f"(UID BODYSTRUCTURE {META_FIELDS})"
+            for uid, literals, text in self._fetch_batches(mail, chunk, items, folder, failed):
+                try:
+                    metas[uid] = message_meta(email.message_from_bytes(literals.get(META_KEY, b"")))
+                    layouts[uid] = text_parts(fetch_item(text, b"BODYSTRUCTURE"))
+                except Exception as e:
+                    logger.debug("Unparseable BODYSTRUCTURE for UID %s in '%s': %s", uid, folder, e)
+                    fallback.append(uid)
+            groups: dict[tuple, list[int]] = {}
+            for uid, parts in layouts.items():
+                groups.setdefault(tuple(sec for sec, *_ in parts), []).append(uid)
+            messages: dict[int, FetchedMessage] = {}
+            for sections, group in groups.items():
+                if not sections:
+                    messages.update((uid, FetchedMessage("", folder, uid, **metas[uid])) for uid in group)
+                    continue
+                items = "(" + " ".join(f"BODY.PEEK[{sec}]{cap}" for sec in sections) + ")"
+                for uid, literals, _ in self._fetch_batches(mail, group, items, folder, failed):
+                    parts = []
+                    for sec, subtype, charset, encoding in layouts[uid]:
+                        key = f"BODY[{sec}]{'<0>' if cap else ''}".encode()
+                        parts.append((subtype, charset, decode_transfer_encoding(literals.get(key, b""), encoding)))
+                    if decode:
+                        body = self._body(decode_text_parts(parts, prefilter, self.html_parser))
+                        messages[uid] = FetchedMessage(body, folder, uid, **metas[uid])
+                    elif has_candidate(parts, prefilter):
+                        messages[uid] = FetchedMessage("", folder, uid, parts=parts, **metas[uid])
+                    else:
+                        messages[uid] = FetchedMessage(self._body(None), folder, uid, **metas[uid])
+            messages.update(
+                (m.uid, m) for m in self._iter_rfc822_bodies(mail, fallback, folder, failed, decode, prefilter)
+            )
+            for uid in chunk:
+                if uid in messages:
+                    yield messages[uid]
+
+    def _connect(self, idle: bool = False):
+        """Open and authenticate one IMAP connection (`idle`: an unbuffered one for ImapIdleWatcher)."""
+        if idle:
+            imap_cls = IdleIMAP4_SSL if self.ssl else IdleIMAP4
         else:
-            logger.info("Going to fetch messages")
-        msgs = []
-        mail = None
+            imap_cls = imaplib.IMAP4_SSL if self.ssl else imaplib.IMAP4
         try:
+            mail = imap_cls(self.host, self.port)
+        except Exception as e:
+            logger.error("IMAP connection failed: %s", e)
+            raise
+        try:
+            mail.login(self.user, self.pwd)
+        except Exception as e:
+            logger.error("IMAP login failed for user '%s': %s", self.user, e)
             try:
-                mail = imaplib.IMAP4_SSL(self.host, self.port) if self.ssl else imaplib.IMAP4(self.host, self.port)
+                mail.logout()
+            except Exception:
+                pass
+            raise
+        return mail
+
+    def _scan_folder(self, pool: "ImapConnectionPool", folder: str, cutoff: str) -> "_FolderScan | None":
+        """Select `folder` and search the UIDs to fetch, newest first."""
+        try:
+            with pool.connection() as mail:
+                uidvalidity = pool.select(mail, folder)
+                if self.cache and uidvalidity is not None:
+                    self.cache.purge_stale(self.account, folder, uidvalidity)
+                last_uid = None
+                if self.state and uidvalidity is not None and not self.full_sync:
+                    last_uid = self.state.get(self.account, folder, uidvalidity)
+                criteria = f"SINCE {cutoff}"
+                if last_uid is not None:
+                    criteria = f"UID {last_uid + 1}:* {criteria}"
+                uids = self._candidate_uids(mail, folder, criteria)
+                if last_uid is not None:
+                    # "n:*" always matches the highest UID, even when it is below n
+                    uids = [u for u in uids if u > last_uid]
+                    logger.info("Folder '%s': %d new message(s) since UID %d", folder, len(uids), last_uid)
+                scan = _FolderScan(folder, uidvalidity, last_uid, uids)
+                if self.dedup and uids:
+                    scan.message_ids = self._message_ids(mail, uids, folder)
+        except Exception as e:
+            logger.error("Error processing folder '%s': %s", folder, e)
+            return None
+        return scan
+
+    def _message_ids(self, mail, uids: list[int], folder: str) -> dict[int, tuple[str, int]]:
+        """Fetch only Message-ID and size of `uids`; returns {uid: (message_id, size)} for messages that have one."""
+        found: dict[int, tuple[str, int]] = {}
+        for uid, literals, text in self._fetch_batches(mail, uids, ID_FIELDS, folder, []):
+            msg = email.message_from_bytes(literals.get(ID_KEY, b""))
+            message_id = (msg.get("Message-ID") or "").strip()
+            if message_id:
+                size = fetch_item_int(text, b"RFC822.SIZE")
+                found[uid] = (message_id, size or 0)
+        return found
+
+    def _drop_duplicates(self, scans: list["_FolderScan"], seen: set[str]) -> None:
+        """
+        Mark copies of already seen Message-IDs as duplicates, keeping the first copy in
+        folder order (newest first within a folder). Duplicates are not downloaded.
+        """
+        for scan in scans:
+            for uid in scan.uids:
+                entry = scan.message_ids.get(uid)
+                if entry is None:
+                    continue
+                message_id, size = entry
+                if message_id in seen:
+                    scan.duplicates.add(uid)
+                    self._count("duplicates_skipped")
+                    self._count("duplicate_bytes_skipped", size)
+                else:
+                    seen.add(message_id)
+            if scan.duplicates:
+                logger.info("Folder '%s': skipping %d duplicate message(s) by Message-ID", scan.folder, len(scan.duplicates))
+
+    def _remember_message_ids(self, scans: list["_FolderScan"]) -> None:
+        """
+        Add the Message-IDs of `scans` to those kept across watch-mode syncs, oldest UID
+        first, and forget the least recently seen beyond `idle.known_message_ids`.
+        """
+        known = self._known_message_ids
+        for scan in scans:
+            for uid in sorted(scan.message_ids):
+                message_id = scan.message_ids[uid][0]
+                known[message_id] = None
+                known.move_to_end(message_id)
+        while len(known) > self.max_known_message_ids:
+            known.popitem(last=False)
+
+    def _fetch_slice(
+        self, pool: "ImapConnectionPool", scan: "_FolderScan", uids: list[int], decode: bool = True
+    ) -> tuple[list[FetchedMessage], list[int]]:
+        """
+        Fetch `uids` from `scan.folder` (cached ones from the MessageCache); returns (messages
+        in order, failed UIDs). Bodies go into the cache unfiltered; the byte prefilter is
+        applied to cached and fetched bodies alike, after the lookup.
+        """
+        failed: list[int] = []
+        cached: dict[int, dict] = {}
+        use_cache = self.cache is not None and scan.uidvalidity is not None and decode
+        if use_cache:
+            try:
+                cached = self.cache.get_many(self.account, scan.folder, scan.uidvalidity, uids)
             except Exception as e:
-                logger.error("IMAP connection failed: %s", e)
-                return []
+                logger.warning("Message cache lookup failed: %s", e)
+        missing = [u for u in uids if u not in cached]
+        fetched: dict[int, FetchedMessage] = {}
+        if missing:
             try:
-                mail.login(self.user, self.pwd)
+                with pool.connection() as mail:
+                    if pool.select(mail, scan.folder) != scan.uidvalidity:
+                        raise imaplib.IMAP4.error("UIDVALIDITY changed during fetch")
+                    iter_bodies = self._iter_rfc822_bodies if self.fetch_mode == "rfc822" else self._iter_text_part_bodies
+                    prefilter = None if use_cache else self.byte_filter
+                    fetched.update(
+                        (m.uid, m) for m in iter_bodies(mail, missing, scan.folder, failed, decode, prefilter)
+                    )
             except Exception as e:
-                logger.error("IMAP login failed for user '%s': %s", self.user, e)
-                return []
-            cutoff = (datetime.now() - timedelta(weeks=self.lookback)).strftime("%d-%b-%Y")
-            for folder in self.folders:
+                logger.error("Error fetching %d message(s) from folder '%s': %s", len(missing), scan.folder, e)
+                failed = list(missing)
+                fetched.clear()
+            if use_cache:
+                entries = {uid: {k: getattr(m, k) for k in CACHED_FIELDS} for uid, m in fetched.items()}
                 try:
-                    status, _ = mail.select(f'"{folder}"', readonly=True)
-                    if status != "OK":
-                        logger.warning("Could not select folder '%s': %s", folder, status)
-                        continue
-                    # try server‐side SORT newest first
-                    try:
-                        status, data = mail.sort('REVERSE DATE', 'UTF-8', f'SINCE {cutoff}')
-                        nums = data[0].split() if status == "OK" else []
-                    except imaplib.IMAP4.error:
-                        # fallback to SEARCH + reverse
-                        status, data = mail.search(None, f'SINCE {cutoff}')
-                        nums = data[0].split()[::-1] if status == "OK" else []
-                    for num in nums:
-                        try:
-                            _, fetched = mail.fetch(num, "(RFC822)")
-                            msg = email.message_from_bytes(fetched[0][1])
-                            body = ""
-                            if msg.is_multipart():
-                                for part in msg.walk():
-                                    ctype = part.get_content_type()
-                                    if ctype in ("text/plain", "text/html"):
-                                        ch = part.get_content_charset() or "utf-8"
-                                        txt = safe_decode(part.get_payload(decode=True), ch)
-                                        body += strip_html(txt) if ctype == "text/html" else txt
-                            else:
-                                ch = msg.get_content_charset() or "utf-8"
-                                body = safe_decode(msg.get_payload(decode=True), ch)
-                            msgs.append(body)
-                        except Exception as e:
-                            logger.error("Failed to fetch or parse message %s in folder '%s': %s", num, folder, e)
+                    self.cache.put_many(self.account, scan.folder, scan.uidvalidity, entries)
                 except Exception as e:
-                    logger.error("Error processing folder '%s': %s", folder, e)
+                    logger.warning("Could not store %d message(s) in the message cache: %s", len(entries), e)
+        messages = []
+        for uid in uids:
+            if uid in cached:
+                messages.append(FetchedMessage(folder=scan.folder, uid=uid, **cached[uid]))
+            elif uid in fetched:
+                messages.append(fetched[uid])
+        if use_cache and self.byte_filter:
+            messages = [self._filtered(m) for m in messages]
+        return messages, failed
+
+    def _filtered(self, message: FetchedMessage) -> FetchedMessage:
+        """Empty the (cached, unfiltered) body of `message` if the byte prefilter finds no candidate in it."""
+        if not message.body or self.byte_filter.may_contain(message.body.encode("utf-8"), "utf-8"):
+            return message
+        return replace(message, body=self._body(None))
+
+    def _slices(self, uids: list[int]) -> list[list[int]]:
+        """Split a folder's UIDs into fetch slices, so large folders spread over the pool."""
+        size = self.batch_size
+        if self.max_connections > 1:
+            size = max(50, min(size, -(-len(uids) // self.max_connections)))
+        return [uids[i:i + size] for i in range(0, len(uids), size)]
+
+    def _advance_watermark(self, scan: "_FolderScan") -> None:
+        if not self.state or scan.uidvalidity is None:
+            return
+        # never advance past a message that failed, so it is retried next run
+        highest = min(scan.failed) - 1 if scan.failed else max(scan.uids, default=0)
+        self.state.update(self.account, scan.folder, scan.uidvalidity, max(highest, scan.last_uid or 0))
+
+    def _finish_cache(self) -> None:
+        cache = self.cache
+        self.stats["cache_hits"] = cache.hits
+        self.stats["cache_misses"] = cache.misses
+        if cache.hits or cache.misses:
+            logger.info(
+                "Message cache: %d hit(s), %d miss(es), hit rate %.1f%%",
+                cache.hits, cache.misses, 100 * cache.hit_rate(),
+            )
+        try:
+            cache.evict()
+        except Exception as e:
+            logger.error("Could not evict message cache entries: %s", e)
+
+    def iter_messages(
+        self, run_id: str | None = None, folders: list[str] | None = None, decode: bool = True
+    ) -> Iterator[FetchedMessage]:
+        """
+        Yield FetchedMessages folder by folder, newest first, as soon as each fetch slice
+        is decoded. Slices are fetched in background threads a few steps ahead of the
+        consumer, so processing overlaps with IMAP I/O while memory stays bounded.
+        A folder's sync watermark advances once all its messages have been consumed.
+        `folders` restricts the scan to a subset of the configured folders; `decode=False`
+        is iter_raw_messages().
+        """
+        if run_id:
+            logger.info("Going to fetch messages [run_id=%s]", run_id)
+        else:
+            logger.info("Going to fetch messages")
+        self.stats.clear()
+        if self.cache:
+            self.cache.reset_stats()
+        pool = ImapConnectionPool(self._connect, self.max_connections)
+        executor = None
+        try:
+            try:
+                pool.open()
+            except Exception:
+                return
+            cutoff = (datetime.now() - timedelta(weeks=self.lookback)).strftime("%d-%b-%Y")
+            executor = ThreadPoolExecutor(max_workers=self.max_connections, thread_name_prefix="imap")
+            wanted = [f for f in self.folders if folders is None or f in folders]
+            scans = [s for s in executor.map(lambda f: self._scan_folder(pool, f, cutoff), wanted) if s]
+            if self.dedup:
+                known = self._known_message_ids
+                self._drop_duplicates(scans, set(known) if known is not None else set())
+                if known is not None:
+                    self._remember_message_ids(scans)
+            plan = iter([
+                (scan, chunk, chunk is slices[-1])
+                for scan in scans
+                for slices in [self._slices(scan.fetch_uids)]
+                for chunk in slices
+            ])
+            for scan in scans:
+                if not scan.fetch_uids:
+                    self._advance_watermark(scan)
+            # keep a bounded window of slices in flight ahead of the consumer
+            pending: deque = deque()
+            window = self.max_connections + 1
+            while True:
+                while len(pending) < window:
+                    job = next(plan, None)
+                    if job is None:
+                        break
+                    scan, chunk, last = job
+                    pending.append((scan, last, executor.submit(self._fetch_slice, pool, scan, chunk, decode)))
+                if not pending:
+                    break
+                scan, last, future = pending.popleft()
+                messages, failed = future.result()
+                scan.failed.extend(failed)
+                yield from messages
+                if last:
+                    self._advance_watermark(scan)
         except Exception as e:
             logger.error("Unexpected error during IMAP fetch: %s", e)
         finally:
-            if mail is not None:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+            pool.close()
+            if self.state:
                 try:
-                    mail.logout()
+                    self.state.save()
                 except Exception as e:
-                    logger.warning("IMAP logout failed: %s", e)
-        if run_id:
-            logger.debug("Finished fetching messages [run_id=%s]", run_id)
-        else:
-            logger.debug("Finished fetching messages")
-        return msgs
+                    logger.error("Could not save IMAP sync state: %s", e)
+            if self.cache:
+                self._finish_cache()
+            if self.stats:
+                logger.info("IMAP fetch stats: %s", dict(self.stats))
+            if run_id:
+                logger.debug("Finished fetching messages [run_id=%s]", run_id)
+            else:
+                logger.debug("Finished fetching messages")
+
+    def iter_raw_messages(self, run_id: str | None = None) -> Iterator[FetchedMessage]:
+        return self.iter_messages(run_id, decode=False)
+
+    def watch_messages(self, run_id: str | None = None, stop: threading.Event | None = None) -> Iterator[FetchedMessage]:
+        """
+        Yield all messages like iter_messages(), then keep one IDLE connection per folder
+        open and yield new messages within seconds of their arrival, until `stop` is set
+        (or the consumer closes the generator). Each notification runs an incremental
+        sync of the changed folders; without `incremental` the watermarks are kept in memory.
+        """
+        stop = stop or threading.Event()
+        if self.state is None:
+            self.state = SyncState(None)
+        self._known_message_ids = OrderedDict()
+        watcher = ImapIdleWatcher(
+            lambda: self._connect(idle=True),
+            self.folders,
+            renew_seconds=self.idle_cfg.get("renew_seconds", 540),
+            poll_seconds=self.idle_cfg.get("poll_seconds", 60),
+            reconnect_delay=self.idle_cfg.get("reconnect_delay", 5),
+            max_reconnect_delay=self.idle_cfg.get("max_reconnect_delay", 300),
+        )
+        # watch before the initial sync, so nothing delivered during it is missed
+        watcher.start()
+        logger.info("Going to watch folders %s for new mail", ", ".join(self.folders))
+        try:
+            yield from self.iter_messages(run_id)
+            self.full_sync = False
+            while not stop.is_set():
+                changed = watcher.wait(timeout=1.0)
+                if changed:
+                    t0 = time.monotonic()
+                    n = 0
+                    for message in self.iter_messages(run_id, folders=sorted(changed)):
+                        n += 1
+                        yield message
+                    logger.info("Synced %d new message(s) from %s in %.2fs", n, ", ".join(sorted(changed)), time.monotonic() - t0)
+        finally:
+            watcher.stop()
+            logger.info("Finished watching folders (IDLE stats: %s)", dict(watcher.stats))
+
+
+@dataclass
+class _FolderScan:
+    folder: str
+    uidvalidity: int | None
+    last_uid: int | None
+    uids: list[int]
+    failed: list[int] = field(default_factory=list)
+    message_ids: dict[int, tuple[str, int]] = field(default_factory=dict)
+    duplicates: set[int] = field(default_factory=set)
+
+    @property
+    def fetch_uids(self) -> list[int]:
+        return [u for u in self.uids if u not in self.duplicates]
+
+
+class ImapConnectionPool:
+    """
+    Up to `size` authenticated IMAP connections shared by worker threads.
+    Connections are opened on demand, handed to one thread at a time and remember
+    which folder they have selected, so repeated work on a folder skips the SELECT.
+    """
+    def __init__(self, connect: Callable[[], imaplib.IMAP4], size: int = 1):
+        self._connect = connect
+        self.size = max(1, size)
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._open: list[imaplib.IMAP4] = []
+        self._reserved = 0
+        self._selected: dict[int, tuple[str, int | None]] = {}
+
+    def open(self) -> None:
+        """Open the first connection eagerly so bad credentials fail once, not per folder."""
+        with self.connection():
+            pass
+
+    def _acquire(self):
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                can_open = self._reserved < self.size
+                if can_open:
+                    self._reserved += 1
+            if can_open:
+                try:
+                    mail = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._reserved -= 1
+                    raise
+                with self._lock:
+                    self._open.append(mail)
+                return mail
+            try:
+                return self._idle.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+    @contextmanager
+    def connection(self):
+        mail = self._acquire()
+        broken = False
+        try:
+            yield mail
+        except (imaplib.IMAP4.abort, OSError):
+            broken = True
+            raise
+        finally:
+            if broken:
+                # connection is unusable; drop it so a replacement can be opened
+                with self._lock:
+                    self._open.remove(mail)
+                    self._reserved -= 1
+                    self._selected.pop(id(mail), None)
+                try:
+                    mail.shutdown()  # close the socket now, not when the object is collected
+                except Exception as e:
+                    logger.debug("Error closing dropped IMAP connection: %s", e)
+            else:
+                self._idle.put(mail)
+
+    def select(self, mail, folder: str) -> int | None:
+        """Select `folder` read-only on `mail` unless already selected; returns its UIDVALIDITY."""
+        current = self._selected.get(id(mail))
+        if current and current[0] == folder:
+            return current[1]
+        status, _ = mail.select(f'"{folder}"', readonly=True)
+        if status != "OK":
+            raise imaplib.IMAP4.error(f"Could not select folder '{folder}': {status}")
+        uidvalidity = ImapEmailClient._uidvalidity(mail)
+        self._selected[id(mail)] = (folder, uidvalidity)
+        return uidvalidity
+
+    def close(self) -> None:
+        with self._lock:
+            conns, self._open = self._open, []
+        for mail in conns:
+            try:
+                mail.logout()
+            except Exception as e:
+                logger.warning("IMAP logout failed: %s", e)
@@ -0,0 +1,185 @@
+# dhl_rerouter_poc/imap_idle.py
+"""
+IMAP IDLE (RFC 2177) push notifications for the watch mode.
+"""
+import imaplib
+import re
+import select
+import threading
+import time
+from collections import Counter
+from typing import Callable
+
+import logging
+logger = logging.getLogger(__name__)
+
+_EXISTS = re.compile(rb"^\* \d+ EXISTS\b", re.IGNORECASE)
+_POLL = 0.25  # how often an idling thread checks for stop() (seconds)
+
+
+class _UnbufferedMixin:
+    """
+    Read the socket without a userspace buffer, so select() on the socket sees every
+    pending byte. Only used for the long-lived IDLE connections (a few short lines).
+    """
+    def open(self, host, port, timeout=None):
+        super().open(host, port, timeout)
+        self.file = self.sock.makefile("rb", buffering=0)
+
+
+class IdleIMAP4(_UnbufferedMixin, imaplib.IMAP4):
+    pass
+
+
+class IdleIMAP4_SSL(_UnbufferedMixin, imaplib.IMAP4_SSL):
+    pass
+
+
+class ImapIdleWatcher:
+    """
+    Keep one connection per folder in IDLE and record which folders received new mail.
+
+    IDLE is re-issued every `renew_seconds`, before servers end it (RFC 2177 allows
+    29 minutes, some providers cut earlier). Dropped connections are reopened with
+    exponential backoff from `reconnect_delay` up to `max_reconnect_delay`, and the folder
+    is reported as changed afterwards so messages that arrived meanwhile are picked up.
+    Servers without the IDLE capability are polled with NOOP every `poll_seconds`.
+    """
+    def __init__(
+        self,
+        connect: Callable[[], imaplib.IMAP4],
+        folders: list[str],
+        renew_seconds: float = 540,
+        poll_seconds: float = 60,
+        reconnect_delay: float = 5,
+        max_reconnect_delay: float = 300,
+    ):
+        self._connect = connect
+        self.folders = list(folders)
+        self.renew_seconds = renew_seconds
+        self.poll_seconds = poll_seconds
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.stats: Counter = Counter()
+        self._stop = threading.Event()
+        self._changed: set[str] = set()
+        self._cond = threading.Condition()
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        self._stop.clear()
+        for folder in self.folders:
+            t = threading.Thread(target=self._watch_folder, args=(folder,), name=f"imap-idle-{folder}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        for t in self._threads:
+            t.join(timeout=10)
+        self._threads = []
+
+    def wait(self, timeout: float | None = None) -> set[str]:
+        """Block until a folder reports new mail (or timeout/stop); return and reset the changed folders."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._changed or self._stop.is_set(), timeout)
+            changed, self._changed = self._changed, set()
+        return changed
+
+    def _notify(self, folder: str) -> None:
+        with self._cond:
+            self.stats["notifications"] += 1
+            self._changed.add(folder)
+            self._cond.notify_all()
+
+    def _watch_folder(self, folder: str) -> None:
+        delay = self.reconnect_delay
+        connected_before = False
+        while not self._stop.is_set():
+            mail = None
+            try:
+                mail = self._connect()
+                status, _ = mail.select(f'"{folder}"', readonly=True)
+                if status != "OK":
+                    raise imaplib.IMAP4.error(f"Could not select folder '{folder}': {status}")
+                mail.response("EXISTS")  # discard the SELECT count
+                if connected_before:
+                    self.stats["reconnects"] += 1
+                    logger.info("IDLE connection for folder '%s' restored", folder)
+                    self._notify(folder)  # catch up on mail delivered while disconnected
+                connected_before = True
+                delay = self.reconnect_delay
+                if "IDLE" in mail.capabilities:
+                    self._idle_loop(mail, folder)
+                else:
+                    logger.info("Server does not support IDLE; polling folder '%s' every %ss", folder, self.poll_seconds)
+                    self._poll_loop(mail, folder)
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                logger.warning("IDLE connection for folder '%s' failed: %s; reconnecting in %ss", folder, e, delay)
+                self._stop.wait(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+            finally:
+                if mail is not None:
+                    try:
+                        mail.logout()
+                    except Exception:
+                        pass
+
+    @staticmethod
+    def _readline(mail) -> bytes:
+        line = mail.readline()
+        if not line:
+            raise imaplib.IMAP4.abort("connection closed by server")
+        return line
+
+    @staticmethod
+    def _readable(mail) -> bool:
+        pending = getattr(mail.sock, "pending", None)  # decrypted bytes held by the SSL layer
+        if pending and pending():
+            return True
+        ready, _, _ = select.select([mail.sock], [], [], _POLL)
+        return bool(ready)
+
+    def _idle_loop(self, mail, folder: str) -> None:
+        while not self._stop.is_set():
+            tag = mail._new_tag()
+            mail.tagged_commands.pop(tag, None)  # the response is read here, not by imaplib
+            mail.send(tag + b" IDLE\r\n")
+            while True:
+                line = self._readline(mail)
+                if line.startswith(b"+"):
+                    break
+                if line.startswith(tag):
+                    raise imaplib.IMAP4.error(f"IDLE rejected: {line.decode(errors='replace').strip()}")
+                if _EXISTS.match(line):
+                    self._notify(folder)
+            self.stats["idle"] += 1
+            logger.debug("Folder '%s' is idling", folder)
+            deadline = time.monotonic() + self.renew_seconds
+            while not self._stop.is_set() and time.monotonic() < deadline:
+                if not self._readable(mail):
+                    continue
+                line = self._readline(mail)
+                if _EXISTS.match(line):
+                    logger.info("New mail in folder '%s'", folder)
+                    self._notify(folder)
+                elif line.startswith(b"* BYE"):
+                    raise imaplib.IMAP4.abort(line.decode(errors="replace").strip())
+            mail.send(b"DONE\r\n")
+            while True:
+                line = self._readline(mail)
+                if line.startswith(tag):
+                    break
+                if _EXISTS.match(line):
+                    self._notify(folder)
+
+    def _poll_loop(self, mail, folder: str) -> None:
+        while not self._stop.wait(self.poll_seconds):
+            mail.noop()
+            _, data = mail.response("EXISTS")
+            if data and data[0] is not None:
+                self._notify(folder)
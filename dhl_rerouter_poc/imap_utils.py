@@ -0,0 +1,182 @@
+# dhl_rerouter_poc/imap_utils.py
+"""
+Helpers for building IMAP commands and parsing imaplib FETCH responses.
+"""
+import base64
+import binascii
+import quopri
+import re
+
+_FETCH_START = re.compile(rb"^\d+ \(")
+_FETCH_UID = re.compile(rb"UID (\d+)")
+_LITERAL_KEY = re.compile(rb"((?:BODY|BINARY)\[[^\]]*\](?:<\d+>)?|RFC822(?:\.HEADER|\.TEXT)?) \{\d+\}$")
+_LITERAL_MARK = re.compile(rb"\{\d+\}$")
+
+
+def uid_set(uids: list[int]) -> str:
+    """Compress UIDs into an IMAP sequence set, e.g. [1, 2, 3, 7] → '1:3,7'."""
+    ranges: list[str] = []
+    start = prev = None
+    for uid in sorted(uids):
+        if prev is not None and uid == prev + 1:
+            prev = uid
+            continue
+        if start is not None:
+            ranges.append(f"{start}:{prev}" if start != prev else str(start))
+        start = prev = uid
+    if start is not None:
+        ranges.append(f"{start}:{prev}" if start != prev else str(start))
+    return ",".join(ranges)
+
+
+def search_string(value: str) -> str:
+    """Quote a SEARCH string argument."""
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def search_or(terms: list[str]) -> str:
+    """Combine SEARCH keys with the binary OR operator: [a, b, c] → 'OR a OR b c'."""
+    if len(terms) == 1:
+        return terms[0]
+    return f"OR {terms[0]} {search_or(terms[1:])}"
+
+
+def _quote(data: bytes) -> bytes:
+    return b'"' + data.replace(b"\\", b"\\\\").replace(b'"', b'\\"') + b'"'
+
+
+def iter_fetch_response(data: list):
+    """
+    Group an imaplib FETCH response into (uid, {item: literal}, text) per message.
+    imaplib splits each message into (prefix, literal) tuples plus trailing bytes;
+    a new message starts with '<seq> ('. Section data (BODY[...], RFC822) is returned
+    in the dict; literals inside structures such as BODYSTRUCTURE are inlined into
+    `text` as quoted strings.
+    """
+    literals: dict[bytes, bytes] = {}
+    text = b""
+
+    def done():
+        m = _FETCH_UID.search(text)
+        return (int(m.group(1)) if m else None), literals, text
+
+    for item in data:
+        if item is None:
+            continue
+        prefix, literal = item if isinstance(item, tuple) else (item, None)
+        if _FETCH_START.match(prefix):
+            if text:
+                yield done()
+            literals, text = {}, b""
+        if literal is None:
+            text += prefix
+            continue
+        m = _LITERAL_KEY.search(prefix)
+        if m:
+            text += prefix
+            literals[m.group(1)] = literal
+        else:
+            text += _LITERAL_MARK.sub(b"", prefix) + _quote(literal)
+    if text:
+        yield done()
+
+
+def parse_list(text: bytes, start: int = 0):
+    """
+    Parse one IMAP parenthesized list starting at text[start] == '('.
+    Returns (value, end) where atoms are str, NIL is None and lists are Python lists.
+    """
+    stack: list[list] = []
+    i, n = start, len(text)
+    while i < n:
+        c = text[i:i + 1]
+        if c == b"(":
+            stack.append([])
+            i += 1
+        elif c == b")":
+            done = stack.pop()
+            i += 1
+            if not stack:
+                return done, i
+            stack[-1].append(done)
+        elif c == b" ":
+            i += 1
+        elif c == b'"':
+            i += 1
+            buf = bytearray()
+            while i < n and text[i:i + 1] != b'"':
+                if text[i:i + 1] == b"\\":
+                    i += 1
+                buf += text[i:i + 1]
+                i += 1
+            i += 1
+            stack[-1].append(buf.decode("utf-8", "replace"))
+        else:
+            j = i
+            while j < n and text[j:j + 1] not in (b" ", b"(", b")"):
+                j += 1
+            atom = text[i:j].decode("utf-8", "replace")
+            stack[-1].append(None if atom.upper() == "NIL" else atom)
+            i = j
+    raise ValueError("unterminated IMAP list")
+
+
+def fetch_item(text: bytes, name: bytes):
+    """Return the parsed parenthesized value of FETCH item `name` (e.g. b'BODYSTRUCTURE') or None."""
+    pos = text.find(name + b" (")
+    if pos < 0:
+        return None
+    value, _ = parse_list(text, pos + len(name) + 1)
+    return value
+
+
+def fetch_item_int(text: bytes, name: bytes) -> int | None:
+    """Return the numeric value of FETCH item `name` (e.g. b'RFC822.SIZE') or None."""
+    m = re.search(re.escape(name) + rb" (\d+)", text)
+    return int(m.group(1)) if m else None
+
+
+def text_parts(structure: list, section: str | None = None) -> list[tuple[str, str, str, str]]:
+    """
+    Walk a parsed BODYSTRUCTURE and return (section, subtype, charset, encoding)
+    for every text/plain and text/html part, in the same order as Message.walk(); a part
+    without a type counts as text/plain. Encapsulated message/rfc822 parts are descended into.
+    """
+    if isinstance(structure[0], list):
+        found = []
+        # child parts come first; the subtype and extension data follow them
+        for i, child in enumerate(structure):
+            if not isinstance(child, list):
+                break
+            found += text_parts(child, f"{section}.{i + 1}" if section else str(i + 1))
+        return found
+    # a part without a Content-Type is text/plain (RFC 2045); servers should say so, some send NIL
+    maintype = (structure[0] or "text").lower()
+    subtype = (structure[1] or ("plain" if not structure[0] else "")).lower()
+    if maintype == "message" and subtype == "rfc822" and len(structure) > 8 and isinstance(structure[8], list):
+        inner = structure[8]
+        sec = section or "1"
+        return text_parts(inner, sec if isinstance(inner[0], list) else f"{sec}.1")
+    if maintype != "text" or subtype not in ("plain", "html"):
+        return []
+    params = structure[2] or []
+    charset = "utf-8"
+    for key, value in zip(params[::2], params[1::2]):
+        if (key or "").lower() == "charset" and value:
+            charset = value
+    encoding = (structure[5] or "7bit").lower()
+    return [(section or "1", subtype, charset, encoding)]
+
+
+def decode_transfer_encoding(data: bytes, encoding: str) -> bytes:
+    """Undo a Content-Transfer-Encoding; tolerates payloads truncated by a partial fetch."""
+    if encoding == "base64":
+        compact = re.sub(rb"[^A-Za-z0-9+/=]", b"", data)
+        compact = compact[: len(compact) - len(compact) % 4]
+        try:
+            return base64.b64decode(compact)
+        except binascii.Error:
+            return b""
+    if encoding == "quoted-printable":
+        return quopri.decodestring(data)
+    return data
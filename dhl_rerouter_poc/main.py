@@ -4,12 +4,18 @@ import argparse
 from .logging_utils import debug_log_model
 import logging
 from .email_client        import ImapEmailClient
-from .parser              import extract_tracking_codes
+from .sources             import build_source
+from .parser              import TrackingMatcher
+from .parse_pool          import ParsePool
+from .checksums           import validators_for
 from .calendar_checker    import should_reroute
 from dhl_rerouter_poc.carriers.base import CarrierBase
 from dhl_rerouter_poc.carriers.dhl import DHLCarrier
+from .browser_pool        import BrowserPool
+from .driver_cache        import DriverCache
+from .check_pool          import CheckPool
 import logging
-from .config              import load_config
+from .config              import load_config, resolve_path
 from .workflow_data_model import (
     ShipmentLifecycle,
     TransportProviderInfo,
@@ -29,13 +35,14 @@ def reroute_shipment(
     custom_location: str,
     highlight_only: bool = True,
     selenium_headless: bool = False,
-    timeout: int = 20
+    timeout: int = 20,
+    handler: CarrierBase | None = None
 ) -> bool:
     """
     Backward-compatible wrapper for reroute_shipment, for test mocking and legacy code.
-    Currently delegates to DHLCarrier. Update to support other carriers if needed.
+    Delegates to `handler` (e.g. the run's pooled carrier), by default a new DHLCarrier.
     """
-    handler = DHLCarrier()
+    handler = handler or DHLCarrier()
     return handler.reroute_shipment(
         tracking_number,
         zip_code,
@@ -45,6 +52,123 @@ def reroute_shipment(
         timeout
     )
 
+def _reroute_decision(shipment: ShipmentLifecycle, info, code: str, highlight_only: bool, config: dict) -> bool:
+    """
+    Record the carrier's tracking result on `shipment` and decide whether to reroute:
+    a delivery date must be known, the calendar must say the recipient is away and the
+    carrier must offer reroute options. Called by CarrierBase.check_and_reroute().
+    """
+    logger = logging.getLogger(__name__)
+    shipment.tracking = ShipmentTrackingInfo(
+        status=info.data.get("delivery_status") or "unknown",  # None when the page gave no status
+        delivered=info.data.get("delivered", False),
+        delivery_date=info.data.get("delivery_date"),
+        delivery_status=info.data.get("delivery_status"),
+        delivery_options=info.data.get("delivery_options", []),
+        shipment_history=info.data.get("shipment_history", []),
+        custom_dropoff_input_present=info.data.get("custom_dropoff_input_present", False),
+        protocol={"errors": info.errors},
+        last_checked=None,
+        status_code=None,
+    )
+    debug_log_model(shipment, "after tracking")
+    date_iso = shipment.tracking.delivery_date
+    opts     = shipment.tracking.delivery_options
+    errors   = shipment.tracking.protocol.get("errors", [])
+
+    if errors:
+        logger.warning(f"  ⚠️ encountered errors: {errors}")
+
+    # --- Calendar-based decision ---
+    if not date_iso:
+        logger.info("  → no delivery_date parsed; skipping calendar check")
+        return False
+    logger.info(f"  → checking calendar for delivery_date={date_iso}")
+    should = should_reroute(code, date_iso, config)
+    shipment.recipient_availability = RecipientAvailability(
+        delivery_date=date_iso,
+        is_away=not should,
+        overlapping_absences=[],  # Could be filled by should_reroute in future
+        sources_checked=[],
+    )
+    debug_log_model(shipment, "after calendar check")
+    logger.info(f"  → should_reroute returned {should}")
+    if not should:
+        logger.info(f"  → skipped by calendar (delivery_date={date_iso})")
+        return False
+
+    # --- Availability check ---
+    if not opts:
+        logger.info("  → no reroute options available")
+        return False
+    logger.info(f"  → available options: {opts}")
+    logger.info(f"  → performing reroute (highlight_only={highlight_only})")
+    return True
+
+def _check_shipments(handler: CarrierBase, shipments: list[ShipmentLifecycle], settings: dict, config: dict) -> None:
+    """
+    Check a batch of one carrier's shipments and reroute those _reroute_decision() selects.
+    A single shipment is checked and rerouted in one carrier session (check_and_reroute);
+    larger batches are looked up together (check_many) and rerouted one by one.
+    """
+    logger = logging.getLogger(__name__)
+    s = settings
+    outcomes: list[tuple[ShipmentLifecycle, bool | None]] = []
+    if len(shipments) == 1:
+        shipment = shipments[0]
+        code = shipment.provider.tracking_number
+        # --- Tracking info, calendar decision and reroute in one carrier session ---
+        _, success = handler.check_and_reroute(
+            code,
+            s["zip_code"],
+            s["custom_location"],
+            lambda info: _reroute_decision(shipment, info, code, s["highlight_only"], config),
+            highlight_only=s["highlight_only"],
+            selenium_headless=s["selenium_headless"],
+            timeout=s["timeout"],
+        )
+        outcomes.append((shipment, success))
+    else:
+        infos = handler.check_many(
+            [shipment.provider.tracking_number for shipment in shipments],
+            s["zip_code"],
+            timeout=s["timeout"],
+            selenium_headless=s["selenium_headless"],
+        )
+        for shipment in shipments:
+            code = shipment.provider.tracking_number
+            logger.info("Tracking result for %s:", code)
+            success = None
+            if _reroute_decision(shipment, infos[code], code, s["highlight_only"], config):
+                success = reroute_shipment(
+                    code,
+                    s["zip_code"],
+                    s["custom_location"],
+                    s["highlight_only"],
+                    s["selenium_headless"],
+                    s["timeout"],
+                    handler=handler,
+                )
+            outcomes.append((shipment, success))
+    for shipment, success in outcomes:
+        if success is None:
+            continue
+        shipment.intervention = DeliveryInterventionResult(
+            attempted=True,
+            success=success,
+            error=None if success else "reroute failed",
+            timestamp=None,
+            attempts=1,
+            status_code=200 if success else 500,
+            detail=None,
+        )
+        debug_log_model(shipment, "after intervention")
+        logger.info(f"  → reroute {'✅' if success else '❌'}")
+        logger.debug(
+            f"Finished processing tracking code: %s (carrier: %s) [run_id=%s]",
+            shipment.provider.tracking_number, shipment.provider.name, shipment.run_id,
+        )
+
 def run(
     weeks: int | None = None,
     zip_code: str | None = None,
@@ -52,12 +176,17 @@ def run(
     highlight_only: bool = True,
     selenium_headless: bool = False,
     timeout: int = 20,
-    config: dict | None = None
+    config: dict | None = None,
+    full_sync: bool = False,
+    watch: bool = False
 ) -> None:
-    client = ImapEmailClient(config["email"])
-    if weeks:
-        client.lookback = weeks
-    bodies = client.fetch_messages()
+    source = build_source(config["email"], config.get("tracking_patterns"))
+    if isinstance(source, ImapEmailClient):
+        if weeks:
+            source.lookback = weeks
+        source.full_sync = full_sync
+    elif watch:
+        raise ValueError("--watch requires the IMAP source (email.source: imap)")
 
     seen: set[str] = set()
     carrier_registry: dict[str, type[CarrierBase]] = {
@@ -66,117 +195,142 @@ def run(
     }
     logger = logging.getLogger(__name__)
     carrier_configs: dict = config.get("carrier_configs", {})
-    for body in bodies:
-        codes = extract_tracking_codes(body, config["tracking_patterns"])
-        for code, carrier in sorted(codes.items()):
-            if code in seen:
-                continue
-            seen.add(code)
-            logger.info(f"Going to process tracking code: %s (carrier: %s)", code, carrier)
-            # --- Build ShipmentLifecycle context ---
-
-            # --- Build ShipmentLifecycle context ---
-            shipment = ShipmentLifecycle(
-                provider=TransportProviderInfo(name=carrier, tracking_number=code),
-                notification=ConsignmentNotification(
-                    normalized_body=body[:4096],
-                    body_truncated=len(body) > 4096,
-                    # Optionally fill subject/sender/received_at if available from client
-                ),
-            )
-            debug_log_model(shipment, "after init")
-
-            # skip unsupported carriers (model-driven + registry)
-            carrier_cls = carrier_registry.get(carrier)
-            if not shipment.provider.is_supported() or not carrier_cls:
-                logger.info("  → skipping unsupported carrier: %s", carrier)
-                continue
-            carrier_handler: CarrierBase = carrier_cls()
-
-            # --- Carrier config merge ---
-            carrier_cfg = carrier_configs.get(carrier, {})
-            carrier_zip = zip_code or carrier_cfg.get("zip")
-            carrier_location = custom_location or carrier_cfg.get("reroute_location")
-            carrier_highlight = highlight_only if highlight_only is not None else carrier_cfg.get("highlight_only", True)
-            carrier_headless = selenium_headless if selenium_headless is not None else carrier_cfg.get("selenium_headless", True)
-            carrier_timeout = timeout if timeout is not None else carrier_cfg.get("timeout", 20)
-
-            # --- Tracking info (via handler) ---
-            info = carrier_handler.check_reroute_availability(
-                code,
-                carrier_zip,
-                timeout=carrier_timeout,
-                selenium_headless=carrier_headless
-            )
-            shipment.tracking = ShipmentTrackingInfo(
-                status=info.data.get("delivery_status", "unknown"),
-                delivered=info.data.get("delivered", False),
-                delivery_date=info.data.get("delivery_date"),
-                delivery_status=info.data.get("delivery_status"),
-                delivery_options=info.data.get("delivery_options", []),
-                shipment_history=info.data.get("shipment_history", []),
-                custom_dropoff_input_present=info.data.get("custom_dropoff_input_present", False),
-                protocol={"errors": info.errors},
-                last_checked=None,
-                status_code=None,
-            )
-            debug_log_model(shipment, "after tracking")
-            date_iso = shipment.tracking.delivery_date
-            opts     = shipment.tracking.delivery_options
-            errors   = shipment.tracking.protocol.get("errors", [])
-
-            if errors:
-                logger.warning(f"  ⚠️ encountered errors: {errors}")
-
-            # --- Calendar-based decision ---
-            if not date_iso:
-                logger.info("  → no delivery_date parsed; skipping calendar check")
-                continue
-            logger.info(f"  → checking calendar for delivery_date={date_iso}")
-            should = should_reroute(code, date_iso, config)
-            shipment.recipient_availability = RecipientAvailability(
-                delivery_date=date_iso,
-                is_away=not should,
-                overlapping_absences=[],  # Could be filled by should_reroute in future
-                sources_checked=[],
-            )
-            debug_log_model(shipment, "after calendar check")
-            logger.info(f"  → should_reroute returned {should}")
-            if not should:
-                logger.info(f"  → skipped by calendar (delivery_date={date_iso})")
-                continue
-
-            # --- Availability check ---
-            if not opts:
-                logger.info("  → no reroute options available")
-                continue
-            logger.info(f"  → available options: {opts}")
-
-            # --- Execute reroute (via handler) ---
-            logger.info(f"  → performing reroute (highlight_only={carrier_highlight})")
-            # Use main.reroute_shipment wrapper to allow test patching
-            from dhl_rerouter_poc import main as main_mod
-            success = main_mod.reroute_shipment(
-                code, carrier_zip, carrier_location,
-                carrier_highlight,
-                selenium_headless,
-                timeout
-            )
-            shipment.intervention = DeliveryInterventionResult(
-                attempted=True,
-                success=success,
-                error=None if success else "reroute failed",
-                timestamp=None,
-                attempts=1,
-                status_code=200 if success else 500,
-                detail=None,
-            )
-            debug_log_model(shipment, "after intervention")
-            logger.info(f"  → reroute {'✅' if success else '❌'}")
-            logger.debug(f"Finished processing tracking code: %s (carrier: %s) [run_id=%s]", code, carrier, shipment.run_id)
+    # candidates failing a carrier check digit never reach the (browser-based) carrier layer
+    matcher = TrackingMatcher(config["tracking_patterns"], validators_for(config))
+    # messages are streamed: tracking checks start while later folders are still downloading;
+    # in watch mode new mail keeps arriving via IMAP IDLE until interrupted
+    parse_cfg = config.get("parse") or {}
+    parse_pool = None
+    if watch:
+        messages = ((m, matcher.extract(m.body)) for m in source.watch_messages())
+    elif int(parse_cfg.get("workers", 1)) != 1:
+        # backfills: decoding and extraction fan out to worker processes
+        parse_pool = ParsePool(
+            config["tracking_patterns"],
+            validators_for(config),
+            workers=int(parse_cfg.get("workers", 1)),
+            chunk_size=int(parse_cfg.get("chunk_size", 64)),
+            min_messages=int(parse_cfg.get("min_messages", 256)),
+            html_parser=config["email"].get("html_parser", "stream"),
+            byte_prefilter=config["email"].get("byte_prefilter", True),
+        )
+        messages = parse_pool.map(source.iter_raw_messages())
+    else:
+        messages = ((m, matcher.extract(m.body)) for m in source.iter_messages())
+    handlers: dict[str, CarrierBase] = {}
+    browser_pools: dict[str, BrowserPool] = {}
+    driver_caches: dict[str, DriverCache] = {}  # by cache directory, shared by carriers using the same one
+    settings: dict[str, dict] = {}
+    # codes are collected per carrier and checked in batches of carriers.<name>.batch_size;
+    # with checks.workers > 1 batches are checked concurrently while mail is still being read
+    pending: dict[str, list[ShipmentLifecycle]] = {}
+    check_pool = CheckPool(workers=int((config.get("checks") or {}).get("workers", 1)))
+
+    def flush(carrier: str) -> None:
+        check_pool.submit(
+            carrier,
+            settings[carrier]["max_concurrent"],
+            _check_shipments,
+            handlers[carrier],
+            pending.pop(carrier),
+            settings[carrier],
+            config,
+        )
+
+    try:
+        for message, codes in messages:
+            body = message.body
+            for code, carrier in sorted(codes.items()):
+                if code in seen:
+                    continue
+                seen.add(code)
+                logger.info(f"Going to process tracking code: %s (carrier: %s)", code, carrier)
+                # --- Build ShipmentLifecycle context ---
+                shipment = ShipmentLifecycle(
+                    provider=TransportProviderInfo(name=carrier, tracking_number=code),
+                    notification=ConsignmentNotification(
+                        normalized_body=body[:4096],
+                        body_truncated=len(body) > 4096,
+                        subject=message.subject,
+                        sender=message.sender,
+                        received_at=message.date,
+                        message_id=message.message_id,
+                        source=config["email"].get("source", "imap"),
+                    ),
+                )
+                debug_log_model(shipment, "after init")
+
+                # skip unsupported carriers (model-driven + registry)
+                carrier_cls = carrier_registry.get(carrier)
+                if not shipment.provider.is_supported() or not carrier_cls:
+                    logger.info("  → skipping unsupported carrier: %s", carrier)
+                    continue
+
+                # one handler per carrier; its warm browsers serve all checks and reroutes of the run
+                if carrier not in handlers:
+                    # --- Carrier config merge ---
+                    carrier_cfg = carrier_configs.get(carrier, {})
+                    carrier_timeout = timeout if timeout is not None else carrier_cfg.get("timeout", 20)
+                    settings[carrier] = {
+                        "zip_code": zip_code or carrier_cfg.get("zip"),
+                        "custom_location": custom_location or carrier_cfg.get("reroute_location"),
+                        "highlight_only": highlight_only if highlight_only is not None else carrier_cfg.get("highlight_only", True),
+                        "selenium_headless": selenium_headless if selenium_headless is not None else carrier_cfg.get("selenium_headless", True),
+                        "timeout": carrier_timeout,
+                        "batch_size": max(1, int(carrier_cfg.get("batch_size", 1))),
+                        "max_concurrent": max(1, int(carrier_cfg.get("max_concurrent", 2))),
+                    }
+                    pool_cfg = carrier_cfg.get("browser_pool") or {}
+                    cache_dir = pool_cfg.get("driver_cache", ".chrome_driver_cache")
+                    driver_cache = None
+                    if cache_dir:
+                        cache_dir = str(resolve_path(cache_dir))
+                        driver_cache = driver_caches.setdefault(cache_dir, DriverCache(cache_dir))
+                    browser_pools[carrier] = BrowserPool(
+                        headless=settings[carrier]["selenium_headless"],
+                        # one Chrome per concurrent check
+                        size=int(pool_cfg.get("size", min(check_pool.workers, settings[carrier]["max_concurrent"]))),
+                        max_uses=int(pool_cfg.get("max_uses", 25)),
+                        driver_cache=driver_cache,
+                    )
+                    handlers[carrier] = carrier_cls(
+                        cfg={**carrier_cfg, "timeout": carrier_timeout},
+                        browser_pool=browser_pools[carrier],
+                    )
+
+                batch = pending.setdefault(carrier, [])
+                batch.append(shipment)
+                if len(batch) >= settings[carrier]["batch_size"]:
+                    flush(carrier)
+            if watch:
+                # new mail is checked as it arrives, not when a batch is full
+                for carrier in list(pending):
+                    flush(carrier)
+        for carrier in list(pending):
+            flush(carrier)
+        check_pool.join()
+    finally:
+        check_pool.close()
+        for carrier_handler in handlers.values():
+            carrier_handler.close()
+        for browser_pool in browser_pools.values():
+            browser_pool.close()
+        for driver_cache in driver_caches.values():
+            driver_cache.log_stats()
+    rejected = parse_pool.rejected if parse_pool else matcher.rejected
+    if rejected:
+        logger.info(
+            "Dropped %d tracking code candidate(s) with invalid check digits: %s",
+            sum(rejected.values()), dict(rejected),
+        )
 
 def main():
-    config = load_config()
+    # --mbox/--maildir replace IMAP, so they are looked at before the config demands credentials
+    pre = argparse.ArgumentParser(add_help=False)
+    pre.add_argument("--mbox")
+    pre.add_argument("--maildir")
+    local, _ = pre.parse_known_args()
+    config = load_config(require_credentials=not (local.mbox or local.maildir))
     weeks_default = config.get("email", {}).get("lookback_weeks")
     carrier_configs = config.get("carrier_configs", {})
     dhl_cfg = carrier_configs.get("DHL", {})
@@ -216,7 +370,22 @@ def main():
     p.add_argument(
         "--timeout", type=int, help=f"Timeout for Selenium waits (overrides config) [default: {timeout_default}]"
     )
+    p.add_argument(
+        "--full-sync", action="store_true", help="Ignore stored IMAP sync watermarks and rescan the whole lookback period"
+    )
+    p.add_argument(
+        "--watch", action="store_true", help="Keep running and process new mail as it arrives (IMAP IDLE)"
+    )
+    p.add_argument(
+        "--mbox", metavar="PATH", help="Read messages from a local mbox file instead of IMAP"
+    )
+    p.add_argument(
+        "--maildir", metavar="PATH", help="Read messages from a local Maildir directory instead of IMAP"
+    )
     args = p.parse_args()
+    if args.mbox or args.maildir:
+        config["email"]["source"] = "mbox" if args.mbox else "maildir"
+        config["email"]["source_path"] = args.mbox or args.maildir
     # CLI always takes precedence if explicitly set
     highlight_only = args.highlight_only if 'highlight_only' in args else highlight_default
     selenium_headless = args.selenium_headless if 'selenium_headless' in args else selenium_headless_default
@@ -228,7 +397,15 @@ def main():
         raise ValueError("A reroute location must be provided via --location or config.yaml under carriers:DHL:reroute_location")
     if args.weeks is None:
         raise ValueError("A lookback period must be provided via --weeks or config.yaml under email:lookback_weeks")
-    run(args.weeks, args.zip_code, args.custom_location, highlight_only, selenium_headless, timeout, config)
+    try:
+        run(
+            args.weeks, args.zip_code, args.custom_location, highlight_only, selenium_headless, timeout,
+            config, args.full_sync, args.watch,
+        )
+    except KeyboardInterrupt:
+        if not args.watch:
+            raise
+        logger.info("Watch mode stopped")
 
 if __name__ == "__main__":
     main()
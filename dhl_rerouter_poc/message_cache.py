@@ -0,0 +1,139 @@
+# dhl_rerouter_poc/message_cache.py
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import logging
+logger = logging.getLogger(__name__)
+
+FIELDS = ("body", "message_id", "subject", "sender", "date")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    account     TEXT    NOT NULL,
+    folder      TEXT    NOT NULL,
+    uidvalidity INTEGER NOT NULL,
+    uid         INTEGER NOT NULL,
+    variant     TEXT    NOT NULL,
+    body        TEXT    NOT NULL,
+    message_id  TEXT,
+    subject     TEXT,
+    sender      TEXT,
+    date        TEXT,
+    size        INTEGER NOT NULL,
+    last_used   REAL    NOT NULL,
+    PRIMARY KEY (account, folder, uidvalidity, uid, variant)
+);
+CREATE INDEX IF NOT EXISTS messages_last_used ON messages (last_used);
+"""
+
+
+class MessageCache:
+    """
+    On-disk cache of extracted message text and headers, keyed by
+    account/folder/UIDVALIDITY/UID. IMAP guarantees that a UID never refers to
+    another message while UIDVALIDITY is unchanged, so entries never go stale; entries
+    of an old UIDVALIDITY are purged when a folder is rebuilt.
+
+    `variant` separates bodies extracted with different settings (fetch mode, part cap).
+    The cache is bounded to `max_bytes` of text by evicting least recently used entries.
+    Safe to share between threads; path=None keeps the cache in memory only.
+    """
+    def __init__(self, path: str | Path | None, max_bytes: int = 200 * 1024 * 1024, variant: str = ""):
+        self.path = Path(path) if path else None
+        self.max_bytes = max_bytes
+        self.variant = variant
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path) if self.path else ":memory:", check_same_thread=False)
+        with self._lock, self._db:
+            self._db.executescript(_SCHEMA)
+
+    def get_many(self, account: str, folder: str, uidvalidity: int, uids: list[int]) -> dict[int, dict]:
+        """Return {uid: {field: value}} for the cached UIDs and mark them as recently used."""
+        found: dict[int, dict] = {}
+        if not uids:
+            return found
+        with self._lock, self._db:
+            # stay below SQLite's bound-parameter limit
+            for i in range(0, len(uids), 500):
+                chunk = uids[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = self._db.execute(
+                    f"SELECT uid, {', '.join(FIELDS)} FROM messages "
+                    f"WHERE account = ? AND folder = ? AND uidvalidity = ? AND variant = ? AND uid IN ({marks})",
+                    (account, folder, uidvalidity, self.variant, *chunk),
+                ).fetchall()
+                for uid, *values in rows:
+                    found[uid] = dict(zip(FIELDS, values))
+                if rows:
+                    self._db.execute(
+                        f"UPDATE messages SET last_used = ? "
+                        f"WHERE account = ? AND folder = ? AND uidvalidity = ? AND variant = ? AND uid IN ({marks})",
+                        (time.time(), account, folder, uidvalidity, self.variant, *chunk),
+                    )
+            self.hits += len(found)
+            self.misses += len(uids) - len(found)
+        return found
+
+    def put_many(self, account: str, folder: str, uidvalidity: int, entries: dict[int, dict]) -> None:
+        """Store {uid: {field: value}} entries."""
+        if not entries:
+            return
+        now = time.time()
+        rows = []
+        for uid, e in entries.items():
+            body = e.get("body") or ""
+            size = len(body.encode("utf-8", "replace"))
+            rows.append((
+                account, folder, uidvalidity, uid, self.variant, body,
+                e.get("message_id"), e.get("subject"), e.get("sender"), e.get("date"), size, now,
+            ))
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO messages (account, folder, uidvalidity, uid, variant, "
+                f"{', '.join(FIELDS)}, size, last_used) VALUES ({','.join('?' * 12)})",
+                rows,
+            )
+
+    def purge_stale(self, account: str, folder: str, uidvalidity: int) -> int:
+        """Drop entries of `folder` cached under a different UIDVALIDITY; returns the number removed."""
+        with self._lock, self._db:
+            cur = self._db.execute(
+                "DELETE FROM messages WHERE account = ? AND folder = ? AND uidvalidity != ?",
+                (account, folder, uidvalidity),
+            )
+        if cur.rowcount:
+            logger.info("Message cache: dropped %d entries of folder '%s' (UIDVALIDITY changed)", cur.rowcount, folder)
+        return cur.rowcount
+
+    def evict(self) -> int:
+        """Remove least recently used entries until the cache fits `max_bytes`; returns the number removed."""
+        with self._lock, self._db:
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM messages").fetchone()[0]
+            excess = total - self.max_bytes
+            if excess <= 0:
+                return 0
+            victims = []
+            for rowid, size in self._db.execute("SELECT rowid, size FROM messages ORDER BY last_used"):
+                victims.append((rowid,))
+                excess -= size
+                if excess <= 0:
+                    break
+            self._db.executemany("DELETE FROM messages WHERE rowid = ?", victims)
+        logger.info("Message cache: evicted %d least recently used entries", len(victims))
+        return len(victims)
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def reset_stats(self) -> None:
+        self.hits = self.misses = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,146 @@
+# dhl_rerouter_poc/parse_pool.py
+"""
+Parallel parse stage for large backfills: charset decoding, HTML stripping and
+tracking-code extraction of undecoded messages (MessageSource.iter_raw_messages())
+run in a ProcessPoolExecutor, so they use more than one core.
+"""
+import email
+import os
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from itertools import chain, islice
+from typing import Callable, Iterable, Iterator
+
+from .email_client import decode_text_parts, message_meta, message_text
+from .parser import BytePrefilter, TrackingMatcher
+from .sources.base import FetchedMessage
+
+import logging
+logger = logging.getLogger(__name__)
+
+# per-process state set up by _init_worker
+_worker: dict = {}
+
+
+def parse_message(
+    message: FetchedMessage,
+    matcher: TrackingMatcher,
+    prefilter: BytePrefilter | None = None,
+    html_parser: str = "stream",
+) -> tuple[FetchedMessage, dict]:
+    """Decode an undecoded FetchedMessage (see FetchedMessage.parts/raw) and return it with its {code: carrier}."""
+    if message.raw is not None:
+        msg = email.message_from_bytes(message.raw)
+        body = message_text(msg, prefilter, html_parser) or ""
+        message = replace(message, body=body, raw=None, **message_meta(msg))
+    elif message.parts is not None:
+        body = decode_text_parts(message.parts, None, html_parser) or ""
+        message = replace(message, body=body, parts=None)
+    return message, matcher.extract(message.body)
+
+
+def _init_worker(patterns: dict, validators: dict, html_parser: str, byte_prefilter: bool) -> None:
+    _worker["matcher"] = TrackingMatcher(patterns, validators)
+    _worker["prefilter"] = BytePrefilter(patterns) if byte_prefilter else None
+    _worker["html_parser"] = html_parser
+
+
+def _parse_chunk(messages: list[FetchedMessage]) -> tuple[list[tuple[FetchedMessage, dict]], Counter]:
+    matcher = _worker["matcher"]
+    matcher.rejected.clear()
+    results = []
+    for message in messages:
+        message, codes = parse_message(message, matcher, _worker["prefilter"], _worker["html_parser"])
+        # only messages with codes are recorded by main.run; don't ship other bodies back
+        results.append((message if codes else replace(message, body=""), codes))
+    return results, Counter(matcher.rejected)
+
+
+def _chunks(items: Iterator, size: int) -> Iterator[list]:
+    while chunk := list(islice(items, size)):
+        yield chunk
+
+
+class ParsePool:
+    """
+    Decode messages and extract their tracking codes, in order, on `workers` processes
+    (0 = one per CPU). Messages are submitted in chunks of `chunk_size` to amortize
+    inter-process communication, with a bounded number of chunks in flight. The first
+    `min_messages` messages are parsed in-process as they arrive, so results are never
+    held back; only a run with more messages hands the rest to the workers. With
+    `workers` <= 1 everything is parsed in-process.
+    Candidates rejected by the validators are summed up in `rejected`.
+    """
+    def __init__(
+        self,
+        tracking_patterns: dict,
+        validators: dict[str, Callable[[str], bool]] | None = None,
+        workers: int = 0,
+        chunk_size: int = 64,
+        min_messages: int = 256,
+        html_parser: str = "stream",
+        byte_prefilter: bool = True,
+    ):
+        self.patterns = tracking_patterns
+        self.validators = validators or {}
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.chunk_size = max(1, chunk_size)
+        self.min_messages = min_messages
+        self.html_parser = html_parser
+        self.byte_prefilter = byte_prefilter
+        self.rejected: Counter = Counter()
+        self.parallel = False  # whether the last map() used worker processes
+
+    def map(self, messages: Iterable[FetchedMessage]) -> Iterator[tuple[FetchedMessage, dict]]:
+        """
+        Yield (decoded message, {code: carrier}) for each message in input order.
+        In worker processes, bodies of messages without codes are returned empty.
+        """
+        it = iter(messages)
+        self.parallel = False
+        if self.workers <= 1:
+            yield from self._map_serial(it)
+            return
+        yield from self._map_serial(islice(it, self.min_messages))
+        rest = next(it, None)
+        if rest is None:
+            return
+        self.parallel = True  # a backfill: worth starting the worker processes
+        yield from self._map_parallel(chain([rest], it))
+
+    def _map_serial(self, messages: Iterator[FetchedMessage]) -> Iterator[tuple[FetchedMessage, dict]]:
+        matcher = TrackingMatcher(self.patterns, self.validators)
+        prefilter = BytePrefilter(self.patterns) if self.byte_prefilter else None
+        try:
+            for message in messages:
+                yield parse_message(message, matcher, prefilter, self.html_parser)
+        finally:
+            self.rejected.update(matcher.rejected)
+
+    def _map_parallel(self, messages: Iterator[FetchedMessage]) -> Iterator[tuple[FetchedMessage, dict]]:
+        logger.info("Going to parse messages on %d worker processes (chunks of %d)", self.workers, self.chunk_size)
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.patterns, self.validators, self.html_parser, self.byte_prefilter),
+        )
+        pending: deque = deque()
+        chunks = _chunks(messages, self.chunk_size)
+        parsed = 0
+        try:
+            while True:
+                while len(pending) < 2 * self.workers:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        break
+                    pending.append(executor.submit(_parse_chunk, chunk))
+                if not pending:
+                    break
+                results, rejected = pending.popleft().result()
+                self.rejected.update(rejected)
+                parsed += len(results)
+                yield from results
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            logger.debug("Finished parsing %d message(s) on %d worker processes", parsed, self.workers)
@@ -1,29 +1,262 @@
 import re
+from collections import Counter
+from functools import lru_cache
+from html.parser import HTMLParser
+from typing import Callable
 import logging
 logger = logging.getLogger(__name__)
 
+
+def _first_char_class(pattern: str) -> str | None:
+    r"""
+    Return a character-class fragment every match of `pattern` starts with, skipping
+    leading anchors, e.g. r'\bJJD\d+' → 'J', r'\b\d{11}\b' → '\d'; None if unknown.
+    """
+    if "|" in pattern:
+        return None
+    i = 0
+    while pattern.startswith(("\\b", "^"), i):
+        i += 1 if pattern[i] == "^" else 2
+    rest = pattern[i:]
+    if rest[:2] in ("\\d", "\\w"):
+        return rest[:2]
+    if rest[:1] == "[" and rest[1:2] != "^":
+        end = rest.find("]", 2)
+        return rest[1:end] if end > 0 and "\\" not in rest[1:end] else None
+    prefix = literal_prefix(pattern)
+    return re.escape(prefix[0]) if prefix else None
+
+
+class TrackingMatcher:
+    """
+    Tracking-code matcher compiled once from `tracking_patterns` ({carrier: [regex, ...]}).
+
+    All patterns are joined into one alternation with a named group per pattern, so each
+    body is scanned once instead of once per pattern. A shared leading \b is hoisted out
+    of the alternation and a lookahead on the possible first characters skips positions
+    where no code can start. Alternatives are tried in reverse config order: where
+    patterns of two carriers match the same code, the later carrier wins, as with the
+    per-pattern loop. Matches of different patterns are assumed not to overlap (true for
+    word-bounded formats). Patterns with capture groups or inline flags keep the
+    per-pattern re.findall() semantics.
+
+    `validators` ({carrier: code -> bool}, see checksums.py) drop candidates failing
+    the carrier's check digit; `rejected` counts them per carrier.
+    """
+    def __init__(self, patterns: dict, validators: dict[str, Callable[[str], bool]] | None = None):
+        self.validators = validators or {}
+        self.rejected: Counter = Counter()
+        self._compiled = [(carrier, re.compile(pat)) for carrier, pats in patterns.items() for pat in pats]
+        self._carriers = {f"p{i}": carrier for i, (carrier, _) in enumerate(self._compiled)}
+        self._combined = None
+        if self._compiled and not any(rx.groups for _, rx in self._compiled):
+            try:
+                self._combined = re.compile(self._combine([rx.pattern for _, rx in self._compiled]))
+            except re.error as e:
+                logger.debug("Cannot combine tracking patterns (%s); matching them one by one", e)
+
+    @staticmethod
+    def _combine(patterns: list[str]) -> str:
+        hoist = all(p.startswith("\\b") for p in patterns)
+        alternatives = [f"(?P<p{i}>{p[2:] if hoist else p})" for i, p in enumerate(patterns)]
+        combined = ("\\b" if hoist else "") + "(?:" + "|".join(reversed(alternatives)) + ")"
+        first = [_first_char_class(p) for p in patterns]
+        if all(first):
+            combined = f"(?=[{''.join(dict.fromkeys(first))}])" + combined
+        return combined
+
+    def extract(self, text: str) -> dict:
+        """Return {code: carrier} for all tracking codes in `text`."""
+        found = {}
+        if self._combined is not None:
+            carriers = self._carriers
+            for m in self._combined.finditer(text):
+                found[m.group()] = carriers[m.lastgroup]
+        else:
+            for carrier, rx in self._compiled:
+                for m in rx.findall(text):
+                    found[m] = carrier
+        if self.validators:
+            for code, carrier in list(found.items()):
+                validate = self.validators.get(carrier)
+                if validate and not validate(code):
+                    logger.debug("Dropping %s candidate %s: check digit mismatch", carrier, code)
+                    self.rejected[carrier] += 1
+                    del found[code]
+        return found
+
+
+_LEADING_DIGITS = re.compile(r"^(?:\\b|\^)*\\d(?:\{(\d+)|\+|\*)?")
+_TAG_BYTES = re.compile(rb"<[^<>]*>")
+
+
+class BytePrefilter:
+    r"""
+    Cheap test whether raw part bytes (after transfer decoding, before charset decoding
+    and HTML stripping) can contain a tracking code: they must contain one of the
+    patterns' literal prefixes (e.g. b'JJD', b'1Z') or, for patterns starting with
+    digits such as GLS r'\d{11}', a long enough digit run. Messages without any
+    candidate can skip safe_decode() and strip_html() entirely.
+    If a pattern has neither, every payload is a candidate, and so is every payload in
+    a charset that does not encode ASCII as single bytes (UTF-16/32).
+    HTML payloads without a match are tested once more with their tags removed, since
+    inline markup can split a code (e.g. '12345<b>678901</b>').
+    """
+    def __init__(self, patterns: dict):
+        prefixes: set[str] = set()
+        digit_run = 0
+        self.regex = None
+        for pats in patterns.values():
+            for pat in pats:
+                prefix = literal_prefix(pat)
+                if len(prefix) >= 2:
+                    prefixes.add(prefix)
+                    continue
+                m = _LEADING_DIGITS.match(pat)
+                if m is None or m.group(0).endswith("*"):
+                    logger.debug("Byte prefilter disabled: no literal prefix or leading digits in %r", pat)
+                    return
+                run = int(m.group(1)) if m.group(1) else 1
+                digit_run = min(digit_run, run) if digit_run else run
+        terms = [re.escape(p.encode()) for p in sorted(prefixes)]
+        if digit_run:
+            terms.append(rb"\d{%d}" % digit_run)
+        if terms:
+            self.regex = re.compile(b"|".join(terms))
+
+    @property
+    def key(self) -> str:
+        """Identifies the filter, e.g. for cache entries extracted with it."""
+        return self.regex.pattern.decode() if self.regex is not None else ""
+
+    def may_contain(self, data: bytes, charset: str = "ascii", html: bool = False) -> bool:
+        if self.regex is None or charset.lower().replace("_", "-").startswith(("utf-16", "utf-32")):
+            return True
+        if self.regex.search(data) is not None:
+            return True
+        return html and b"<" in data and self.regex.search(_TAG_BYTES.sub(b"", data)) is not None
+
+
+@lru_cache(maxsize=8)
+def _matcher(key: tuple) -> TrackingMatcher:
+    return TrackingMatcher({carrier: list(pats) for carrier, pats in key})
+
+
 def extract_tracking_codes(text: str, patterns: dict, run_id: str | None = None) -> dict:
     if run_id:
         logger.info("Going to extract tracking codes [run_id=%s]", run_id)
     else:
         logger.info("Going to extract tracking codes")
-    found = {}
-    for carrier, pats in patterns.items():
-        for pat in pats:
-            for m in re.findall(pat, text):
-                found[m] = carrier
+    found = _matcher(tuple((carrier, tuple(pats)) for carrier, pats in patterns.items())).extract(text)
     if run_id:
         logger.debug("Finished extracting tracking codes [run_id=%s]", run_id)
     else:
         logger.debug("Finished extracting tracking codes")
     return found
 
+def literal_prefix(pattern: str) -> str:
+    r"""
+    Return the literal text every match of `pattern` must start with, skipping leading
+    anchors, e.g. r'\bJJD\d{10,}\b' → 'JJD'. Returns '' when the pattern starts with a
+    character class or group (e.g. GLS r'\b\d{11}\b') or contains an alternation.
+    """
+    if "|" in pattern:
+        return ""
+    i = 0
+    while True:
+        if pattern.startswith("\\b", i):
+            i += 2
+        elif pattern.startswith("^", i):
+            i += 1
+        else:
+            break
+    prefix = []
+    while i < len(pattern) and (pattern[i].isalnum() or pattern[i] in "-_"):
+        quant = pattern[i + 1:i + 2]
+        if quant in ("?", "*", "{"):
+            break
+        prefix.append(pattern[i])
+        if quant == "+":
+            break
+        i += 1
+    return "".join(prefix)
+
 def safe_decode(payload, charset):
     try:
         return payload.decode(charset, errors="ignore")
     except:
         return payload.decode("utf-8", errors="ignore")
 
-def strip_html(html):
+_SKIP_TAGS = frozenset({"script", "style", "template"})
+_BLOCK_TAGS = frozenset({
+    "br", "p", "div", "li", "tr", "td", "th", "table", "title",
+    "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "pre", "hr",
+})
+
+
+class HtmlTextExtractor(HTMLParser):
+    """
+    Streaming HTML-to-text conversion without building a document tree: text is
+    collected as the parser emits it, <script>/<style>/<template> content and comments
+    are dropped, block-level tags become line breaks (so adjacent table cells are not
+    glued into one token) and link targets are kept, since tracking links such as
+    '...?piececode=JJD...' often carry the code the visible text leaves out.
+    """
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._chunks: list[str] = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self._skip += 1
+        elif not self._skip:
+            if tag in _BLOCK_TAGS:
+                self._chunks.append("\n")
+            elif tag == "a":
+                href = next((v for k, v in attrs if k == "href" and v), None)
+                if href:
+                    self._chunks.append(f" {href} ")
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS:
+            self._skip = max(0, self._skip - 1)
+        elif tag in _BLOCK_TAGS and not self._skip:
+            self._chunks.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip:
+            self._chunks.append(data)
+
+    def text(self) -> str:
+        return "".join(self._chunks)
+
+
+def _strip_html_bs4(html: str) -> str:
     from bs4 import BeautifulSoup
     return BeautifulSoup(html, "html.parser").get_text()
+
+
+def _strip_html_stream(html: str) -> str:
+    extractor = HtmlTextExtractor()
+    extractor.feed(html)
+    extractor.close()
+    return extractor.text()
+
+
+HTML_PARSERS: dict[str, Callable[[str], str]] = {
+    "stream": _strip_html_stream,
+    "bs4": _strip_html_bs4,
+}
+
+
+def strip_html(html: str, parser: str = "stream") -> str:
+    """
+    Return the text content of an HTML part. `parser` selects the implementation
+    (`email.html_parser`): "stream" (HtmlTextExtractor, default) or "bs4"
+    (BeautifulSoup get_text(), the previous behaviour).
+    """
+    strip = HTML_PARSERS.get(parser)
+    if strip is None:
+        raise ValueError(f"Unknown HTML parser '{parser}' (expected one of {', '.join(HTML_PARSERS)})")
+    return strip(html)
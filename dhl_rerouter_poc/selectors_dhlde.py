@@ -8,7 +8,16 @@ DELIVERED_TEXTS = "//*[contains(text(),'delivered') or contains(text(),'zustellt
 
 # Delivery options toggle + items
 DELIVERY_TOGGLE = "//section//button[contains(., 'You are not at home')]"
+# the same toggle within one shipment's element (pages listing several shipments)
+SHIPMENT_DELIVERY_TOGGLE = ".//button[contains(., 'You are not at home')]"
 DELIVERY_OPTIONS = "//div[@class='verfuegen-container']//li[@data-name]"
+DELIVERY_OPTIONS_CONTAINER = "div.verfuegen-container"
+DELIVERY_OPTION_ITEMS = "div.verfuegen-container ul li[data-name]"
+
+# Drop-off location form
+PREFERRED_LOCATION_OPTION = "//li[@data-name='PREFERRED_LOCATION']"
+CONSENT_CHECKBOX = "//input[@type='checkbox']"
+CONFIRM_BUTTON = "//button[text()='Confirm']"
 
 # Shipment history entries
 SHIPMENT_HISTORY_ENTRY = "li[data-testid='shipment-course-entry']"
@@ -17,13 +26,22 @@ SHIPMENT_HISTORY_ENTRY = "li[data-testid='shipment-course-entry']"
 CUSTOM_DROPOFF_INPUT = "div.shipmentServices form div.radioFormgroup.otherDropPoint input[type='text']"
 
 
-def delivery_status_selector(tracking_number):
+# piece codes per tracking query (comma-separated `piececode`)
+MAX_PIECECODES_PER_QUERY = 20
+
+
+def shipment_selector(tracking_number):
     return (
         By.CSS_SELECTOR,
         f"section[data-testid='shipment-details'] article.shipment "
-        f"div[data-shipment-id='{tracking_number}'] div[data-testid^='status-body_'] p > strong"
+        f"div[data-shipment-id='{tracking_number}']"
     )
 
+
+def delivery_status_selector(tracking_number):
+    by, sel = shipment_selector(tracking_number)
+    return (by, f"{sel} div[data-testid^='status-body_'] p > strong")
+
 ALLOWED_DELIVERY_OPTION_KEYS = {
     "PREFERRED_LOCATION",
     "PREFERRED_DAY",
@@ -32,3 +50,32 @@ ALLOWED_DELIVERY_OPTION_KEYS = {
     "DELIVERY_CANCELLATION",
     "COLLECT_ON_INSTRUCTION"
 }
+
+# Resources the scraper never needs, blocked with CDP Network.setBlockedURLs
+# (`*` wildcards): images, fonts, media, analytics/tag managers, consent manager
+BLOCKED_URLS = [
+    "*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.svg*", "*.ico*",
+    "*.woff*", "*.ttf*", "*.otf*", "*.mp4*", "*.webm*",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*adobedtm.com*", "*demdex.net*", "*omtrdc.net*",
+    "*cookielaw.org*", "*onetrust.com*", "*usercentrics.eu*",
+]
+
+# dhl.de (or a local stand-in, carriers.DHL.base_url) and its tracking page
+BASE_URL = "https://www.dhl.de"
+TRACKING_PAGE_PATH = "/en/privatkunden/pakete-empfangen/verfolgen.html"
+
+# JSON endpoint the tracking page itself queries (HTTP fast path, no browser)
+TRACKING_API_PATH = "/int-verfolgen/data/search"
+TRACKING_API_URL = BASE_URL + TRACKING_API_PATH
+
+# dotted paths into the response; the shipment list, then fields of one shipment
+API_SHIPMENTS = "sendungen"
+API_SHIPMENT_ID = "id"
+API_DELIVERY_STATUS = "sendungsdetails.sendungsverlauf.kurzStatus"
+API_DELIVERY_DATE = "sendungsdetails.zustellung.zustellzeitfensterVon"
+API_DELIVERED = "sendungsdetails.istZugestellt"
+API_DELIVERY_OPTIONS = "sendungsdetails.verfuegen.optionen"
+API_DELIVERY_OPTION_NAME = "name"
+API_HISTORY_EVENTS = "sendungsdetails.sendungsverlauf.events"
+API_HISTORY_FIELDS = ("datum", "status", "ort")
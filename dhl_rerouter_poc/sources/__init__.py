@@ -0,0 +1,33 @@
+# sources/__init__.py
+"""
+Pluggable message sources feeding the tracking workflow (IMAP, local mbox/Maildir archives).
+"""
+from .base import FetchedMessage, MessageSource
+
+
+def build_source(email_cfg: dict, tracking_patterns: dict | None = None) -> MessageSource:
+    """
+    Create the message source selected by `email.source` (imap, mbox or maildir).
+    Local sources read `email.source_path`, relative to the project root. Unless
+    `email.byte_prefilter` is false, `tracking_patterns` let sources skip decoding
+    messages that cannot contain a tracking code.
+    """
+    kind = email_cfg.get("source", "imap")
+    if kind == "imap":
+        from ..email_client import ImapEmailClient
+        return ImapEmailClient(email_cfg, tracking_patterns)
+    if kind in ("mbox", "maildir"):
+        from ..config import resolve_path
+        from ..parser import BytePrefilter
+        from .local import MaildirSource, MboxSource
+        cls = MboxSource if kind == "mbox" else MaildirSource
+        prefilter = None
+        if tracking_patterns and email_cfg.get("byte_prefilter", True):
+            prefilter = BytePrefilter(tracking_patterns)
+        return cls(
+            resolve_path(email_cfg["source_path"]),
+            max_part_bytes=int(email_cfg.get("max_part_bytes", 262144)),
+            prefilter=prefilter,
+            html_parser=email_cfg.get("html_parser", "stream"),
+        )
+    raise ValueError(f"Unknown email source '{kind}' (expected imap, mbox or maildir)")
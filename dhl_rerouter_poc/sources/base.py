@@ -0,0 +1,48 @@
+# sources/base.py
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Iterator
+
+
+@dataclass
+class FetchedMessage:
+    """
+    A decoded message body plus the metadata the workflow records for it. Messages from
+    iter_raw_messages() may instead carry their undecoded content, to be decoded by a
+    ParsePool worker: `parts` (transfer-decoded text parts as (subtype, charset, bytes))
+    or `raw` (the complete RFC822 message, whose headers also provide the metadata).
+    """
+    body: str
+    folder: str | None = None
+    uid: int | None = None
+    message_id: str | None = None
+    subject: str | None = None
+    sender: str | None = None
+    date: str | None = None  # ISO timestamp
+    parts: list[tuple[str, str, bytes]] | None = None
+    raw: bytes | None = None
+
+
+class MessageSource(ABC):
+    """A source of messages for main.run: an IMAP account or a local archive."""
+
+    @abstractmethod
+    def iter_messages(self, run_id: str | None = None) -> Iterator[FetchedMessage]:
+        """
+        Yield decoded messages (text/plain and stripped text/html content plus headers)
+        as they become available.
+        """
+        pass
+
+    def iter_raw_messages(self, run_id: str | None = None) -> Iterator[FetchedMessage]:
+        """
+        Like iter_messages(), but leaving charset decoding and HTML stripping to the
+        caller (see FetchedMessage.parts/raw). Messages the byte prefilter rules out are
+        yielded with an empty body. The default yields decoded messages.
+        """
+        return self.iter_messages(run_id)
+
+    def fetch_messages(self, run_id: str | None = None) -> list[str]:
+        """Return the bodies of all messages; see iter_messages() for the streaming API."""
+        return [m.body for m in self.iter_messages(run_id)]
@@ -0,0 +1,256 @@
+# sources/local.py
+"""
+Message sources for exported mailboxes (mbox files and Maildir directories).
+
+Files are memory-mapped and scanned by byte offsets: message boundaries, MIME headers
+and multipart delimiters are located with find()/regex searches on the mapping, and only
+the headers and text/plain + text/html parts are ever copied into Python objects.
+Attachments are skipped without being read into memory.
+"""
+import mmap
+import os
+import re
+from email.parser import BytesHeaderParser
+from pathlib import Path
+from typing import Iterator
+
+from ..email_client import decode_text_parts, has_candidate, message_meta
+from ..imap_utils import decode_transfer_encoding
+from ..parser import HTML_PARSERS, BytePrefilter
+from .base import FetchedMessage, MessageSource
+
+import logging
+logger = logging.getLogger(__name__)
+
+_HEADER_END = re.compile(rb"\r?\n\r?\n")
+_MBOX_FROM = b"\nFrom "
+_MAX_DEPTH = 10  # nested multipart/message parts followed
+
+_header_parser = BytesHeaderParser()
+
+
+def _split_headers(buf, start: int, end: int) -> tuple[int, int]:
+    """Return (end of the header block, start of the body) of the entity at buf[start:end]."""
+    if buf[start:start + 1] == b"\n":
+        return start, start + 1
+    if buf[start:start + 2] == b"\r\n":
+        return start, start + 2
+    m = _HEADER_END.search(buf, start, end)
+    if m is None:
+        return end, end
+    return m.start(), m.end()
+
+
+def scan_text_parts(buf, start: int, end: int, max_part_bytes: int = 0):
+    """
+    Parse the entity at buf[start:end] (bytes or an mmap) without building a Message tree.
+    Returns (headers, [(subtype, charset, encoding, raw_bytes)]) for every text/plain and
+    text/html part in document order; each raw part is capped at `max_part_bytes` (0 = uncapped).
+    """
+    header_end, body_start = _split_headers(buf, start, end)
+    headers = _header_parser.parsebytes(buf[start:header_end])
+    parts: list[tuple[str, str, str, bytes]] = []
+    _collect(buf, headers, body_start, end, max_part_bytes, parts, 0)
+    return headers, parts
+
+
+def _collect(buf, headers, body_start: int, end: int, cap: int, out: list, depth: int) -> None:
+    # without a (valid) Content-Type this is the default type: text/plain (RFC 2045),
+    # message/rfc822 for the parts of a multipart/digest (RFC 2046), as in Message.walk()
+    ctype = headers.get_content_type()
+    if depth > _MAX_DEPTH:
+        return
+    if ctype.startswith("multipart/"):
+        boundary = headers.get_param("boundary")
+        if not boundary:
+            return
+        delim = b"--" + str(boundary).encode("ascii", "replace")
+        # the first delimiter may start the body; later ones follow a line break
+        if buf[body_start:body_start + len(delim)] == delim:
+            pos = body_start
+        else:
+            found = buf.find(b"\n" + delim, body_start, end)
+            pos = found + 1 if found != -1 else -1
+        while pos != -1:
+            after = pos + len(delim)
+            if buf[after:after + 2] == b"--":
+                break  # closing delimiter
+            line_end = buf.find(b"\n", after, end)
+            if line_end == -1:
+                break
+            part_start = line_end + 1
+            nxt = buf.find(b"\n" + delim, part_start, end)
+            part_end = nxt if nxt != -1 else end
+            if nxt != -1 and buf[nxt - 1:nxt] == b"\r":
+                part_end -= 1
+            header_end, part_body = _split_headers(buf, part_start, part_end)
+            part_headers = _header_parser.parsebytes(buf[part_start:header_end])
+            if ctype == "multipart/digest":
+                part_headers.set_default_type("message/rfc822")
+            _collect(buf, part_headers, part_body, part_end, cap, out, depth + 1)
+            if nxt == -1:
+                break
+            pos = nxt + 1
+    elif ctype == "message/rfc822":
+        header_end, inner_body = _split_headers(buf, body_start, end)
+        inner = _header_parser.parsebytes(buf[body_start:header_end])
+        _collect(buf, inner, inner_body, end, cap, out, depth + 1)
+    elif ctype in ("text/plain", "text/html"):
+        stop = min(end, body_start + cap) if cap > 0 else end
+        encoding = (headers.get("Content-Transfer-Encoding") or "7bit").strip().lower()
+        out.append((headers.get_content_subtype(), headers.get_content_charset() or "utf-8", encoding, buf[body_start:stop]))
+
+
+def entity_parts(buf, start: int, end: int, max_part_bytes: int = 0) -> tuple[list[tuple[str, str, bytes]], dict]:
+    """Return (transfer-decoded (subtype, charset, payload) text parts, message_meta) of the message at buf[start:end]."""
+    headers, parts = scan_text_parts(buf, start, end, max_part_bytes)
+    decoded = [(subtype, charset, decode_transfer_encoding(raw, encoding)) for subtype, charset, encoding, raw in parts]
+    return decoded, message_meta(headers)
+
+
+def _map(path: Path):
+    """Memory-map `path` read-only; returns None for empty files (which cannot be mapped)."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def mbox_boundaries(buf) -> Iterator[tuple[int, int]]:
+    """Yield (start, end) of every message body in an mbox mapping, excluding the 'From ' lines."""
+    size = len(buf)
+    pos = 0 if buf[:5] == b"From " else buf.find(_MBOX_FROM)
+    if pos == -1:
+        return
+    if pos > 0:
+        pos += 1
+    while pos < size:
+        line_end = buf.find(b"\n", pos)
+        if line_end == -1:
+            return
+        start = line_end + 1
+        nxt = buf.find(_MBOX_FROM, start)
+        end = size if nxt == -1 else nxt + 1
+        # drop the blank separator line mbox writers put between messages
+        if buf[end - 2:end] == b"\n\n":
+            end -= 1
+        elif buf[end - 4:end] == b"\r\n\r\n":
+            end -= 2
+        yield start, end
+        if nxt == -1:
+            return
+        pos = nxt + 1
+
+
+class _ArchiveSource(MessageSource):
+    """Common settings of the file-based sources; `decode_skipped` counts bodies ruled out by `prefilter`."""
+    def __init__(
+        self, path: str | Path, max_part_bytes: int = 262144, prefilter: BytePrefilter | None = None,
+        html_parser: str = "stream",
+    ):
+        self.path = Path(path)
+        self.max_part_bytes = max_part_bytes
+        self.prefilter = prefilter
+        if html_parser not in HTML_PARSERS:
+            raise ValueError(f"Unknown html_parser '{html_parser}' (expected one of {', '.join(HTML_PARSERS)})")
+        self.html_parser = html_parser
+        self.decode_skipped = 0
+
+    def _message(self, buf, start: int, end: int, decode: bool, folder: str, uid: int | None) -> FetchedMessage:
+        parts, meta = entity_parts(buf, start, end, self.max_part_bytes)
+        if decode:
+            body = decode_text_parts(parts, self.prefilter, self.html_parser)
+        elif has_candidate(parts, self.prefilter):
+            return FetchedMessage("", folder, uid, parts=parts, **meta)
+        else:
+            body = None
+        if body is None:
+            self.decode_skipped += 1
+            body = ""
+        return FetchedMessage(body, folder, uid, **meta)
+
+    def iter_raw_messages(self, run_id: str | None = None) -> Iterator[FetchedMessage]:
+        return self.iter_messages(run_id, decode=False)
+
+
+class MboxSource(_ArchiveSource):
+    """
+    Messages of an mbox file, in file order. `uid` is the message's 1-based position
+    in the archive and `folder` the file name.
+    """
+    def iter_messages(self, run_id: str | None = None, decode: bool = True) -> Iterator[FetchedMessage]:
+        if run_id:
+            logger.info("Going to read mbox '%s' [run_id=%s]", self.path, run_id)
+        else:
+            logger.info("Going to read mbox '%s'", self.path)
+        buf = _map(self.path)
+        count = 0
+        try:
+            if buf is not None:
+                if hasattr(mmap, "MADV_SEQUENTIAL"):
+                    buf.madvise(mmap.MADV_SEQUENTIAL)
+                for count, (start, end) in enumerate(mbox_boundaries(buf), start=1):
+                    try:
+                        message = self._message(buf, start, end, decode, self.path.name, count)
+                    except Exception as e:
+                        logger.error("Failed to parse message %d in '%s': %s", count, self.path, e)
+                        continue
+                    yield message
+        finally:
+            if buf is not None:
+                buf.close()
+            if run_id:
+                logger.debug(
+                    "Finished reading %d message(s) from mbox '%s', %d not decoded (no tracking-code candidate) [run_id=%s]",
+                    count, self.path, self.decode_skipped, run_id,
+                )
+            else:
+                logger.debug(
+                    "Finished reading %d message(s) from mbox '%s', %d not decoded (no tracking-code candidate)",
+                    count, self.path, self.decode_skipped,
+                )
+
+
+class MaildirSource(_ArchiveSource):
+    """
+    Messages of a Maildir directory (`new/` and `cur/`), newest file name first.
+    Each message file is memory-mapped on its own; `folder` is the directory name.
+    """
+    def _files(self) -> list[Path]:
+        files = []
+        for sub in ("new", "cur"):
+            d = self.path / sub
+            if d.is_dir():
+                files += [Path(e.path) for e in os.scandir(d) if e.is_file() and not e.name.startswith(".")]
+        # delivery file names start with the delivery timestamp
+        return sorted(files, key=lambda p: p.name, reverse=True)
+
+    def iter_messages(self, run_id: str | None = None, decode: bool = True) -> Iterator[FetchedMessage]:
+        if run_id:
+            logger.info("Going to read Maildir '%s' [run_id=%s]", self.path, run_id)
+        else:
+            logger.info("Going to read Maildir '%s'", self.path)
+        files = self._files()
+        for path in files:
+            try:
+                buf = _map(path)
+                if buf is None:
+                    continue
+                try:
+                    message = self._message(buf, 0, len(buf), decode, self.path.name, None)
+                finally:
+                    buf.close()
+            except Exception as e:
+                logger.error("Failed to read message '%s': %s", path, e)
+                continue
+            yield message
+        if run_id:
+            logger.debug(
+                "Finished reading %d message(s) from Maildir '%s', %d not decoded (no tracking-code candidate) [run_id=%s]",
+                len(files), self.path, self.decode_skipped, run_id,
+            )
+        else:
+            logger.debug(
+                "Finished reading %d message(s) from Maildir '%s', %d not decoded (no tracking-code candidate)",
+                len(files), self.path, self.decode_skipped,
+            )
@@ -0,0 +1,53 @@
+# dhl_rerouter_poc/sync_state.py
+
+import json
+import os
+from pathlib import Path
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class SyncState:
+    """
+    Persistent per-folder IMAP sync watermarks.
+
+    For every account/folder pair the store keeps the folder's UIDVALIDITY and the
+    highest UID already fetched. A watermark is only valid while UIDVALIDITY is unchanged;
+    callers must fall back to a full resync otherwise.
+    State is kept as JSON; passing path=None keeps it in memory only.
+    """
+    def __init__(self, path: str | Path | None):
+        self.path = Path(path) if path else None
+        self._data: dict[str, dict] = {}
+        if self.path and self.path.exists():
+            try:
+                self._data = json.loads(self.path.read_text(encoding="utf-8")).get("accounts", {})
+            except Exception as e:
+                logger.warning("Ignoring unreadable sync state '%s': %s", self.path, e)
+
+    def get(self, account: str, folder: str, uidvalidity: int) -> int | None:
+        """Return the highest fetched UID, or None if unknown or UIDVALIDITY changed."""
+        entry = self._data.get(account, {}).get(folder)
+        if not entry:
+            return None
+        if entry.get("uidvalidity") != uidvalidity:
+            logger.info(
+                "UIDVALIDITY changed for folder '%s' (%s → %s); full resync",
+                folder, entry.get("uidvalidity"), uidvalidity,
+            )
+            return None
+        return entry.get("last_uid")
+
+    def update(self, account: str, folder: str, uidvalidity: int, last_uid: int) -> None:
+        entry = self._data.setdefault(account, {}).get(folder)
+        if entry and entry.get("uidvalidity") == uidvalidity:
+            last_uid = max(last_uid, entry.get("last_uid", 0))
+        self._data[account][folder] = {"uidvalidity": uidvalidity, "last_uid": last_uid}
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps({"accounts": self._data}, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
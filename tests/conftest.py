@@ -1,8 +1,94 @@
+import itertools
 import warnings
 
+import pytest
+from selenium.common.exceptions import InvalidSessionIdException
+from dhl_rerouter_poc.browser_pool import BrowserPool
+from dhl_rerouter_poc.carriers.base import CarrierBase, StepResult
+
 # Suppress undetected_chromedriver distutils deprecation warning
 warnings.filterwarnings(
     "ignore",
     category=DeprecationWarning,
     message="distutils Version classes are deprecated.*"
 )
+
+
+_ids = itertools.count(1)
+
+
+class FakeDriver:
+    """Just enough of a WebDriver for BrowserPool: windows, CDP browser contexts, quit()."""
+    def __init__(self):
+        self.contexts: set[str] = set()
+        self.windows = {"home": None}
+        self.current_window_handle = "home"
+        self.quit_called = False
+        self.alive = True
+        self.switch_to = self
+
+    def execute_cdp_cmd(self, cmd: str, params: dict) -> dict:
+        if not self.alive:
+            raise InvalidSessionIdException("browser gone")
+        n = next(_ids)
+        if cmd == "Target.createBrowserContext":
+            self.contexts.add(f"ctx{n}")
+            return {"browserContextId": f"ctx{n}"}
+        if cmd == "Target.createTarget":
+            self.windows[f"win{n}"] = params["browserContextId"]
+            return {"targetId": f"win{n}"}
+        if cmd == "Target.disposeBrowserContext":
+            self.contexts.remove(params["browserContextId"])
+        return {}
+
+    def window(self, handle: str) -> None:
+        if not self.alive:
+            raise InvalidSessionIdException("browser gone")
+        self.current_window_handle = handle
+
+    def close(self) -> None:
+        del self.windows[self.current_window_handle]
+
+    def quit(self) -> None:
+        self.quit_called = True
+
+
+class TwoStepCarrier(CarrierBase):
+    """A carrier whose check always offers PREFERRED_LOCATION; records 'check' and 'reroute' calls."""
+    carrier_name = "Test"
+
+    def __init__(self):
+        self.calls = []
+
+    def check_reroute_availability(self, tracking_number, zip_code, timeout=20, selenium_headless=False):
+        self.calls.append("check")
+        return StepResult(status="success", data={"delivery_options": ["PREFERRED_LOCATION"]})
+
+    def reroute_shipment(self, tracking_number, zip_code, custom_location, highlight_only=True,
+                         selenium_headless=False, timeout=20):
+        self.calls.append("reroute")
+        return True
+
+
+@pytest.fixture
+def fake_driver() -> type[FakeDriver]:
+    """The FakeDriver class, to subclass or patch in a test."""
+    return FakeDriver
+
+
+@pytest.fixture
+def fake_pool():
+    """fake_pool(**kwargs) → (BrowserPool launching FakeDrivers, list of the drivers it launched)."""
+    def make(**kwargs):
+        launched = []
+
+        def launch():
+            launched.append(FakeDriver())
+            return launched[-1]
+        return BrowserPool(launch=launch, **kwargs), launched
+    return make
+
+
+@pytest.fixture
+def two_step_carrier() -> type[TwoStepCarrier]:
+    return TwoStepCarrier
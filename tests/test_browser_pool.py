@@ -0,0 +1,108 @@
+import threading
+
+import pytest
+from selenium.common.exceptions import InvalidSessionIdException, TimeoutException, WebDriverException
+from dhl_rerouter_poc.browser_pool import BrowserPool
+
+
+def test_sessions_reuse_warm_driver_in_fresh_contexts(fake_pool):
+    pool, launched = fake_pool(max_uses=3)
+    contexts = []
+    for _ in range(5):
+        with pool.session() as driver:
+            contexts.append(driver.windows[driver.current_window_handle])
+            assert driver.current_window_handle != "home"
+    pool.close()
+    assert len(set(contexts)) == 5
+    assert len(launched) == 2 and all(d.quit_called for d in launched)
+    assert all(not d.contexts and list(d.windows) == ["home"] for d in launched)
+    assert pool.stats == {"launches": 2, "sessions": 5, "recycled": 1, "closed": 1}
+
+
+def test_crashed_driver_is_replaced_but_page_errors_are_not(fake_pool):
+    pool, launched = fake_pool(max_uses=0)
+    with pytest.raises(TimeoutException):
+        with pool.session():
+            raise TimeoutException("element not found")
+    with pool.session() as driver:
+        driver.alive = False  # Chrome died while the carrier swallowed the error
+    with pytest.raises(InvalidSessionIdException):
+        with pool.session() as driver:
+            raise InvalidSessionIdException("gone")
+    with pool.session():
+        pass
+    assert len(launched) == 3
+    assert pool.stats["crashes"] == 2
+
+
+def test_failed_relaunch_quits_the_new_driver_and_frees_its_slot(fake_driver):
+    launched = []
+
+    def launch():
+        launched.append(fake_driver())
+        launched[-1].alive = False  # Chrome gone before the first CDP command
+        return launched[-1]
+    pool = BrowserPool(launch=launch, size=1)
+    for _ in range(2):
+        with pytest.raises(InvalidSessionIdException):
+            with pool.session():
+                pass
+    assert len(launched) == 4 and all(d.quit_called for d in launched)
+    assert pool.stats["crashes"] == 4 and "sessions" not in pool.stats
+
+
+def test_sessions_without_browser_contexts_clear_cookies_cache_and_origin_storage(fake_driver):
+    class ContextlessDriver(fake_driver):
+        """A driver without CDP browser contexts: sessions share the default context."""
+        def __init__(self):
+            super().__init__()
+            self.cdp: list[tuple[str, dict]] = []
+            self.url = "about:blank"
+
+        def execute_cdp_cmd(self, cmd: str, params: dict) -> dict:
+            if cmd == "Target.createBrowserContext":
+                raise WebDriverException("unknown method")
+            self.cdp.append((cmd, params))
+            return {}
+
+        def execute_script(self, script: str):
+            assert script == "return location.origin"
+            return "null" if self.url == "about:blank" else "https://www.dhl.de"
+
+        def get(self, url: str) -> None:
+            self.url = url
+
+    pool = BrowserPool(launch=ContextlessDriver, max_uses=0)
+    with pool.session() as driver:
+        driver.get("https://www.dhl.de/en/privatkunden/pakete-empfangen/verfolgen.html")
+    with pool.session() as again:
+        pass
+    pool.close()
+    assert again is driver and driver.url == "about:blank"
+    assert driver.cdp == [
+        ("Network.clearBrowserCookies", {}),
+        ("Network.clearBrowserCache", {}),
+        ("Storage.clearDataForOrigin", {"origin": "https://www.dhl.de", "storageTypes": "all"}),
+        ("Network.clearBrowserCookies", {}),
+        ("Network.clearBrowserCache", {}),
+    ]
+    assert pool.stats["sessions"] == 2 and "crashes" not in pool.stats
+
+
+def test_pool_bounds_concurrent_drivers(fake_pool):
+    pool, launched = fake_pool(size=2)
+    barrier = threading.Barrier(2)
+    active = []
+
+    def check():
+        with pool.session() as driver:
+            active.append(driver)
+            barrier.wait(timeout=5)
+
+    threads = [threading.Thread(target=check) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    pool.close()
+    assert len(launched) == 2 and pool.stats["sessions"] == 4
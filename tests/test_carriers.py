@@ -0,0 +1,407 @@
+import pytest
+from benchmarks.dhl_standin import DhlStandin
+from dhl_rerouter_poc.carriers.base import StepResult
+from dhl_rerouter_poc.carriers.dhl import DHLCarrier
+from dhl_rerouter_poc.sources.base import FetchedMessage
+
+
+def test_default_check_and_reroute_runs_both_steps_on_demand(two_step_carrier):
+    carrier = two_step_carrier()
+    assert carrier.check_and_reroute("X1", "12345", "Garage", lambda info: False)[1] is None
+    info, success = carrier.check_and_reroute("X1", "12345", "Garage", lambda info: bool(info.data["delivery_options"]))
+    assert success is True and carrier.calls == ["check", "check", "reroute"]
+
+
+def test_dhl_check_and_reroute_uses_one_session(monkeypatch, fake_pool):
+    pool, launched = fake_pool()
+    carrier = DHLCarrier(browser_pool=pool)
+    calls = []
+
+    def fake_check(driver, wait, tracking_number, zip_code, result):
+        calls.append(("check", driver))
+        result.data["delivery_options"].append("PREFERRED_LOCATION")
+        return True  # delivery options left expanded
+
+    def fake_submit(driver, wait, tracking_number, custom_location, highlight_only, expanded=False, result=None):
+        calls.append(("submit", driver, expanded))
+        return True
+
+    monkeypatch.setattr(carrier, "_check", fake_check)
+    monkeypatch.setattr(carrier, "_submit_preferred_location", fake_submit)
+    info, success = carrier.check_and_reroute("JJD000390018282329702", "12345", "Garage", lambda info: True)
+    assert success is True and info.status == "success"
+    (_, checked), (_, submitted, expanded) = calls
+    assert checked is submitted and expanded
+    assert carrier.check_and_reroute("JJD000390018282329702", "12345", "Garage", lambda info: False)[1] is None
+    assert pool.stats["sessions"] == 2 and len(launched) == 1
+
+
+def test_dhl_http_fast_path_reads_recorded_responses():
+    with DhlStandin() as srv:
+        srv.add_shipment("00340434175967421417", "in_transit")
+        srv.add_shipment("JJD000390018282329702", "delivered")
+        carrier = DHLCarrier(srv.carrier_config())
+        info = carrier.check_reroute_availability("00340434175967421417", "12345")
+        delivered = carrier.check_reroute_availability("JJD000390018282329702", "12345")
+        carrier.check_reroute_availability("00340434175967421417", "12345")
+        carrier.close()
+        assert srv.stats == {"connections": 1, "requests": 3}  # one keep-alive session
+        assert srv.requests[0][1] == {"piececode": "00340434175967421417", "zip": "12345", "language": "en"}
+    assert info.status == "success" and not info.errors
+    assert info.data["delivery_status"] == "The shipment has been loaded onto the delivery vehicle"
+    assert info.data["delivery_date"] == "2025-04-22" and info.data["delivered"] is False
+    assert info.data["delivery_options"] == [
+        "PREFERRED_LOCATION", "PREFERRED_NEIGHBOUR", "MERGED_LR_PACKSTATION_AND_BRANCH", "DELIVERY_CANCELLATION"
+    ]
+    assert info.data["shipment_history"][-1].startswith("2025-04-20T14:12:00+02:00\nThe instruction data")
+    assert info.data["custom_dropoff_input_present"]
+    assert delivered.data["delivered"] and delivered.data["delivery_options"] == []
+    assert carrier.stats == {"answered": 3}
+
+
+def test_dhl_standin_serves_tracking_pages_for_the_page_selectors():
+    import requests
+    from bs4 import BeautifulSoup
+    from dhl_rerouter_poc import selectors_dhlde as sel
+
+    with DhlStandin(render_delay=0.2) as srv:
+        srv.add_shipment("00340434175967421417", "in_transit")
+        srv.add_shipment("JJD000390018282329702", "delivered")
+        carrier = DHLCarrier(srv.carrier_config(tracking_mode="browser"))
+        url = carrier._tracking_url("00340434175967421417,JJD000390018282329702", "12345")
+        page = BeautifulSoup(requests.get(url, timeout=5).text, "html.parser")
+        saved = requests.post(srv.base_url + "/reroute", json={"piececode": "00340434175967421417", "location": "Garage"})
+        assert saved.ok and srv.reroutes == [("00340434175967421417", "Garage")]
+        assert url.startswith(srv.base_url + sel.TRACKING_PAGE_PATH)
+    assert DHLCarrier()._tracking_url("X1", "12345").startswith("https://www.dhl.de/en/privatkunden/")
+    assert "const RENDER_DELAY = 200;" in page.body.find("script", recursive=False).string
+    in_transit = page.select_one(sel.shipment_selector("00340434175967421417")[1])
+    delivered = page.select_one(sel.shipment_selector("JJD000390018282329702")[1])
+    assert page.select_one(sel.delivery_status_selector("JJD000390018282329702")[1]).text == (
+        "The shipment has been successfully delivered"
+    )
+    assert in_transit.find("dt", string="Estimated delivery").find_next_sibling().text == "Tu, 22.04.2025"
+    assert len(in_transit.select(sel.SHIPMENT_HISTORY_ENTRY)) == 4
+    # not rendered, but its text matches DELIVERED_TEXTS (see test_dhl_browser_ignores_hidden_delivered_text)
+    assert "delivered" in in_transit.select_one("div.status-tooltip[hidden]").text
+    assert "You are not at home" in in_transit.select_one("div.shipmentServices button").text
+    # rendered on click by the page script
+    assert [li["data-name"] for li in in_transit.select("template.options li[data-name]")][:2] == [
+        "PREFERRED_LOCATION", "PREFERRED_NEIGHBOUR"
+    ]
+    assert not delivered.select("template.options li[data-name]")
+    form = in_transit.select_one("template.preferred-location form")
+    assert form.select_one("div.radioFormgroup.otherDropPoint input[type='text']")
+    assert form.select_one("input[type='checkbox']") and form.find("button", string="Confirm").has_attr("disabled")
+
+
+
+def _chrome_available() -> bool:
+    try:
+        import undetected_chromedriver as uc
+    except ImportError:
+        return False
+    return uc.find_chrome_executable() is not None
+
+
+@pytest.mark.skipif(not _chrome_available(), reason="needs Chrome")
+def test_dhl_browser_ignores_hidden_delivered_text():
+    from dhl_rerouter_poc.browser_pool import BrowserPool
+
+    with DhlStandin() as srv:
+        srv.add_shipment("00340434175967421417", "in_transit")
+        pool = BrowserPool(headless=True, size=1, max_uses=0)
+        carrier = DHLCarrier(srv.carrier_config(tracking_mode="browser"), browser_pool=pool)
+        try:
+            info = carrier.check_reroute_availability("00340434175967421417", "12345", timeout=10)
+        finally:
+            carrier.close()
+            pool.close()
+    assert info.status == "success"
+    assert info.data["delivered"] is False  # the hidden tooltip and the i18n JSON say "delivered"
+
+
+@pytest.mark.parametrize("blocked", ["consent_page", "rate_limited", "incomplete", "unreachable"])
+def test_dhl_http_fast_path_falls_back_to_browser(monkeypatch, blocked, fake_pool):
+    srv = DhlStandin()
+    srv.start()
+    srv.add_shipment("00340434175967421417", "no_options" if blocked == "incomplete" else "in_transit")
+    if blocked == "consent_page":
+        srv.block()
+    elif blocked == "rate_limited":
+        srv.block("00340434175967421417", status=429)
+    pool, launched = fake_pool()
+    carrier = DHLCarrier(srv.carrier_config(), browser_pool=pool)
+    if blocked == "unreachable":
+        srv.stop()
+    browser_checks = []
+
+    def fake_check(driver, wait, tracking_number, zip_code, result):
+        browser_checks.append(tracking_number)
+        result.data["delivery_status"] = "from the page"
+        return False
+
+    monkeypatch.setattr(carrier, "_check", fake_check)
+    try:
+        info = carrier.check_reroute_availability("00340434175967421417", "12345")
+    finally:
+        srv.stop()
+    assert browser_checks == ["00340434175967421417"] and info.data["delivery_status"] == "from the page"
+    assert carrier.stats == {"incomplete" if blocked == "incomplete" else "blocked": 1}
+    assert info.data["delivery_options"] == []
+
+
+def test_dhl_reroute_records_timings_when_the_page_fails_to_load(monkeypatch, fake_pool):
+    pool, _ = fake_pool()
+    carrier = DHLCarrier(browser_pool=pool)
+
+    def failing_load(driver, wait, url):
+        raise TimeoutError("shipment block never appeared")
+
+    monkeypatch.setattr(carrier, "_load_page", failing_load)
+    assert carrier.reroute_shipment("JJD000390018282329702", "12345", "Garage") is False
+    assert carrier.step_counts["reroute.total"] == 1
+
+
+def test_dhl_http_check_reroutes_in_browser(monkeypatch, fake_pool):
+    pool, launched = fake_pool()
+    with DhlStandin() as srv:
+        srv.add_shipment("00340434175967421417", "in_transit")
+        carrier = DHLCarrier(srv.carrier_config(), browser_pool=pool)
+        rerouted = []
+        monkeypatch.setattr(carrier, "_check", lambda *args: pytest.fail("tracking page loaded for the check"))
+        monkeypatch.setattr(carrier, "reroute_shipment", lambda tn, *args: rerouted.append(tn) or True)
+        info, success = carrier.check_and_reroute(
+            "00340434175967421417", "12345", "Garage", lambda info: "PREFERRED_LOCATION" in info.data["delivery_options"]
+        )
+    assert success is True and rerouted == ["00340434175967421417"]
+    assert not launched  # the check itself never started Chrome
+
+
+def test_dhl_check_many_queries_groups_and_falls_back_per_code(monkeypatch, fake_pool):
+    codes = ["00340434175967421417", "JJD000390018282329702", "00340434161094042342"]
+    pool, launched = fake_pool()
+    with DhlStandin() as srv:
+        srv.add_shipment(codes[0], "in_transit")
+        srv.add_shipment(codes[1], "delivered")
+        srv.add_shipment(codes[2], "no_options")
+        carrier = DHLCarrier(srv.carrier_config(batch_size=2), browser_pool=pool)
+        pages = []
+
+        def fake_group(driver, tracking_numbers, zip_code, timeout, results):
+            pages.append(list(tracking_numbers))
+            for tn in tracking_numbers:
+                results[tn].data["delivery_status"] = "from the page"
+
+        monkeypatch.setattr(carrier, "_check_group", fake_group)
+        results = carrier.check_many(codes, "12345")
+        queried = [query["piececode"] for _, query in srv.requests]
+    assert queried == [",".join(codes[:2]), codes[2]]
+    assert pages == [[codes[2]]]  # only the incomplete response needs the browser
+    assert list(results) == codes
+    assert results[codes[1]].data["delivered"] and results[codes[2]].data["delivery_status"] == "from the page"
+    assert carrier.stats == {"answered": 2, "incomplete": 1}
+
+
+def test_run_checks_collected_codes_in_batches(monkeypatch, fake_pool, two_step_carrier):
+    from dhl_rerouter_poc import main
+
+    calls = []
+
+    class BatchCarrier(two_step_carrier):
+        def __init__(self, cfg=None, browser_pool=None):
+            super().__init__()
+
+        def check_many(self, tracking_numbers, zip_code, timeout=20, selenium_headless=False):
+            calls.append(list(tracking_numbers))
+            return super().check_many(tracking_numbers, zip_code, timeout, selenium_headless)
+
+    monkeypatch.setattr(main, "DHLCarrier", BatchCarrier)
+    monkeypatch.setattr(main, "BrowserPool", lambda **kwargs: fake_pool()[0])
+    monkeypatch.setattr(main, "_reroute_decision", lambda shipment, info, code, highlight_only, config: False)
+    monkeypatch.setattr(main, "build_source", lambda *args: Source())
+
+    class Source:
+        def iter_messages(self):
+            return iter([
+                FetchedMessage(f"Sendung JJD00039001828232970{i} und JJD00039001828232971{i}") for i in range(3)
+            ])
+
+    config = {
+        "email": {"source": "mbox"},
+        "tracking_patterns": {"DHL": [r"\bJJD\d{10,}\b"]},
+        "carrier_configs": {"DHL": {"batch_size": 4}},
+    }
+    main.run(zip_code="12345", custom_location="Garage", highlight_only=True, config=config)
+    assert [len(batch) for batch in calls] == [4, 2]
+
+
+class FakeElement:
+    def __init__(self, page, name):
+        self.page, self.name, self.value = page, name, ""
+
+    def is_displayed(self):
+        return True
+
+    def is_enabled(self):
+        return True
+
+    def click(self):
+        self.page.clicks.append(self.name)
+
+    def clear(self):
+        self.value = ""
+
+    def send_keys(self, text):
+        self.value += text
+
+
+class FakePage:
+    """Tracking page whose elements are all rendered and enabled; records clicks and scripts."""
+    def __init__(self):
+        self.clicks, self.scripts, self.elements = [], [], {}
+
+    def find_element(self, by, selector):
+        return self.elements.setdefault(selector, FakeElement(self, selector))
+
+    def execute_script(self, script, *args):
+        self.scripts.append(script)
+
+
+@pytest.mark.parametrize("interactive", [False, True])
+def test_dhl_reroute_form_waits_for_elements_not_sleeps(monkeypatch, interactive):
+    from selenium.webdriver.support.ui import WebDriverWait
+    from dhl_rerouter_poc import selectors_dhlde as sel
+    from dhl_rerouter_poc.carriers import dhl
+
+    pauses, blinks = [], []
+    monkeypatch.setattr(dhl.time, "sleep", pauses.append)
+    monkeypatch.setattr(dhl, "blink_element", lambda driver, el, **kwargs: blinks.append(el.name))
+    page = FakePage()
+    carrier = DHLCarrier({"interactive": interactive, "highlight_pause": 2})
+    result = StepResult(status="success")
+    assert carrier._submit_preferred_location(page, WebDriverWait(page, 1), "X1", "Garage", False, result=result)
+    assert page.clicks == [sel.DELIVERY_TOGGLE, sel.PREFERRED_LOCATION_OPTION, sel.CONSENT_CHECKBOX, sel.CONFIRM_BUTTON]
+    assert page.elements[sel.CUSTOM_DROPOFF_INPUT].value == "Garage"
+    assert set(result.timings) == {
+        "reroute.expand", "reroute.select_option", "reroute.form", "reroute.enter_location", "reroute.consent",
+        "reroute.confirm",
+    }
+    assert not pauses and blinks == ([sel.CONFIRM_BUTTON] if interactive else [])
+
+    assert carrier._submit_preferred_location(page, WebDriverWait(page, 1), "X1", "Garage", True, expanded=True)
+    assert pauses == ([2.0] if interactive else [])
+
+
+def test_dhl_reads_tracking_page_in_one_script_call(monkeypatch):
+    from selenium.webdriver.support.ui import WebDriverWait
+    from dhl_rerouter_poc import selectors_dhlde as sel
+    from dhl_rerouter_poc.carriers import dhl
+
+    page = FakePage()
+    extracted = {
+        "delivery_status": "The shipment has been loaded onto the delivery vehicle",
+        "delivery_date": "Tu, 22.04.2025",
+        "delivered_texts": ["Estimated delivery"],
+        "delivery_options": ["PREFERRED_LOCATION", "ABSENCE_NOTICE", "PREFERRED_DAY"],
+        "shipment_history": ["Tu, 22.04.2025 07:41 Braunschweig loaded", ""],
+        "custom_dropoff_input_present": True,
+    }
+    calls = []
+
+    def execute_script(script, *args):
+        calls.append(args)
+        return extracted if script == dhl._EXTRACT_TRACKING_JS else None
+
+    monkeypatch.setattr(page, "execute_script", execute_script)
+    monkeypatch.setattr(page, "find_element", lambda *args: pytest.fail("field read by find_element"))
+
+    def find_elements(by, selector):
+        assert selector == sel.DELIVERY_OPTION_ITEMS, "field read by find_elements"  # only waited for
+        return [FakeElement(page, selector)]
+    monkeypatch.setattr(page, "find_elements", find_elements, raising=False)
+    monkeypatch.setattr(DHLCarrier, "_click", staticmethod(lambda driver, wait, locator: None))
+    result = DHLCarrier._new_result()
+    wait = WebDriverWait(page, 1)
+    monkeypatch.setattr(wait, "until", lambda condition: True)
+    assert DHLCarrier()._read_tracking(page, wait, "X1", result)
+    assert calls == [(None, sel.delivery_status_selector("X1")[1], sel.DELIVERY_DATE, sel.DELIVERED_TEXTS,
+                      sel.DELIVERY_OPTION_ITEMS, sel.SHIPMENT_HISTORY_ENTRY, sel.CUSTOM_DROPOFF_INPUT)]
+    assert result.status == "success" and result.data == {
+        "delivery_status": "The shipment has been loaded onto the delivery vehicle",
+        "delivery_date": "2025-04-22",
+        "delivered": False,
+        "delivery_options": ["PREFERRED_LOCATION", "PREFERRED_DAY"],
+        "shipment_history": ["Tu, 22.04.2025 07:41 Braunschweig loaded"],
+        "custom_dropoff_input_present": True,
+    }
+
+
+@pytest.mark.parametrize("items_after", [2, None])
+def test_dhl_waits_for_option_items_after_the_list_renders(monkeypatch, items_after):
+    from selenium.webdriver.support.ui import WebDriverWait
+    from dhl_rerouter_poc import selectors_dhlde as sel
+    from dhl_rerouter_poc.carriers import dhl
+
+    page = FakePage()
+    polls = []
+
+    def find_elements(by, selector):
+        # the list container is already there; its items arrive on the `items_after`th poll (None: never)
+        polls.append(selector)
+        return [FakeElement(page, selector)] if items_after and len(polls) >= items_after else []
+
+    def execute_script(script, *args):
+        options = ["PREFERRED_LOCATION"] if items_after and len(polls) >= items_after else []
+        return {
+            "delivery_status": "The shipment is on its way", "delivery_date": "Tu, 22.04.2025",
+            "delivered_texts": [], "delivery_options": options, "shipment_history": [],
+            "custom_dropoff_input_present": False,
+        } if script == dhl._EXTRACT_TRACKING_JS else None
+
+    monkeypatch.setattr(page, "find_elements", find_elements, raising=False)
+    monkeypatch.setattr(page, "execute_script", execute_script)
+    monkeypatch.setattr(DHLCarrier, "_click", staticmethod(lambda driver, wait, locator: None))
+    carrier = DHLCarrier({"options_wait": 2 if items_after else 0.1})
+    result = DHLCarrier._new_result()
+    assert carrier._read_tracking(page, WebDriverWait(page, 1), "X1", result)
+    assert set(polls) == {sel.DELIVERY_OPTION_ITEMS}
+    assert result.status == "success" and not result.errors  # an empty list is an answer, not an error
+    assert result.data["delivery_options"] == (["PREFERRED_LOCATION"] if items_after else [])
+
+
+def test_dhl_blocks_resources_per_session_and_counts_page_transfer(monkeypatch, fake_pool, fake_driver):
+    from selenium.webdriver.support.ui import WebDriverWait
+    from dhl_rerouter_poc import selectors_dhlde as sel
+    from dhl_rerouter_poc.carriers import dhl
+
+    sent = []
+    original = fake_driver.execute_cdp_cmd
+    monkeypatch.setattr(fake_driver, "execute_cdp_cmd",
+                        lambda self, cmd, params: sent.append((cmd, params)) or original(self, cmd, params))
+    page = FakePage()
+    page.get = lambda url: None
+    monkeypatch.setattr(page, "execute_script",
+                        lambda script, *args: [51200, 12] if script == dhl._PAGE_TRANSFER_JS else None)
+
+    def fake_check(driver, wait, tracking_number, zip_code, result):
+        wait = WebDriverWait(page, 1)
+        monkeypatch.setattr(wait, "until", lambda condition: True)
+        result.timings["page_load"] = carrier._load_page(page, wait, carrier._tracking_url(tracking_number, zip_code))
+        return False
+
+    pool, _ = fake_pool()
+    carrier = DHLCarrier({"block_resources": True}, browser_pool=pool)
+    monkeypatch.setattr(carrier, "_check", fake_check)
+    for _ in range(2):
+        assert "page_load" in carrier.check_reroute_availability("X1", "12345").timings
+    assert sent.count(("Network.setBlockedURLs", {"urls": sel.BLOCKED_URLS})) == 2
+    assert carrier.page_stats["loads"] == 2 and carrier.page_stats["bytes"] == 102400
+    assert carrier.page_stats["requests"] == 24
+
+    sent.clear()
+    carrier = DHLCarrier({"block_resources": False, "blocked_urls": ["*.png"]}, browser_pool=pool)
+    monkeypatch.setattr(carrier, "_check", fake_check)
+    carrier.check_reroute_availability("X1", "12345")
+    assert not [cmd for cmd, _ in sent if cmd.startswith("Network.")]
+    assert carrier.page_stats["loads"] == 1
@@ -0,0 +1,86 @@
+import threading
+import time
+
+import pytest
+from dhl_rerouter_poc.carriers.base import StepResult
+from dhl_rerouter_poc.check_pool import CheckPool
+from dhl_rerouter_poc.sources.base import FetchedMessage
+
+
+class _Active:
+    """Count concurrently running calls and remember the peak."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.now = 0
+        self.peak = 0
+
+    def __call__(self, seconds: float = 0.05) -> None:
+        with self.lock:
+            self.now += 1
+            self.peak = max(self.peak, self.now)
+        time.sleep(seconds)
+        with self.lock:
+            self.now -= 1
+
+
+def test_per_carrier_limit_bounds_concurrency():
+    pool = CheckPool(workers=6)
+    dhl, other = _Active(), _Active()
+    for _ in range(6):
+        pool.submit("DHL", 2, dhl)
+        pool.submit("GLS", 3, other)
+    pool.join()
+    pool.close()
+    assert dhl.peak == 2 and other.peak == 3
+    assert pool.stats["DHL"] == 6 and pool.stats["peak_concurrency"] == 5
+
+
+def test_single_worker_runs_inline_and_errors_propagate():
+    order = []
+    pool = CheckPool(workers=1)
+    for i in range(3):
+        pool.submit("DHL", 2, order.append, i)
+    assert order == [0, 1, 2]
+
+    def fail():
+        raise RuntimeError("carrier down")
+
+    pool = CheckPool(workers=2)
+    pool.submit("DHL", 1, fail)
+    with pytest.raises(RuntimeError):
+        pool.join()
+    pool.close()
+
+
+def test_run_checks_shipments_concurrently(monkeypatch, fake_pool, two_step_carrier):
+    from dhl_rerouter_poc import main
+
+    active = _Active()
+
+    class SlowCarrier(two_step_carrier):
+        def __init__(self, cfg=None, browser_pool=None):
+            super().__init__()
+
+        def check_reroute_availability(self, tracking_number, zip_code, timeout=20, selenium_headless=False):
+            active(0.1)
+            return StepResult(status="success", data={"delivery_options": []})
+
+    class Source:
+        def iter_messages(self):
+            return iter([FetchedMessage(f"Sendung JJD00039001828232970{i}") for i in range(8)])
+
+    monkeypatch.setattr(main, "DHLCarrier", SlowCarrier)
+    monkeypatch.setattr(main, "BrowserPool", lambda **kwargs: fake_pool()[0])
+    monkeypatch.setattr(main, "_reroute_decision", lambda shipment, info, code, highlight_only, config: False)
+    monkeypatch.setattr(main, "build_source", lambda *args: Source())
+    config = {
+        "email": {"source": "mbox"},
+        "tracking_patterns": {"DHL": [r"\bJJD\d{10,}\b"]},
+        "checks": {"workers": 8},
+        "carrier_configs": {"DHL": {"max_concurrent": 4}},
+    }
+    start = time.perf_counter()
+    main.run(zip_code="12345", custom_location="Garage", highlight_only=True, config=config)
+    elapsed = time.perf_counter() - start
+    assert active.peak == 4
+    assert elapsed < 0.5  # 8 checks of 0.1 s, four at a time
@@ -0,0 +1,98 @@
+from pathlib import Path
+
+import undetected_chromedriver as uc
+
+from dhl_rerouter_poc import driver_cache as dc
+from dhl_rerouter_poc.browser_pool import launch_chrome
+from dhl_rerouter_poc.driver_cache import DriverCache, clean_profile
+
+
+class FakeChrome:
+    launches = []
+
+    def __init__(self, options=None, **kwargs):
+        self.kwargs = kwargs
+        FakeChrome.launches.append(self)
+
+
+def _fake_builds(monkeypatch, builds):
+    def build_driver(self, version, driver):
+        builds.append(("driver", version))
+        driver.parent.mkdir(parents=True, exist_ok=True)
+        driver.write_bytes(b"\x7fELF ... undetected chromedriver ...")
+
+    def build_profile(self, version, driver, profile):
+        builds.append(("profile", version))
+        (profile / "Default").mkdir(parents=True)
+        (profile / "Default" / "Preferences").write_text("{}")
+
+    monkeypatch.setattr(DriverCache, "_build_driver", build_driver)
+    monkeypatch.setattr(DriverCache, "_build_profile", build_profile)
+    monkeypatch.setattr(uc, "Chrome", FakeChrome)
+    FakeChrome.launches = []
+
+
+def test_cold_launch_builds_driver_and_template_once(monkeypatch, tmp_path):
+    builds = []
+    _fake_builds(monkeypatch, builds)
+    monkeypatch.setattr(dc.tempfile, "tempdir", str(tmp_path))  # profile copies
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setattr(dc, "chrome_version", lambda path=None: "124.0.6367.91")
+    cache = DriverCache(cache_dir)
+    first, second = cache.launch(uc.ChromeOptions()), cache.launch(uc.ChromeOptions())
+    assert builds == [("driver", "124.0.6367.91"), ("profile", "124.0.6367.91")]
+    assert cache.stats["cold_launches"] == 1 and cache.stats["warm_launches"] == 1
+    assert first.kwargs["driver_executable_path"] == str(cache.driver_path("124.0.6367.91"))
+    assert first.kwargs["version_main"] == 124
+    profiles = {c.kwargs["user_data_dir"] for c in (first, second)}
+    assert len(profiles) == 2 and str(cache.profile_path("124.0.6367.91")) not in profiles
+    assert all((Path(p) / "Default" / "Preferences").is_file() for p in profiles)
+    assert first.keep_user_data_dir is False  # uc deletes the copy on quit()
+
+    # a new process reuses the cache; a Chrome update replaces it
+    warm = DriverCache(cache_dir)
+    warm.launch(uc.ChromeOptions())
+    assert warm.stats["warm_launches"] == 1 and len(builds) == 2
+    monkeypatch.setattr(dc, "chrome_version", lambda path=None: "125.0.6422.60")
+    updated = DriverCache(cache_dir)
+    updated.launch(uc.ChromeOptions())
+    assert builds[2:] == [("driver", "125.0.6422.60"), ("profile", "125.0.6422.60")]
+    assert sorted(p.name for p in cache_dir.iterdir()) == ["chromedriver-125.0.6422.60", "profile-125.0.6422.60"]
+
+
+def test_clean_profile_keeps_settings_only(tmp_path):
+    for name in ("Local State", "SingletonLock", "Crashpad/reports/x", "Default/Preferences", "Default/Cookies",
+                 "Default/Cookies-journal", "Default/Cache/Cache_Data/data_0", "Default/History",
+                 "Default/Network/Cookies", "Default/Local Storage/leveldb/LOG"):
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_text("x")
+    clean_profile(tmp_path)
+    assert sorted(str(p.relative_to(tmp_path)) for p in tmp_path.rglob("*") if p.is_file()) == [
+        "Default/Preferences", "Local State",
+    ]
+
+
+def test_launch_falls_back_without_chrome_version(monkeypatch, tmp_path):
+    _fake_builds(monkeypatch, [])
+    monkeypatch.setattr(dc, "chrome_version", lambda path=None: None)
+    chrome = launch_chrome(headless=True, driver_cache=DriverCache(tmp_path))
+    assert chrome.kwargs == {} and not list(tmp_path.iterdir())
+
+
+def test_launch_falls_back_when_the_driver_download_fails(monkeypatch, tmp_path, caplog):
+    import urllib.error
+
+    _fake_builds(monkeypatch, [])
+    monkeypatch.setattr(dc, "chrome_version", lambda path=None: "124.0.6367.91")
+    attempts = []
+
+    def failing_download(self, version, driver):
+        attempts.append(version)
+        raise urllib.error.URLError("Temporary failure in name resolution")
+
+    monkeypatch.setattr(DriverCache, "_build_driver", failing_download)
+    cache = DriverCache(tmp_path)
+    chromes = [launch_chrome(headless=True, driver_cache=cache) for _ in range(2)]
+    assert [c.kwargs for c in chromes] == [{}, {}]
+    assert attempts == ["124.0.6367.91"]  # not retried on every launch
+    assert "name resolution" in caplog.text
@@ -0,0 +1,265 @@
+import pytest
+from benchmarks.imap_standin import ImapStandin, make_message
+from dhl_rerouter_poc.email_client import ImapEmailClient
+
+
+@pytest.fixture
+def standin():
+    with ImapStandin() as srv:
+        srv.add_folder("INBOX")
+        srv.add_folder("Einkauf")
+        yield srv
+
+
+def _client(srv: ImapStandin, tmp_path, **extra) -> ImapEmailClient:
+    cfg = srv.client_config(["INBOX", "Einkauf"], incremental=True, state_file=str(tmp_path / "state.json"), **extra)
+    return ImapEmailClient(cfg)
+
+
+def test_fetch_messages_newest_first(standin, tmp_path):
+    standin.add_message("INBOX", make_message("old", "first JJD000390018282329702"))
+    standin.add_message("INBOX", make_message("new", "second"))
+    standin.add_message("Einkauf", make_message("shop", "third"))
+    bodies = ImapEmailClient(standin.client_config(["INBOX", "Einkauf"])).fetch_messages()
+    assert [b.strip() for b in bodies] == ["second", "first JJD000390018282329702", "third"]
+
+
+def test_incremental_sync_only_fetches_new_messages(standin, tmp_path):
+    standin.add_message("INBOX", make_message("a", "one"))
+    standin.add_message("Einkauf", make_message("b", "two"))
+    assert len(_client(standin, tmp_path).fetch_messages()) == 2
+
+    # a fresh client (= next cron run) reads the persisted watermark
+    assert _client(standin, tmp_path).fetch_messages() == []
+
+    standin.add_message("INBOX", make_message("c", "three"))
+    bodies = _client(standin, tmp_path).fetch_messages()
+    assert [b.strip() for b in bodies] == ["three"]
+
+
+def test_incremental_sync_full_resync_on_uidvalidity_change(standin, tmp_path):
+    standin.add_message("INBOX", make_message("a", "one"))
+    standin.add_message("INBOX", make_message("b", "two"))
+    assert len(_client(standin, tmp_path).fetch_messages()) == 2
+
+    standin.set_uidvalidity("INBOX", 99)
+    assert len(_client(standin, tmp_path).fetch_messages()) == 2
+    assert _client(standin, tmp_path).fetch_messages() == []
+
+
+def test_full_sync_ignores_watermark(standin, tmp_path):
+    standin.add_message("INBOX", make_message("a", "one"))
+    _client(standin, tmp_path).fetch_messages()
+    client = _client(standin, tmp_path)
+    client.full_sync = True
+    assert len(client.fetch_messages()) == 1
+
+
+def test_uid_set_compression():
+    from dhl_rerouter_poc.imap_utils import uid_set as _uid_set
+    assert _uid_set([7, 3, 1, 2, 9, 10]) == "1:3,7,9:10"
+    assert _uid_set([5]) == "5"
+
+
+def test_batched_fetch_keeps_order_and_saves_round_trips(standin):
+    for i in range(7):
+        standin.add_message("INBOX", make_message(f"m{i}", f"body {i}"))
+    client = ImapEmailClient(standin.client_config(["INBOX"], fetch_batch_size=3, fetch_mode="rfc822"))
+    before = standin.stats["commands"]
+    bodies = client.fetch_messages()
+    assert [b.strip() for b in bodies] == [f"body {i}" for i in reversed(range(7))]
+    # CAPABILITY, LOGIN, EXAMINE, SORT (rejected), SEARCH, 3 x UID FETCH, LOGOUT;
+    # no Message-ID pass, since a single folder cannot hold copies from another
+    assert standin.stats["commands"] - before == 9
+
+
+def test_text_parts_mode_skips_attachments(standin):
+    html = "<html><body><p>Track <b>JJD000390018282329702</b></p></body></html>"
+    standin.add_message("INBOX", make_message("order", "plain JJD000390018282329702", html=html, attachment=b"%PDF" * 50000))
+    standin.add_message("INBOX", make_message("fwd", "Gr\u00fc\u00dfe, no code here"))
+    cfg = standin.client_config(["INBOX"])
+
+    sent = standin.stats["bytes_sent"]
+    full = ImapEmailClient({**cfg, "fetch_mode": "rfc822"}).fetch_messages()
+    full_bytes = standin.stats["bytes_sent"] - sent
+
+    sent = standin.stats["bytes_sent"]
+    parts = ImapEmailClient(cfg).fetch_messages()
+    parts_bytes = standin.stats["bytes_sent"] - sent
+
+    assert parts == full
+    assert parts_bytes < full_bytes / 10
+
+
+def test_text_parts_mode_caps_part_size(standin):
+    standin.add_message("INBOX", make_message("newsletter", "x" * 5000 + " tail"))
+    bodies = ImapEmailClient(standin.client_config(["INBOX"], max_part_bytes=100)).fetch_messages()
+    assert bodies[0].startswith("x" * 50)
+    assert len(bodies[0]) <= 100
+
+
+def test_text_parts_walks_nested_structure():
+    from dhl_rerouter_poc.imap_utils import fetch_item, text_parts
+    text = (
+        b'1 (UID 4 BODYSTRUCTURE ((("TEXT" "PLAIN" ("CHARSET" "iso-8859-1") NIL NIL "QUOTED-PRINTABLE" 10 1)'
+        b'("TEXT" "HTML" NIL NIL NIL "BASE64" 20 1) "ALTERNATIVE")'
+        b'("APPLICATION" "PDF" ("NAME" "a.pdf") NIL NIL "BASE64" 999)'
+        b'("MESSAGE" "RFC822" NIL NIL NIL "7BIT" 50 (NIL NIL NIL NIL NIL NIL NIL NIL NIL NIL) '
+        b'("TEXT" "PLAIN" NIL NIL NIL "7BIT" 5 1) 3) "MIXED" ("BOUNDARY" "xyz") NIL NIL))'
+    )
+    assert text_parts(fetch_item(text, b"BODYSTRUCTURE")) == [
+        ("1.1", "plain", "iso-8859-1", "quoted-printable"),
+        ("1.2", "html", "utf-8", "base64"),
+        ("3.1", "plain", "utf-8", "7bit"),
+    ]
+
+
+
+def test_text_parts_defaults_a_missing_type_to_text_plain():
+    from dhl_rerouter_poc.imap_utils import fetch_item, text_parts
+    text = (
+        b'1 (UID 5 BODYSTRUCTURE ((NIL NIL NIL NIL NIL "7BIT" 10 1)'
+        b'("APPLICATION" NIL NIL NIL NIL "BASE64" 20) "MIXED" ("BOUNDARY" "xyz") NIL NIL))'
+    )
+    assert text_parts(fetch_item(text, b"BODYSTRUCTURE")) == [("1", "plain", "utf-8", "7bit")]
+    assert text_parts(fetch_item(b'1 (BODYSTRUCTURE (NIL NIL NIL NIL NIL NIL 10 1))', b"BODYSTRUCTURE")) == [
+        ("1", "plain", "utf-8", "7bit")
+    ]
+
+
+PATTERNS = {"DHL": [r"\bJJD\d{10,}\b", r"\b0034\d{8,}\b"], "GLS": [r"\b\d{11}\b"]}
+
+
+def test_prefilter_searches_only_candidates(standin, caplog):
+    standin.add_message("INBOX", make_message("Newsletter", "nothing to see"))
+    standin.add_message("INBOX", make_message("Order", "parcel JJD000390018282329702"))
+    standin.add_message("INBOX", make_message("Ihre Sendung", "see website"))
+    standin.add_message("INBOX", make_message("hi", "no code", sender="noreply@dhl.de"))
+    prefilter = {"enabled": True, "senders": ["dhl.de"], "subjects": ["Sendung"]}
+    client = ImapEmailClient(standin.client_config(["INBOX"], prefilter=prefilter, byte_prefilter=False), PATTERNS)
+    bodies = client.fetch_messages()
+    assert [b.strip() for b in bodies] == ["no code", "see website", "parcel JJD000390018282329702"]
+    assert client.stats["prefilter_skipped"] == 1
+    assert "no usable literal prefix for GLS" in caplog.text
+
+
+def test_byte_prefilter_decodes_only_candidates(standin):
+    html = "<html><body><p>Sendung <b>JJD000390018282329702</b></p></body></html>"
+    standin.add_message("INBOX", make_message("order", "Gr\u00fc\u00dfe", html=html))
+    standin.add_message("INBOX", make_message("newsletter", "Gr\u00fc\u00dfe, 20% Rabatt", html="<p>Rabatt</p>"))
+    standin.add_message("INBOX", make_message("gls", "Paket 12345678905 unterwegs"))
+    standin.add_message("INBOX", make_message("gls html", "Hallo", html="<p>Paket 12345<b>678905</b></p>"))
+    for mode in ("text_parts", "rfc822"):
+        plain = ImapEmailClient(standin.client_config(["INBOX"], fetch_mode=mode)).fetch_messages()
+        client = ImapEmailClient(standin.client_config(["INBOX"], fetch_mode=mode), PATTERNS)
+        bodies = client.fetch_messages()
+        assert bodies == [plain[0], plain[1], "", plain[3]]  # newest first
+        assert "12345678905" in bodies[0]
+        assert client.stats["decode_skipped"] == 1
+
+
+def test_byte_prefilter_rules():
+    from dhl_rerouter_poc.parser import BytePrefilter
+
+    f = BytePrefilter(PATTERNS)
+    assert f.may_contain(b"Sendung JJD0003") and f.may_contain(b"Paket 12345678905")
+    assert not f.may_contain(b"Bestellung 1234567890 vom 01.02.2025")
+    assert f.may_contain("JJD".encode("utf-16-le"), "UTF-16")
+    assert BytePrefilter({"X": [r"[A-Z]{2}\d{9}DE"]}).may_contain(b"anything")
+    # inline markup splitting a code only hides it from the raw-bytes test of text parts
+    assert f.may_contain(b"<p>Paket 12345<b>678905</b></p>", html=True)
+    assert f.may_contain(b"Sendung <span>JJD</span>0003", html=True)
+    assert not f.may_contain(b"Paket 12345<b>678905</b>")
+    assert not f.may_contain(b"<p>Bestellung <b>1234567890</b></p>", html=True)
+
+
+def test_prefilter_falls_back_when_server_rejects_criteria(standin):
+    standin.rejected_search_keys.add("BODY")
+    standin.add_message("INBOX", make_message("Newsletter", "nothing to see"))
+    standin.add_message("INBOX", make_message("Order", "parcel JJD000390018282329702"))
+    client = ImapEmailClient(standin.client_config(["INBOX"], prefilter={"enabled": True}), PATTERNS)
+    assert len(client.fetch_messages()) == 2
+    assert client.stats["prefilter_skipped"] == 0
+
+
+def test_pooled_fetch_matches_serial_order(standin):
+    standin.latency = 0.005
+    for i in range(120):
+        standin.add_message("INBOX", make_message(f"in {i}", f"inbox {i}"))
+    for i in range(5):
+        standin.add_message("Einkauf", make_message(f"shop {i}", f"shop {i}"))
+    serial = ImapEmailClient(standin.client_config(["INBOX", "Einkauf"])).fetch_messages()
+    pooled = ImapEmailClient(standin.client_config(["INBOX", "Einkauf"], max_connections=3)).fetch_messages()
+    assert pooled == serial
+    assert serial[0].strip() == "inbox 119" and serial[-1].strip() == "shop 0"
+
+
+def test_iter_messages_yields_metadata(standin):
+    standin.add_message("INBOX", make_message(
+        "=?utf-8?q?Ihre_Sendung_kommt?=", "JJD000390018282329702", sender="DHL <noreply@dhl.de>", message_id="<a1@dhl.de>",
+    ))
+    (msg,) = ImapEmailClient(standin.client_config(["INBOX"])).iter_messages()
+    assert msg.folder == "INBOX" and msg.uid == 1
+    assert msg.message_id == "<a1@dhl.de>"
+    assert msg.subject == "Ihre Sendung kommt"
+    assert msg.sender == "DHL <noreply@dhl.de>"
+    assert msg.date and msg.date[:4].isdigit()
+    assert msg.body.strip() == "JJD000390018282329702"
+
+
+def test_iter_messages_advances_watermark_only_for_consumed_folders(standin, tmp_path):
+    standin.add_message("INBOX", make_message("a", "one"))
+    standin.add_message("Einkauf", make_message("b", "two"))
+    messages = _client(standin, tmp_path).iter_messages()
+    assert next(messages).folder == "INBOX"
+    assert next(messages).folder == "Einkauf"  # INBOX is done once the consumer moves on
+    messages.close()  # stop before Einkauf was processed
+    assert [m.folder for m in _client(standin, tmp_path).iter_messages()] == ["Einkauf"]
+
+
+def test_duplicates_across_folders_are_fetched_once(standin, tmp_path):
+    copy = make_message("Ihre Sendung", "parcel JJD000390018282329702" + " padding" * 500, message_id="<dup@dhl.de>")
+    standin.add_message("INBOX", copy)
+    standin.add_message("INBOX", make_message("other", "unrelated"))
+    standin.add_message("Einkauf", copy)
+    standin.add_message("Einkauf", make_message("shop", "only in Einkauf"))
+    for mode in ("text_parts", "rfc822"):
+        (tmp_path / mode).mkdir()
+        client = _client(standin, tmp_path / mode, fetch_mode=mode)
+        messages = list(client.iter_messages())
+        assert [(m.folder, m.body.strip()[:6]) for m in messages] == [
+            ("INBOX", "unrela"), ("INBOX", "parcel"), ("Einkauf", "only i"),
+        ]
+        assert client.stats["duplicates_skipped"] == 1
+        assert client.stats["duplicate_bytes_skipped"] > 4000
+        # the skipped copy still advances the Einkauf watermark
+        assert _client(standin, tmp_path / mode).fetch_messages() == []
+
+
+def test_dropped_connection_is_replaced_and_failed_uids_are_retried(standin, tmp_path):
+    import imaplib
+
+    for i in range(1, 7):
+        standin.add_message("INBOX", make_message(f"m{i}", f"message {i}"))
+    client = _client(standin, tmp_path, fetch_mode="rfc822", fetch_batch_size=2)
+    connect, connections = client._connect, []
+
+    def flaky_connect(idle=False):
+        mail = connect(idle)
+        if not connections:
+            uid = mail.uid
+
+            def dropped_on_second_fetch(cmd, *args):
+                if cmd == "FETCH" and args == ("3:4", "(RFC822)"):
+                    raise imaplib.IMAP4.abort("socket error: EOF")
+                return uid(cmd, *args)
+            mail.uid = dropped_on_second_fetch
+        connections.append(mail)
+        return mail
+
+    client._connect = flaky_connect
+    assert [b.strip() for b in client.fetch_messages()] == ["message 6", "message 5", "message 2", "message 1"]
+    assert len(connections) == 2  # the aborted connection was not reused
+    assert connections[0].sock.fileno() == -1  # and its socket was closed
+    retried = _client(standin, tmp_path, fetch_mode="rfc822").fetch_messages()
+    assert [b.strip() for b in retried] == ["message 6", "message 5", "message 4", "message 3"]
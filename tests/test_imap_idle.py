@@ -0,0 +1,116 @@
+import queue
+import threading
+import time
+
+import pytest
+from benchmarks.imap_standin import ImapStandin, make_message
+from dhl_rerouter_poc.email_client import ImapEmailClient
+
+IDLE = {"renew_seconds": 30, "reconnect_delay": 0.1, "max_reconnect_delay": 0.5, "poll_seconds": 0.2}
+
+
+@pytest.fixture
+def standin():
+    with ImapStandin() as srv:
+        srv.add_folder("INBOX")
+        srv.add_folder("Einkauf")
+        yield srv
+
+
+def _watch(client: ImapEmailClient):
+    """Consume watch_messages() in a thread; returns (queue of messages, stop event, thread)."""
+    received: queue.Queue = queue.Queue()
+    stop = threading.Event()
+
+    def consume():
+        for message in client.watch_messages(stop=stop):
+            received.put(message)
+
+    t = threading.Thread(target=consume, daemon=True)
+    t.start()
+    return received, stop, t
+
+
+def _wait_for_idle(srv: ImapStandin, count: int, timeout: float = 5) -> None:
+    deadline = time.monotonic() + timeout
+    while srv.stats["idle"] < count:
+        assert time.monotonic() < deadline, "client never entered IDLE"
+        time.sleep(0.02)
+
+
+def test_watch_yields_backlog_then_new_messages(standin):
+    standin.add_message("INBOX", make_message("old", "old JJD000390018282329702"))
+    client = ImapEmailClient(standin.client_config(["INBOX", "Einkauf"], idle=IDLE))
+    received, stop, t = _watch(client)
+    try:
+        assert received.get(timeout=5).body.strip() == "old JJD000390018282329702"
+        _wait_for_idle(standin, 2)
+        t0 = time.monotonic()
+        standin.add_message("Einkauf", make_message("new", "new JJD000390018282329703"))
+        msg = received.get(timeout=5)
+        assert msg.folder == "Einkauf" and msg.body.strip() == "new JJD000390018282329703"
+        assert time.monotonic() - t0 < 2
+        assert received.empty()
+    finally:
+        stop.set()
+        t.join(timeout=10)
+    assert not t.is_alive()
+
+
+def test_watch_remembers_a_bounded_number_of_message_ids(standin):
+    copies = [make_message(f"m{i}", f"body {i}", message_id=f"<m{i}@dhl.de>") for i in range(3)]
+    for copy in copies:
+        standin.add_message("INBOX", copy)
+    client = ImapEmailClient(standin.client_config(["INBOX", "Einkauf"], idle={**IDLE, "known_message_ids": 2}))
+    received, stop, t = _watch(client)
+    try:
+        assert {received.get(timeout=5).body.strip() for _ in range(3)} == {"body 0", "body 1", "body 2"}
+        _wait_for_idle(standin, 2)
+        assert list(client._known_message_ids) == ["<m1@dhl.de>", "<m2@dhl.de>"]  # the oldest is forgotten
+        standin.add_message("Einkauf", copies[2])
+        standin.add_message("Einkauf", copies[0])
+        assert received.get(timeout=5).body.strip() == "body 0"
+        time.sleep(0.5)
+        assert received.empty()  # the copy of m2 is still known
+        assert len(client._known_message_ids) == 2
+    finally:
+        stop.set()
+        t.join(timeout=10)
+    assert not t.is_alive()
+
+
+def test_watch_reconnects_after_drop(standin):
+    client = ImapEmailClient(standin.client_config(["INBOX"], idle=IDLE))
+    received, stop, t = _watch(client)
+    try:
+        _wait_for_idle(standin, 1)
+        standin.drop_connections()
+        standin.add_message("INBOX", make_message("while down", "missed while disconnected"))
+        assert received.get(timeout=5).body.strip() == "missed while disconnected"
+        _wait_for_idle(standin, 2)
+        standin.add_message("INBOX", make_message("after", "after reconnect"))
+        assert received.get(timeout=5).body.strip() == "after reconnect"
+    finally:
+        stop.set()
+        t.join(timeout=10)
+
+
+def test_watch_renews_idle_and_polls_without_idle_support(standin):
+    client = ImapEmailClient(standin.client_config(["INBOX"], idle={**IDLE, "renew_seconds": 0.2}))
+    received, stop, t = _watch(client)
+    try:
+        _wait_for_idle(standin, 4)
+    finally:
+        stop.set()
+        t.join(timeout=10)
+
+    standin.idle = False
+    client = ImapEmailClient(standin.client_config(["INBOX"], idle=IDLE))
+    received, stop, t = _watch(client)
+    try:
+        time.sleep(0.3)
+        standin.add_message("INBOX", make_message("polled", "found by NOOP polling"))
+        assert received.get(timeout=5).body.strip() == "found by NOOP polling"
+    finally:
+        stop.set()
+        t.join(timeout=10)
@@ -0,0 +1,96 @@
+import email
+import mailbox
+
+import pytest
+from benchmarks.imap_standin import make_message
+from dhl_rerouter_poc.email_client import message_text
+from dhl_rerouter_poc.sources import build_source
+from dhl_rerouter_poc.sources.local import MaildirSource, MboxSource
+
+MESSAGES = [
+    make_message("plain", "Your parcel JJD000390018282329702 is on its way.", message_id="<p@example.com>"),
+    make_message(
+        "alt", "Sendung 00340434161094042342", sender="DHL <noreply@dhl.de>",
+        html="<html><body><p>Sendung <b>00340434161094042342</b></p><script>x()</script></body></html>",
+    ),
+    make_message("attach", "Grüße aus Köln", attachment=b"%PDF-1.4" + bytes(range(256)) * 40),
+    make_message("From line", "From here on\nthe text continues\n\n"),
+]
+
+
+def _expected(raw: bytes) -> str:
+    return message_text(email.message_from_bytes(raw))
+
+
+def test_mbox_source_matches_email_package(tmp_path):
+    path = tmp_path / "export.mbox"
+    box = mailbox.mbox(path)
+    for raw in MESSAGES:
+        box.add(raw)
+    box.close()
+
+    messages = list(MboxSource(path, max_part_bytes=0).iter_messages())
+    stored = [bytes(m.as_bytes()) for m in mailbox.mbox(path)]
+    assert [m.body for m in messages] == [_expected(raw) for raw in stored]
+    assert [m.subject for m in messages] == ["plain", "alt", "attach", "From line"]
+    assert messages[0].message_id == "<p@example.com>" and messages[0].uid == 1
+    assert messages[1].sender == "DHL <noreply@dhl.de>"
+    assert messages[0].folder == "export.mbox"
+
+
+def test_maildir_source_and_factory(tmp_path):
+    box = mailbox.Maildir(tmp_path / "Einkauf")
+    for raw in MESSAGES:
+        box.add(raw)
+    (tmp_path / "Einkauf" / "new" / "empty").write_bytes(b"")
+
+    source = build_source({"source": "maildir", "source_path": str(tmp_path / "Einkauf")})
+    assert isinstance(source, MaildirSource)
+    bodies = sorted(source.fetch_messages())
+    assert bodies == sorted(_expected(raw) for raw in MESSAGES)
+
+    with pytest.raises(ValueError):
+        build_source({"source": "pst"})
+
+
+def test_part_cap_and_crlf_archive(tmp_path):
+    raw = make_message("big", "x" * 5000, html="<p>" + "y" * 5000 + "</p>").replace(b"\n", b"\r\n")
+    path = tmp_path / "crlf.mbox"
+    path.write_bytes(b"From a@b Sat Jan  3 01:05:34 1996\r\n" + raw + b"\r\n")
+    (msg,) = MboxSource(path, max_part_bytes=100).iter_messages()
+    assert msg.subject == "big"
+    assert msg.body.startswith("x" * 50) and "y" * 50 in msg.body
+    assert len(msg.body) <= 200
+
+
+def test_parts_without_content_type_default_like_the_email_package(tmp_path):
+    untyped = [
+        b"From: a@b\nSubject: bare\n\nparcel JJD000390018282329702\n",
+        b"Subject: mixed\nMIME-Version: 1.0\nContent-Type: multipart/mixed; boundary=b\n\n"
+        b"--b\n\nSendung 00340434175967421417\n--b\nContent-Type: application/pdf\n\n%PDF\n--b--\n",
+        b"Subject: digest\nMIME-Version: 1.0\nContent-Type: multipart/digest; boundary=d\n\n"
+        b"--d\n\nSubject: inner\nFrom: x@y\n\nparcel JJD149160000010324577\n--d--\n",
+    ]
+    box = mailbox.mbox(tmp_path / "untyped.mbox")
+    for raw in untyped:
+        box.add(raw)
+    box.close()
+
+    messages = list(MboxSource(tmp_path / "untyped.mbox").iter_messages())
+    assert [m.body for m in messages] == [_expected(raw) for raw in untyped]
+    assert "JJD149160000010324577" in messages[2].body and "Subject: inner" not in messages[2].body
+
+
+def test_byte_prefilter_skips_messages_without_candidates(tmp_path):
+    path = tmp_path / "export.mbox"
+    box = mailbox.mbox(path)
+    for raw in MESSAGES:
+        box.add(raw)
+    box.close()
+
+    patterns = {"DHL": [r"\bJJD\d{10,}\b", r"\b0034\d{8,}\b"]}
+    source = build_source({"source": "mbox", "source_path": str(path)}, patterns)
+    bodies = [m.body for m in source.iter_messages()]
+    unfiltered = [m.body for m in MboxSource(path).iter_messages()]
+    assert bodies == unfiltered[:2] + ["", ""]
+    assert source.decode_skipped == 2
@@ -1,13 +1,38 @@
+import shutil
 import pytest
 from unittest.mock import patch
 from dhl_rerouter_poc import main, config
+from dhl_rerouter_poc.carriers.base import StepResult
+from dhl_rerouter_poc.email_client import FetchedMessage
 from test_scenarios_model import RerouteTestScenario, load_scenarios
 from contextlib import ExitStack
 
-@pytest.fixture(scope="session")
-def test_config():
+@pytest.fixture
+def test_config(tmp_path, monkeypatch):
+    """config.yaml.example as the project's config.yaml, so no local config.yaml or .env is needed."""
+    shutil.copy(config.PROJECT_ROOT / "config.yaml.example", tmp_path / "config.yaml")
+    monkeypatch.setattr(config, "PROJECT_ROOT", tmp_path)
+    monkeypatch.setenv("MAILBOX_USER", "user@example.com")
+    monkeypatch.setenv("MAILBOX_PASS", "secret")
     return config.load_config()
 
+def _tracking_result(scenario: RerouteTestScenario, code: str) -> StepResult:
+    if scenario.reroute_available:
+        data = {
+            "delivery_status": "The shipment is on its way",
+            "delivered": False,
+            "delivery_date": "2025-04-22",
+            "delivery_options": ["PREFERRED_LOCATION"],
+        }
+    else:
+        data = {
+            "delivery_status": "The shipment has been successfully delivered",
+            "delivered": True,
+            "delivery_date": "2025-04-18",
+            "delivery_options": [],
+        }
+    return StepResult(status="success", data={"tracking_number": code, **data})
+
 @pytest.mark.parametrize(
     "scenario",
     load_scenarios("tests/reroute_scenarios.yaml"),
@@ -17,37 +42,30 @@ def test_tracking_scenarios(scenario: RerouteTestScenario, test_config):
     """
     Table-driven test for main.run():
     - tracking_number: code to test
-    - reroute_available: if reroute_checker should say reroutable
-    - calendar_away: if calendar_checker should say user is away
-    - expected_reroute: if reroute_shipment should be called
+    - reroute_available: if the carrier check should offer reroute options
+    - calendar_away: if should_reroute should say the recipient is away
+    - expected_reroute: if the shipment should be rerouted
     """
-    test_email = [f"Your DHL tracking number is {scenario.tracking_number}"]
-    def fake_check_reroute_availability(code, zip_code, timeout=20, selenium_headless=True):
-        if scenario.reroute_available:
-            return {
-                "tracking_number": code,
-                "delivered": False,
-                "delivery_date": "2025-04-22",
-                "delivery_options": ["PREFERRED_LOCATION"],
-                "protocol": {"errors": []}
-            }
-        else:
-            return {
-                "tracking_number": code,
-                "delivered": True,
-                "delivery_date": "2025-04-18",
-                "delivery_options": [],
-                "protocol": {"errors": []}
-            }
+    test_email = [FetchedMessage(f"Your DHL tracking number is {scenario.tracking_number}", folder="INBOX", uid=1)]
+    checked, rerouted = [], []
+
+    def fake_check_and_reroute(self, code, zip_code, custom_location, decide, highlight_only=True, selenium_headless=False, timeout=20):
+        # one carrier session: the check result goes to main's decision, which asks for the reroute
+        checked.append(code)
+        info = _tracking_result(scenario, code)
+        if not decide(info):
+            return info, None
+        rerouted.append(code)
+        return info, True
+
     patchers = [
-        patch("dhl_rerouter_poc.email_client.ImapEmailClient.fetch_messages", return_value=test_email),
-        patch("dhl_rerouter_poc.reroute_checker.check_reroute_availability", side_effect=fake_check_reroute_availability),
-        patch("dhl_rerouter_poc.calendar_checker.should_reroute", return_value=scenario.calendar_away),
+        patch("dhl_rerouter_poc.email_client.ImapEmailClient.iter_messages", return_value=iter(test_email)),
+        patch("dhl_rerouter_poc.main.DHLCarrier.check_and_reroute", fake_check_and_reroute),
+        patch("dhl_rerouter_poc.main.should_reroute", return_value=scenario.calendar_away),
     ]
-    if not scenario.expected_reroute:
-        patchers.append(patch("dhl_rerouter_poc.main.reroute_shipment", return_value=True))
     with ExitStack() as stack:
-        mocks = [stack.enter_context(p) for p in patchers]
+        for p in patchers:
+            stack.enter_context(p)
         main.run(
             weeks=test_config["email"]["lookback_weeks"],
             zip_code=test_config["carrier_configs"]["DHL"]["zip"],
@@ -57,8 +75,5 @@ def test_tracking_scenarios(scenario: RerouteTestScenario, test_config):
             timeout=test_config["carrier_configs"]["DHL"].get("timeout", 20),
             config=test_config
         )
-        if scenario.expected_reroute:
-            # Optionally assert side effects, logs, or UI changes here
-            pass
-        else:
-            mocks[-1].assert_not_called()
+    assert checked == [scenario.tracking_number]
+    assert rerouted == ([scenario.tracking_number] if scenario.expected_reroute else [])
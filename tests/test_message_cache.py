@@ -0,0 +1,77 @@
+import pytest
+from benchmarks.imap_standin import ImapStandin, make_message
+from dhl_rerouter_poc.email_client import ImapEmailClient
+from dhl_rerouter_poc.message_cache import MessageCache
+
+
+@pytest.fixture
+def standin():
+    with ImapStandin() as srv:
+        srv.add_folder("INBOX")
+        yield srv
+
+
+def _client(srv: ImapStandin, tmp_path, **extra) -> ImapEmailClient:
+    cache = {"enabled": True, "path": str(tmp_path / "cache.sqlite")}
+    return ImapEmailClient(srv.client_config(["INBOX"], cache=cache, **extra))
+
+
+def test_rescan_is_served_from_cache(standin, tmp_path):
+    for i in range(5):
+        standin.add_message("INBOX", make_message(f"m{i}", f"body {i}", message_id=f"<m{i}@example.com>"))
+    first = _client(standin, tmp_path)
+    bodies = first.fetch_messages()
+    assert first.stats["cache_misses"] == 5 and first.stats["cache_hits"] == 0
+
+    standin.add_message("INBOX", make_message("new", "body 5"))
+    second = _client(standin, tmp_path)
+    sent = standin.stats["bytes_sent"]
+    messages = list(second.iter_messages())
+    assert [m.body for m in messages[1:]] == bodies
+    assert messages[-1].message_id == "<m0@example.com>" and messages[-1].subject == "m0"
+    assert second.stats["cache_hits"] == 5 and second.stats["cache_misses"] == 1
+    # only the new message was downloaded
+    assert standin.stats["bytes_sent"] - sent < 2000
+
+
+def test_cache_is_separate_per_fetch_mode_html_parser_and_uidvalidity(standin, tmp_path):
+    standin.add_message("INBOX", make_message("a", "one"))
+    _client(standin, tmp_path).fetch_messages()
+    rfc822 = _client(standin, tmp_path, fetch_mode="rfc822")
+    rfc822.fetch_messages()
+    assert rfc822.stats["cache_hits"] == 0
+    bs4 = _client(standin, tmp_path, html_parser="bs4")
+    bs4.fetch_messages()
+    assert bs4.stats["cache_hits"] == 0
+
+    standin.set_uidvalidity("INBOX", 7)
+    client = _client(standin, tmp_path)
+    client.fetch_messages()
+    assert client.stats["cache_hits"] == 0
+
+
+def test_new_tracking_pattern_is_served_from_cache(standin, tmp_path):
+    standin.add_message("INBOX", make_message("order", "parcel JJD000390018282329702"))
+    standin.add_message("INBOX", make_message("ups", "Sendung 1Z999AA10123456784 unterwegs"))
+    dhl = {"DHL": [r"\bJJD\d{10,}\b"]}
+    first = ImapEmailClient(standin.client_config(["INBOX"], cache={"enabled": True, "path": str(tmp_path / "c.sqlite")}), dhl)
+    assert [b.strip() for b in first.fetch_messages()] == ["", "parcel JJD000390018282329702"]
+    assert first.stats["decode_skipped"] == 1
+
+    patterns = {**dhl, "UPS": [r"\b1Z[0-9A-Z]{16}\b"]}
+    second = ImapEmailClient(standin.client_config(["INBOX"], cache={"enabled": True, "path": str(tmp_path / "c.sqlite")}), patterns)
+    sent = standin.stats["bytes_sent"]
+    bodies = second.fetch_messages()
+    assert second.stats["cache_hits"] == 2 and second.stats["cache_misses"] == 0
+    assert "1Z999AA10123456784" in bodies[0]
+    assert standin.stats["bytes_sent"] - sent < 2000  # no message downloaded again
+
+
+def test_lru_eviction_keeps_recently_used_entries():
+    cache = MessageCache(None, max_bytes=250)
+    for uid in (1, 2, 3):
+        cache.put_many("acct", "INBOX", 1, {uid: {"body": "x" * 100}})
+    cache.get_many("acct", "INBOX", 1, [1])  # 1 is now more recent than 2
+    assert cache.evict() == 1
+    assert set(cache.get_many("acct", "INBOX", 1, [1, 2, 3])) == {1, 3}
+    assert cache.hit_rate() == pytest.approx(3 / 4)
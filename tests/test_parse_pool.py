@@ -0,0 +1,88 @@
+import mailbox
+
+import pytest
+from benchmarks.imap_standin import ImapStandin, make_message
+from dhl_rerouter_poc.checksums import validators_for
+from dhl_rerouter_poc.email_client import ImapEmailClient
+from dhl_rerouter_poc.parse_pool import ParsePool
+from dhl_rerouter_poc.parser import TrackingMatcher
+from dhl_rerouter_poc.sources.local import MboxSource
+
+PATTERNS = {"DHL": [r"\bJJD\d{10,}\b", r"\b0034\d{8,}\b"], "GLS": [r"\b\d{11}\b"]}
+
+
+def _messages() -> list[bytes]:
+    raws = []
+    for i in range(12):
+        if i % 3 == 0:
+            raws.append(make_message(f"order {i}", f"Paket JJD{i:018d}", html=f"<p>GLS <b>1234567890{i % 10}</b></p>"))
+        elif i % 3 == 1:
+            raws.append(make_message(f"news {i}", "Grüße", html="<p>20 % Rabatt</p>"))
+        else:
+            raws.append(make_message(f"ssc {i}", "Sendung 00340434175967421417", attachment=b"%PDF" * 100))
+    return raws
+
+
+def _expected(messages) -> list[tuple]:
+    matcher = TrackingMatcher(PATTERNS, validators_for({}))
+    return [(m.subject, matcher.extract(m.body)) for m in messages]
+
+
+@pytest.fixture
+def mbox_path(tmp_path):
+    path = tmp_path / "backfill.mbox"
+    box = mailbox.mbox(path)
+    for raw in _messages():
+        box.add(raw)
+    box.close()
+    return path
+
+
+def test_parallel_parse_matches_serial_order(mbox_path):
+    expected = _expected(MboxSource(mbox_path).iter_messages())
+    pool = ParsePool(PATTERNS, validators_for({}), workers=2, chunk_size=5, min_messages=4)
+    results = list(pool.map(MboxSource(mbox_path).iter_raw_messages()))
+    assert pool.parallel
+    assert [(m.subject, codes) for m, codes in results] == expected
+    assert pool.rejected == {"GLS": 4}  # 12345678900/3/6/9: only ...5 has a valid check digit
+    assert results[0][0].body.startswith("Paket JJD") and results[1][0].body.startswith("Grüße")
+    assert results[4][0].body == ""  # parsed by a worker: bodies without codes are not shipped back
+
+
+def test_small_runs_parse_in_process(mbox_path):
+    pool = ParsePool(PATTERNS, workers=4, min_messages=100)
+    results = list(pool.map(MboxSource(mbox_path).iter_raw_messages()))
+    assert not pool.parallel
+    matcher = TrackingMatcher(PATTERNS)  # no validators: all GLS candidates are kept
+    assert [codes for _, codes in results] == [matcher.extract(m.body) for m in MboxSource(mbox_path).iter_messages()]
+    assert all(m.parts is None and m.raw is None for m, _ in results)
+
+
+def test_results_stream_before_the_pool_threshold(mbox_path):
+    consumed = []
+
+    def source():
+        for message in MboxSource(mbox_path).iter_raw_messages():
+            consumed.append(message)
+            yield message
+
+    pool = ParsePool(PATTERNS, validators_for({}), workers=2, chunk_size=5, min_messages=4)
+    results = pool.map(source())
+    first, codes = next(results)
+    assert len(consumed) == 1 and first.subject == "order 0" and "JJD000000000000000000" in codes
+    assert not pool.parallel
+    assert len(list(results)) == 11 and pool.parallel
+
+
+@pytest.mark.parametrize("fetch_mode", ["text_parts", "rfc822"])
+def test_parallel_parse_of_imap_messages(fetch_mode):
+    with ImapStandin() as srv:
+        for raw in _messages():
+            srv.add_message("INBOX", raw)
+        cfg = srv.client_config(["INBOX"], fetch_mode=fetch_mode)
+        expected = _expected(ImapEmailClient(cfg, PATTERNS).iter_messages())
+        client = ImapEmailClient(cfg, PATTERNS)
+        pool = ParsePool(PATTERNS, validators_for({}), workers=2, chunk_size=3, min_messages=1)
+        results = [(m.subject, codes) for m, codes in pool.map(client.iter_raw_messages())]
+    assert pool.parallel
+    assert results == expected
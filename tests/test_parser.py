@@ -0,0 +1,107 @@
+import re
+
+import pytest
+from dhl_rerouter_poc.parser import TrackingMatcher, extract_tracking_codes, literal_prefix, strip_html
+
+PATTERNS = {
+    "DHL": [r"\bJJD\d{10,}\b", r"\b0034\d{8,}\b"],
+    "Hermes": [r"\bHR\d{10}\b"],
+    "UPS": [r"\b1Z[0-9A-Z]{16}\b"],
+    "DPD": [r"\b0145\d{8}\b"],
+    "eBay Global": [r"\bEE\d{25}N\b"],
+    "GLS": [r"\b\d{11}\b"],
+}
+
+
+def _per_pattern(text: str, patterns: dict) -> dict:
+    found = {}
+    for carrier, pats in patterns.items():
+        for pat in pats:
+            for m in re.findall(pat, text):
+                found[m] = carrier
+    return found
+
+
+def test_matcher_matches_per_pattern_scan():
+    texts = [
+        "",
+        "no codes here, just 12345 and JJD12",
+        "Sendung JJD000390018282329702 und 00340434161094042342, GLS 12345678901",
+        "UPS 1Z999AA10123456784 / Hermes HR1234567890 / DPD 014512345678 / EE1234567890123456789012345N",
+        "JJD000390018282329702 twice JJD000390018282329702, 123456789012 is not GLS",
+    ]
+    matcher = TrackingMatcher(PATTERNS)
+    for text in texts:
+        assert matcher.extract(text) == _per_pattern(text, PATTERNS)
+        assert extract_tracking_codes(text, PATTERNS) == _per_pattern(text, PATTERNS)
+
+
+def test_matcher_later_carrier_wins_and_groups_fall_back():
+    both = {"A": [r"\b\d{11}\b"], "B": [r"\b\d{11}\b"]}
+    assert TrackingMatcher(both).extract("code 12345678901") == {"12345678901": "B"}
+
+    grouped = {"X": [r"ID-(\d{4})"], "Y": [r"\bQ\d{3}\b"]}
+    text = "ID-1234 and Q123"
+    assert TrackingMatcher(grouped).extract(text) == _per_pattern(text, grouped) == {"1234": "X", "Q123": "Y"}
+    assert TrackingMatcher({}).extract(text) == {}
+
+
+def test_matcher_without_shared_anchor():
+    patterns = {"A": [r"^REF\d{4}"], "B": [r"[XY]\d{3}\b"], "C": [r"(?:AB|CD)\d{2}"]}
+    text = "REF1234 X123 aY456 CD12 REF9999"
+    assert TrackingMatcher(patterns).extract(text) == _per_pattern(text, patterns)
+
+
+def test_literal_prefix():
+    assert literal_prefix(r"\bJJD\d{10,}\b") == "JJD"
+    assert literal_prefix(r"\b0034\d{8,}\b") == "0034"
+    assert literal_prefix(r"\b\d{11}\b") == ""
+    assert literal_prefix(r"\b(?:JJD|JVGL)\d+") == ""
+
+
+def test_checksum_validators():
+    from dhl_rerouter_poc.checksums import dhl, gls, gs1_mod10, ups_1z
+
+    assert gs1_mod10("340434175967421417")
+    assert dhl("00340434175967421417") and not dhl("00340434175967421418")
+    assert dhl("JJD149160000010324577")  # JJD numbers carry no public check digit
+    assert ups_1z("1Z999AA10123456784") and not ups_1z("1Z999AA10123456785")
+    assert gls("12345678905") and not gls("12345678901")
+
+
+def test_matcher_drops_invalid_candidates():
+    from dhl_rerouter_poc.checksums import validators_for
+
+    matcher = TrackingMatcher(PATTERNS, validators_for({"tracking_validation": {"UPS": False}}))
+    text = (
+        "Sendung 00340434175967421417, Bestellnr. 00340434175967421418, JJD149160000010324577, "
+        "GLS 12345678905, Tel. 12345678901, UPS 1Z999AA10123456785"
+    )
+    assert matcher.extract(text) == {
+        "00340434175967421417": "DHL",
+        "JJD149160000010324577": "DHL",
+        "12345678905": "GLS",
+        "1Z999AA10123456785": "UPS",
+    }
+    assert matcher.rejected == {"DHL": 1, "GLS": 1}
+
+
+HTML = (
+    "<html><head><title>Versand</title><style>td{color:red}</style><script>var JJD=1</script></head>"
+    '<body><!-- JJD000000000000000001 --><table><tr><td>Sendung</td><td>JJD000390018282329702</td><td>Details</td></tr></table>'
+    '<a href="https://www.dhl.de/de/privatkunden.html?piececode=JJD149160000010324577">verfolgen</a>'
+    "<p>Gr&uuml;&szlig;e&nbsp;&amp; Dank</p></body></html>"
+)
+
+
+def test_strip_html_stream_drops_scripts_and_keeps_links():
+    text = strip_html(HTML)
+    assert "color" not in text and "var" not in text and "JJD000000000000000001" not in text
+    assert "Versand" in text and "Grüße\xa0& Dank" in text
+    assert extract_tracking_codes(text, PATTERNS) == {"JJD000390018282329702": "DHL", "JJD149160000010324577": "DHL"}
+
+
+def test_strip_html_bs4_is_selectable():
+    assert strip_html(HTML, "bs4").startswith("VersandSendungJJD000390018282329702Details")
+    with pytest.raises(ValueError):
+        strip_html(HTML, "lxml")